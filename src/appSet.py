@@ -1,11 +1,14 @@
 import uuid
+import math
 import logging
+import numpy as np
 from typing import Any, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 from .eventSet import EventSet, generate_events
 from .userSet import UserSet, create_new_user
+from .popularity import FenwickTree, RankIndex
 
 # Note: I just added the DESCOMENTAR line to indicate where the event generation for the graph would be triggered
 
@@ -18,6 +21,21 @@ class ApplicationSet:
         # Initialize a counter to keep track of App IDs (App_0, App_1)
         self.app_counter: int = 0
 
+        # Name -> ids with that name (creation order), for O(1) lookups by name
+        self._ids_by_name: Dict[str, List[str]] = {}
+
+        # Popularity-weighted sampling: one slot per app in creation order. _popularity holds
+        # each app's popularity and _alive 1/0, so both weighted and uniform choices are O(log A).
+        self._slot_ids: List[Optional[str]] = []
+        self._slot_of: Dict[str, int] = {}
+        self._popularity = FenwickTree()
+        self._alive = FenwickTree()
+        # Apps by popularity rank, for surge/drop targets
+        self._ranks = RankIndex()
+        # Local apps bucketed by grid cell (cell size = local_radius_influence), built on first use
+        self._local_radius: Optional[float] = None
+        self._local_cells: Dict[Tuple[int, int], List[str]] = {}
+
     def getNextAppId(self) -> str:
         """Generates the next sequential application name."""
         name = f"App_{self.app_counter}"
@@ -35,26 +53,25 @@ class ApplicationSet:
         Returns:
             str: The name of the selected application.
         """
-        total_popularity = sum(app['popularity'] for app in self.applications.values())
-        if total_popularity == 0:
+        total_popularity = self._popularity.total()
+        if total_popularity <= 0:
             return None
 
-        # Normalize the popularity values
-        normalized_popularity = {app_id: app['popularity'] / total_popularity for app_id, app in self.applications.items()}
-
-        # Select a random application based on the normalized popularity
-        keys = list(normalized_popularity.keys())
-        weights = list(normalized_popularity.values())
-        selected_app = str(sim_set.rng_app.choice(keys, p=weights))
-        return selected_app
+        u = sim_set.rng_app.random() * total_popularity
+        return self._slot_ids[self._popularity.find(u)]
     
     def selectRandomAppIdByPopularity(self, popularity: Optional[float], sim_set: Any) -> str:
         """Selects a random application based on its popularity."""
         if popularity is None:
             popularity = 0.0
-        selected_apps = [app for app in self.applications.values() if app['popularity'] >= popularity]
-        
         rng = sim_set.rng_app
+
+        # Popularities are non-negative, so a threshold <= 0 (the default) keeps every app:
+        # uniform choice by creation order, drawing exactly as rng.choice over the app list would
+        if popularity <= 0 and self.applications:
+            return self._nth_app_id(int(rng.integers(0, len(self.applications))))
+
+        selected_apps = [app for app in self.applications.values() if app['popularity'] >= popularity]
         
         if selected_apps:
             rndApp = rng.choice(selected_apps)
@@ -66,35 +83,150 @@ class ApplicationSet:
         return rndApp['id']
         
     def select_app_for_user(self, user_pos: Tuple[float, float], pop_conf: Dict[str, Any], sim_set: Any) -> Optional[str]:
-        app_list = list(self.applications.values())
-        if not app_list:
+        if not self.applications:
             return None
             
         rng = sim_set.rng_user
-        import numpy as np
         
         radius = pop_conf.get('local_radius_influence', 0.15)
         
-        # Calculate dynamic probabilities
-        probs = []
-        for app in app_list:
-            p = app['popularity']
-            if app.get('is_local') and app.get('pos') is not None and user_pos is not None:
+        # Local apps near the user get their popularity boosted; the boost is sampled as
+        # extra weight on top of the maintained popularity tree
+        boosts = []
+        if user_pos is not None:
+            for app_id in self._local_apps_near(user_pos, radius):
+                app = self.applications[app_id]
+                p = app['popularity']
                 dist = np.linalg.norm(np.array(user_pos) - np.array(app['pos']))
                 if dist <= radius:
                     # Boost probability exponentially based on distance
-                    p = p * np.exp(-dist / radius) * 10 # Boost factor
-            probs.append(p)
+                    boosts.append((app_id, p * np.exp(-dist / radius) * 10 - p)) # Boost factor
             
-        probs = np.array(probs)
-        probs_sum = probs.sum()
-        if probs_sum > 0:
-            probs = probs / probs_sum
-        else:
-            probs = np.ones(len(app_list)) / len(app_list)
-        
-        selected_app = rng.choice(app_list, p=probs)
-        return selected_app['id']
+        base_total = self._popularity.total()
+        total = base_total + sum(extra for _, extra in boosts)
+        if total <= 0:
+            return self._nth_app_id(int(rng.integers(0, len(self.applications))))
+
+        u = rng.random() * total
+        if u < base_total or not boosts:
+            return self._slot_ids[self._popularity.find(u)]
+        u -= base_total
+        for app_id, extra in boosts:
+            if u < extra:
+                return app_id
+            u -= extra
+        return boosts[-1][0]
+
+    # --- Popularity index maintenance ---
+
+    def _register_app(self, app_id: str) -> None:
+        app = self.applications[app_id]
+        self._slot_of[app_id] = self._popularity.append(app.get('popularity', 0.0))
+        self._alive.append(1.0)
+        self._slot_ids.append(app_id)
+        self._ids_by_name.setdefault(app['name'], []).append(app_id)
+        self._ranks.add(app_id, app.get('popularity', 0.0))
+        self._local_add(app_id)
+
+    def _unregister_app(self, app_id: str) -> None:
+        slot = self._slot_of.pop(app_id, None)
+        if slot is None:
+            return
+        self._local_remove(app_id)
+        self._ranks.remove(app_id)
+        ids = self._ids_by_name.get(self.applications[app_id]['name'])
+        if ids:
+            ids.remove(app_id)
+            if not ids:
+                del self._ids_by_name[self.applications[app_id]['name']]
+        self._popularity.set(slot, 0.0)
+        self._alive.set(slot, 0.0)
+        self._slot_ids[slot] = None
+        # Compact once removed slots outnumber live ones
+        if len(self._slot_ids) > 64 and len(self._slot_of) * 2 < len(self._slot_ids):
+            self.rebuild_indexes()
+
+    def rebuild_indexes(self) -> None:
+        """Rebuilds the lookup and sampling structures from self.applications (call after editing it directly)."""
+        self._ids_by_name = {}
+        self._slot_ids = []
+        self._slot_of = {}
+        self._popularity = FenwickTree(max(16, len(self.applications)))
+        self._alive = FenwickTree(max(16, len(self.applications)))
+        self._ranks = RankIndex()
+        self._local_radius = None
+        self._local_cells = {}
+        for app_id in self.applications:
+            self._register_app(app_id)
+
+    def set_popularity(self, app_id: str, popularity: float) -> None:
+        """Sets an app's popularity, keeping the sampling structures in sync."""
+        self.applications[app_id]['popularity'] = popularity
+        slot = self._slot_of.get(app_id)
+        if slot is not None:
+            self._popularity.set(slot, popularity)
+            self._ranks.update(app_id, popularity)
+
+    def popularity_rank(self, app_id: str) -> int:
+        """0-based popularity rank of an app (0 = most popular), -1 if it does not exist."""
+        return self._ranks.rank(app_id)
+
+    def top_apps(self, k: int) -> List[str]:
+        """Ids of the k most popular apps, most popular first."""
+        return self._ranks.top(k)
+
+    def bottom_apps(self, k: int) -> List[str]:
+        """Ids of the k least popular apps, ordered like top_apps (least popular last)."""
+        return self._ranks.bottom(k)
+
+    def _nth_app_id(self, n: int) -> str:
+        """Id of the n-th live app in creation order (same order as self.applications)."""
+        return self._slot_ids[self._alive.find(float(n))]
+
+    def get_app_id_at(self, n: int) -> str:
+        """Id of the n-th app of get_all_apps() (creation order), without listing them."""
+        return self._nth_app_id(n)
+
+    def get_app_position(self, app_id: str) -> Optional[int]:
+        """Position of an app in get_all_apps() (creation order), None if it does not exist."""
+        slot = self._slot_of.get(app_id)
+        if slot is None:
+            return None
+        return int(round(self._alive.prefix(slot)))
+
+    def _local_cell(self, pos: Tuple[float, float]) -> Tuple[int, int]:
+        return (int(math.floor(pos[0] / self._local_radius)), int(math.floor(pos[1] / self._local_radius)))
+
+    def _local_add(self, app_id: str) -> None:
+        app = self.applications[app_id]
+        if self._local_radius is None or not app.get('is_local') or app.get('pos') is None:
+            return
+        self._local_cells.setdefault(self._local_cell(app['pos']), []).append(app_id)
+
+    def _local_remove(self, app_id: str) -> None:
+        app = self.applications.get(app_id)
+        if self._local_radius is None or not app or not app.get('is_local') or app.get('pos') is None:
+            return
+        members = self._local_cells.get(self._local_cell(app['pos']))
+        if members and app_id in members:
+            members.remove(app_id)
+
+    def _local_apps_near(self, pos: Tuple[float, float], radius: float) -> List[str]:
+        """Local apps in the 3x3 cells around pos, in creation order (a superset of those within radius)."""
+        if not radius or radius <= 0:
+            return []
+        if self._local_radius != radius:
+            self._local_radius = radius
+            self._local_cells = {}
+            for app_id in self.applications:
+                self._local_add(app_id)
+        cx, cy = self._local_cell(pos)
+        found = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                found.extend(self._local_cells.get((cx + dx, cy + dy), ()))
+        found.sort(key=self._slot_of.__getitem__)
+        return found
 
     def get_application_name_by_id(self, app_id: str) -> Optional[str]:   
         """Retrieves the name of an application by its ID."""
@@ -105,11 +237,16 @@ class ApplicationSet:
        
     def get_application_ram_by_name(self, app_name: str) -> Optional[float]:
         """Retrieves the RAM requirement of an application by its name."""
-        for app in self.applications.values():
-            if app['name'] == app_name:
-                return app['ram']
+        app_id = self.get_app_id_by_name(app_name)
+        if app_id is not None:
+            return self.applications[app_id]['ram']
         return None
 
+    def get_app_id_by_name(self, app_name: str) -> Optional[str]:
+        """Retrieves the ID of the (first created) application with the given name."""
+        ids = self._ids_by_name.get(app_name)
+        return ids[0] if ids else None
+
     def newAppItem(self, name: str, popularity: float, microservices: List[Dict[str, Any]], actions: Dict[str, Any], is_local: bool = False, pos: Optional[Tuple[float, float]] = None, network_reqs: Optional[Dict[str, float]] = None, edges: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
         """Creates a new application item with the given attributes."""
         # Calculate aggregated resources dynamically
@@ -139,14 +276,14 @@ class ApplicationSet:
         }
 
     def add_application(self, appAttributes: Dict[str, Any], sim_set: Optional[Any] = None) -> str:
-        """Adds a new application to the set with a deterministic UUID."""
+        """Adds a new application to the set with a deterministic id (see SimulationSet.new_id)."""
         if sim_set is not None:
-            random_bytes = sim_set.rng_app.bytes(16)
-            app_id = str(uuid.UUID(bytes=random_bytes))
+            app_id = sim_set.new_id('app')
         else:
             app_id = str(uuid.uuid4())
         appAttributes['id'] = app_id
         self.applications[app_id] = appAttributes
+        self._register_app(app_id)
         return app_id
 
     def remove_app(self, app_id: str, user_set: Any, event_set: Any, **kwargs: Any) -> Any:
@@ -155,6 +292,7 @@ class ApplicationSet:
         if app_id in self.applications:
             message2 = user_set.remove_user_by_requested_app(app_id, event_set=event_set)  # Remove users requesting this app
             message = f"Application {self.applications[app_id]['name']} has been removed, along with its associated events. {message2}"
+            self._unregister_app(app_id)
             del self.applications[app_id]
             event_set.remove_events_by_object_id(app_id)
 
@@ -165,7 +303,7 @@ class ApplicationSet:
         multiplier_val = sim_set.parse_distribution(multiplier, context='app')
         old_popularity = self.applications[app_id]['popularity']
 
-        self.applications[app_id]['popularity'] = self.applications[app_id]['popularity'] * multiplier_val
+        self.set_popularity(app_id, self.applications[app_id]['popularity'] * multiplier_val)
 
         user_set.increase_request_ratio_by_requested_app(app_id, sim_set=sim_set, multiplier=multiplier)
 
@@ -176,7 +314,7 @@ class ApplicationSet:
         multiplier_val = sim_set.parse_distribution(multiplier, context='app')
         old_popularity = self.applications[app_id]['popularity']
 
-        self.applications[app_id]['popularity'] = self.applications[app_id]['popularity'] * multiplier_val
+        self.set_popularity(app_id, self.applications[app_id]['popularity'] * multiplier_val)
 
         user_set.decrease_request_ratio_by_requested_app(app_id, sim_set=sim_set, multiplier=multiplier)
 
@@ -329,8 +467,8 @@ class ApplicationSet:
         if app_id1 in self.applications and app_id2 in self.applications:
             pop1 = self.applications[app_id1]['popularity']
             pop2 = self.applications[app_id2]['popularity']
-            self.applications[app_id1]['popularity'] = pop2
-            self.applications[app_id2]['popularity'] = pop1
+            self.set_popularity(app_id1, pop2)
+            self.set_popularity(app_id2, pop1)
 
     def surge_popularity(self, app_id: str, sim_set: Any, event_set: Any, config: Any, **kwargs: Any) -> str:
         app = self.applications.get(app_id)
@@ -340,14 +478,13 @@ class ApplicationSet:
         rng = sim_set.rng_app
         events_conf = kwargs
         
-        # Sort apps by popularity (highest first)
-        sorted_apps = sorted(self.applications.items(), key=lambda x: x[1]['popularity'], reverse=True)
-        # Find current rank (0-indexed)
-        current_rank = next((i for i, (a_id, _) in enumerate(sorted_apps) if a_id == app_id), -1)
+        # Current rank (0-indexed, highest popularity first)
+        num_apps = len(self._ranks)
+        current_rank = self._ranks.rank(app_id)
         
         # Pick a target rank (Top 1 to 5)
-        target_rank = rng.integers(0, min(5, len(sorted_apps))) if len(sorted_apps) > 0 else 0
-        target_app_id = sorted_apps[target_rank][0] if len(sorted_apps) > 0 else app_id
+        target_rank = rng.integers(0, min(5, num_apps)) if num_apps > 0 else 0
+        target_app_id = self._ranks.at(target_rank) if num_apps > 0 else app_id
 
         if current_rank != target_rank and current_rank != -1:
             self._rank_swap(app_id, target_app_id)
@@ -381,13 +518,12 @@ class ApplicationSet:
         rng = sim_set.rng_app
         events_conf = kwargs
         
-        sorted_apps = sorted(self.applications.items(), key=lambda x: x[1]['popularity'], reverse=True)
-        current_rank = next((i for i, (a_id, _) in enumerate(sorted_apps) if a_id == app_id), -1)
+        num_apps = len(self._ranks)
+        current_rank = self._ranks.rank(app_id)
         
         # Pick a target rank (Bottom 5)
-        num_apps = len(sorted_apps)
         target_rank = rng.integers(max(0, num_apps - 5), num_apps) if num_apps > 0 else 0
-        target_app_id = sorted_apps[target_rank][0] if num_apps > 0 else app_id
+        target_app_id = self._ranks.at(target_rank) if num_apps > 0 else app_id
 
         if current_rank != target_rank and current_rank != -1:
             self._rank_swap(app_id, target_app_id)
@@ -431,9 +567,11 @@ class ApplicationSet:
         
         shift_type = 'jump' if rng.random() < jump_prob else 'drift'
         
+        self._local_remove(app_id)
         if shift_type == 'jump':
             new_pos = (float(rng.random()), float(rng.random()))
             app['pos'] = new_pos
+            self._local_add(app_id)
             return f"Geo demand jumped to ({new_pos[0]:.3f}, {new_pos[1]:.3f}) for {app['name']}"
         else:
             # Drift
@@ -446,6 +584,7 @@ class ApplicationSet:
             new_x = max(0.0, min(1.0, old_x + dx))
             new_y = max(0.0, min(1.0, old_y + dy))
             app['pos'] = (float(new_x), float(new_y))
+            self._local_add(app_id)
             return f"Geo demand drifted to ({new_x:.3f}, {new_y:.3f}) for {app['name']}"
 
     def get_application(self, app_id: str) -> Optional[Dict[str, Any]]:
@@ -468,9 +607,7 @@ class ApplicationSet:
         """Creates a new app with random attributes based on the configuration."""
         num_new_users_val = sim_set.parse_distribution(num_new_users, context='app')
 
-        create_new_app(config, app_set, event_set, sim_set)
-
-        created_app_id = list(app_set.applications)[-1]
+        created_app_id = create_new_app(config, app_set, event_set, sim_set)
 
         for i in range(num_new_users_val):
             create_new_user(config, app_set, infrastructure, user_set, event_set, sim_set, created_app_id)
@@ -478,7 +615,7 @@ class ApplicationSet:
         message = f"Application {self.applications[created_app_id]['name']} has been created, along with {num_new_users_val} new users requesting this app."
         return message
 
-def create_new_app(config: Dict[str, Any], application_set: ApplicationSet, event_set: EventSet, sim_set: Any) -> float:
+def create_new_app(config: Dict[str, Any], application_set: ApplicationSet, event_set: EventSet, sim_set: Any) -> str:
     attributes = config
     app_conf = attributes.get('app', {})
     app_actions_config = app_conf.get('actions', {})
@@ -602,10 +739,10 @@ def create_new_app(config: Dict[str, Any], application_set: ApplicationSet, even
         edges=edges
     )
     
-    application_set.add_application(appAttributes, sim_set=sim_set)
+    app_id = application_set.add_application(appAttributes, sim_set=sim_set)
     generate_events(appAttributes, 'app', event_set, sim_set)
 
-    return appAttributes['ram']
+    return app_id
 
 def generate_random_apps(config: Dict[str, Any], event_set: EventSet, sim_set: Any, infrastructure: Any, num_apps: Optional[int] = None, saturation_percentage: Optional[float] = None) -> Tuple[ApplicationSet, UserSet]:
     """
@@ -633,9 +770,8 @@ def generate_random_apps(config: Dict[str, Any], event_set: EventSet, sim_set: A
         i=0
         created_total_ram = 0
         while total_ram_occupied < saturation_percentage: # and i < 10:
-            app_ram =create_new_app(config, application_set, event_set, sim_set)
-            created_total_ram += app_ram
-            created_app_id = list(application_set.applications)[-1]
+            created_app_id = create_new_app(config, application_set, event_set, sim_set)
+            created_total_ram += application_set.applications[created_app_id]['ram']
 
             num_users_per_app = sim_set.parse_distribution(app_conf.get('num_new_users', 1), context='app')
             if num_users_per_app is None:
@@ -658,9 +794,7 @@ def generate_random_apps(config: Dict[str, Any], event_set: EventSet, sim_set: A
         num_users_per_app = int(num_users_per_app)
 
         for _ in range(num_apps):
-            create_new_app(config, application_set, event_set, sim_set)
-
-            created_app_id = list(application_set.applications)[-1]
+            created_app_id = create_new_app(config, application_set, event_set, sim_set)
 
             for _ in range(num_users_per_app):
                 create_new_user(config, application_set, infrastructure, user_set, event_set, sim_set, created_app_id)
@@ -692,7 +826,7 @@ def generate_random_apps(config: Dict[str, Any], event_set: EventSet, sim_set: A
                 normalized_pops = [1.0 / num_created] * num_created
                 
             for i, app in enumerate(app_list):
-                app['popularity'] = normalized_pops[i]
+                application_set.set_popularity(app['id'], normalized_pops[i])
         else:
             # Fallback to Zipf's Law for backwards compatibility
             alpha = pop_conf.get('alpha', 1.2)
@@ -700,6 +834,6 @@ def generate_random_apps(config: Dict[str, Any], event_set: EventSet, sim_set: A
             
             for i, app in enumerate(app_list):
                 rank = i + 1
-                app['popularity'] = (1.0 / (rank**alpha)) / sum_zipf
+                application_set.set_popularity(app['id'], (1.0 / (rank**alpha)) / sum_zipf)
 
     return application_set, user_set
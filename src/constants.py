@@ -3,6 +3,9 @@ DEFAULT_SCENARIO_CONFIG_FILE = "scenario_config.yaml"
 DEFAULT_SOLVER_CONFIG_FILE = "solver_config.yaml"
 DEFAULT_MASTER_SEED = 42
 DEFAULT_TOTAL_ITERATIONS = 500
+DEFAULT_SAMPLING_BUFFER_SIZE = 4096
+DEFAULT_ID_SCHEME = "sequential"
+DEFAULT_ID_FORMAT = "{domain}-{n:06d}"
 
 # Infrastructure constants
 DEFAULT_INFRA_ID = "000"
@@ -11,6 +14,13 @@ DEFAULT_MIN_RAM = 8
 DEFAULT_MAX_RAM = 16
 DEFAULT_TREE_BRANCHING_R = 2
 DEFAULT_TREE_BRANCHING_H = 3
+DEFAULT_CENTRALITY_MODE = "exact"
+DEFAULT_CENTRALITY_SAMPLES = 256
+# Decimals kept when comparing centrality with layer thresholds (the modes differ by float rounding)
+CENTRALITY_THRESHOLD_DECIMALS = 12
+DEFAULT_ATTRIBUTE_SAMPLING = "exact"
+DEFAULT_HOP_CACHE_ROWS = 1024
+DEFAULT_SHORTEST_PATHS = "all_pairs"
 
 # Optimization constants
 INFEASIBLE_PENALTY = 1_000_000
@@ -0,0 +1,234 @@
+import networkx as nx
+import numpy as np
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .constants import DEFAULT_HOP_CACHE_ROWS
+
+# 'all_pairs': every row computed up front; 'lazy': LazyShortestPaths
+SHORTEST_PATH_MODES = ('all_pairs', 'lazy')
+
+
+class DistanceRow(Mapping):
+    """Distances from one source (target -> distance), reachable targets only."""
+
+    __slots__ = ('_owner', '_row')
+
+    def __init__(self, owner: 'DistanceMatrix', row: int) -> None:
+        self._owner = owner
+        self._row = row
+
+    def __getitem__(self, target: Any) -> Any:
+        owner = self._owner
+        j = owner.index.get(target)
+        if j is None:
+            raise KeyError(target)
+        value = owner.matrix[self._row, j]
+        if not np.isfinite(value):
+            raise KeyError(target)
+        if owner.integral == 'all' or (owner.integral == 'diagonal' and j == self._row):
+            return int(value)
+        return float(value)
+
+    def __iter__(self) -> Iterator[Any]:
+        nodes = self._owner.nodes
+        return (nodes[j] for j in np.flatnonzero(np.isfinite(self._owner.matrix[self._row])))
+
+    def __len__(self) -> int:
+        return int(np.isfinite(self._owner.matrix[self._row]).sum())
+
+
+class DistanceMatrix(Mapping):
+    """
+    Read-only source -> {target: distance} view over a dense distance matrix (e.g. one
+    memory-mapped from an infrastructure snapshot), interchangeable with the dictionaries
+    built by nx.all_pairs_dijkstra_path_length: unreachable pairs (inf) are absent, and
+    sources that were disabled when the distances were computed have no row (their
+    diagonal entry is inf).
+
+    integral tells which values networkx returned as ints: 'all' (integer weights),
+    'diagonal' (only the 0 distance of every source to itself) or 'none'.
+    """
+
+    def __init__(self, nodes: List[Any], matrix: np.ndarray, integral: str = 'diagonal') -> None:
+        self.nodes = list(nodes)
+        self.index: Dict[Any, int] = {node: i for i, node in enumerate(self.nodes)}
+        self.matrix = matrix
+        self.integral = integral
+
+    @classmethod
+    def from_dict(cls, nodes: List[Any], distances: Dict[Any, Dict[Any, Any]]) -> 'DistanceMatrix':
+        """Packs a dict-of-dicts of distances into a dense float64 matrix (inf where absent)."""
+        index = {node: i for i, node in enumerate(nodes)}
+        matrix = np.full((len(nodes), len(nodes)), np.inf)
+        all_int = diagonal_int = True
+        for source, row in distances.items():
+            i = index[source]
+            for target, value in row.items():
+                j = index[target]
+                matrix[i, j] = value
+                if i == j:
+                    diagonal_int = diagonal_int and isinstance(value, int)
+                else:
+                    all_int = all_int and isinstance(value, int)
+        integral = 'none' if not diagonal_int else 'all' if all_int else 'diagonal'
+        return cls(nodes, matrix, integral=integral)
+
+    def __getitem__(self, source: Any) -> DistanceRow:
+        i = self.index.get(source)
+        if i is None or not np.isfinite(self.matrix[i, i]):
+            raise KeyError(source)
+        return DistanceRow(self, i)
+
+    def __iter__(self) -> Iterator[Any]:
+        nodes = self.nodes
+        return (nodes[i] for i in np.flatnonzero(np.isfinite(np.diagonal(self.matrix))))
+
+    def __len__(self) -> int:
+        return int(np.isfinite(np.diagonal(self.matrix)).sum())
+
+
+class HopDistances:
+    """
+    Unweighted hop distances over a graph, one breadth-first search per origin, cached.
+
+    Node and edge events only toggle attributes and never change the topology, so a
+    row stays valid for the whole run. Rows are indexed like `index` (graph order) and
+    hold inf for unreachable nodes. At most max_rows rows are kept (oldest evicted).
+    """
+
+    def __init__(self, graph: nx.Graph, max_rows: int = DEFAULT_HOP_CACHE_ROWS) -> None:
+        self.graph = graph
+        self.nodes = list(graph.nodes())
+        self.index: Dict[Any, int] = {node: i for i, node in enumerate(self.nodes)}
+        self.max_rows = max(1, int(max_rows))
+        self._rows: Dict[Any, np.ndarray] = {}
+
+    def row(self, origin: Any) -> Optional[np.ndarray]:
+        """Hop distances from origin to every node, None if origin is not in the graph."""
+        row = self._rows.get(origin)
+        if row is not None:
+            return row
+        if origin not in self.index:
+            return None
+        row = np.full(len(self.nodes), np.inf)
+        lengths = nx.single_source_shortest_path_length(self.graph, origin)
+        row[[self.index[node] for node in lengths]] = list(lengths.values())
+        if len(self._rows) >= self.max_rows:
+            del self._rows[next(iter(self._rows))]
+        self._rows[origin] = row
+        return row
+
+
+class LazyShortestPaths(Mapping):
+    """
+    Demand-driven replacement for the all-pairs source -> {target: delay} dictionary:
+    the row of a source is computed by a single-source Dijkstra (over enabled nodes
+    and edges, weight 'delay') the first time it is read, and memoized together with
+    its shortest-path DAG (the predecessors of every node on its shortest paths).
+
+    After nodes or edges change, invalidate() drops only the rows the change can
+    affect: rows whose DAG uses a changed edge or passes through a disabled node, and
+    rows a newly usable edge would shorten. A disabled node that is only a leaf of a
+    row's DAG is simply removed from it. Rows read afterwards hold exactly the values
+    a full recalculation gives. Sources are the enabled nodes, as in the eager form.
+    """
+
+    def __init__(self, graph: nx.Graph, weight: str = 'delay') -> None:
+        self.graph = graph
+        self.weight = weight
+        # source -> (distances, predecessors, nodes that are a predecessor of some node)
+        self._rows: Dict[Any, Tuple[Dict[Any, Any], Dict[Any, List[Any]], set]] = {}
+        self._view = nx.subgraph_view(
+            graph,
+            filter_node=lambda n: graph.nodes[n].get('enable', True),
+            filter_edge=lambda u, v: graph.edges[u, v].get('enable', True),
+        )
+
+    def _is_source(self, node: Any) -> bool:
+        try:
+            return node in self.graph and self.graph.nodes[node].get('enable', True)
+        except TypeError:
+            return False
+
+    def __getitem__(self, source: Any) -> Dict[Any, Any]:
+        if not self._is_source(source):
+            raise KeyError(source)
+        row = self._rows.get(source)
+        if row is None:
+            pred, dist = nx.dijkstra_predecessor_and_distance(self._view, source, weight=self.weight)
+            row = (dist, pred, {p for parents in pred.values() for p in parents})
+            self._rows[source] = row
+        return row[0]
+
+    def __contains__(self, source: object) -> bool:
+        return self._is_source(source)
+
+    def __iter__(self) -> Iterator[Any]:
+        return (n for n, attrs in self.graph.nodes(data=True) if attrs.get('enable', True))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def cached_sources(self) -> List[Any]:
+        """Sources whose row is currently memoized."""
+        return list(self._rows)
+
+    def clear(self) -> None:
+        """Drops every memoized row."""
+        self._rows.clear()
+
+    def _usable_weight(self, u: Any, v: Any) -> Optional[float]:
+        graph = self.graph
+        if not graph.has_edge(u, v) or not graph.edges[u, v].get('enable', True):
+            return None
+        if not graph.nodes[u].get('enable', True) or not graph.nodes[v].get('enable', True):
+            return None
+        return graph.edges[u, v].get(self.weight, 1)
+
+    def invalidate(self, nodes: Iterable[Any] = (), edges: Iterable[Tuple[Any, Any]] = ()) -> None:
+        """
+        Drops the rows that nodes (disabled or revived) and edges (disabled, revived or
+        re-weighted) can change. Call it once the changes are applied to the graph.
+        """
+        graph = self.graph
+        disabled = []
+        changed_edges = set()
+        for node in nodes:
+            if node not in graph:
+                continue
+            if graph.nodes[node].get('enable', True):
+                # A revived node behaves like new edges to all of its neighbours
+                changed_edges.update((node, neighbour) for neighbour in graph.adj[node])
+            else:
+                disabled.append(node)
+        for edge in edges:
+            u, v = edge
+            if graph.has_edge(u, v):
+                changed_edges.add((u, v))
+        usable = [(u, v, self._usable_weight(u, v)) for u, v in changed_edges]
+
+        for source in list(self._rows):
+            if not self._is_source(source):
+                del self._rows[source]
+                continue
+            dist, pred, parents = self._rows[source]
+            stale = any(node in parents for node in disabled)
+            for u, v, w in usable:
+                if stale:
+                    break
+                # The row's shortest paths use the edge...
+                if u in pred.get(v, ()) or v in pred.get(u, ()):
+                    stale = True
+                # ...or the edge opens a shorter path (or reaches a new node)
+                elif w is not None:
+                    du = dist.get(u, np.inf)
+                    dv = dist.get(v, np.inf)
+                    stale = du + w < dv or dv + w < du
+            if stale:
+                del self._rows[source]
+                continue
+            for node in disabled:
+                if node in dist:
+                    del dist[node]
+                    del pred[node]
@@ -1,16 +1,37 @@
 import uuid
 import copy
-import numpy as np
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+from .simulationSet import DistributionSampler
+from .popularity import FenwickTree
 
 logger = logging.getLogger(__name__)
 
+STREAM_MODES = ('per_entity', 'superposition')
+
 
 class EventSet:
-    def __init__(self) -> None:
+    def __init__(self, stream_mode: str = 'per_entity') -> None:
+        """
+        stream_mode: 'per_entity' schedules one recurring event per entity and action.
+                     'superposition' merges the exponential actions of all entities of a
+                     type_object into one event stream per (type_object, action) that fires
+                     at the summed rate and picks its target among the live entities.
+        """
+        if stream_mode not in STREAM_MODES:
+            raise ValueError(f"Unknown event stream mode: {stream_mode}")
         self.events: Dict[str, Dict[str, Any]] = {}
         self.global_time: float = 0.0
+        self.stream_mode = stream_mode
+        # (type_object, action) -> {'event_id', 'members', 'index', 'frequency', 'weights'}
+        self.streams: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # object_id -> keys of the streams the object belongs to
+        self._stream_membership: Dict[Any, List[Tuple[str, str]]] = {}
+        # type_object -> weight_of(object_id) used to pick stream targets, see set_stream_weights()
+        self._stream_weight_getters: Dict[str, Any] = {}
+        # (type_object, action) -> compiled frequency sampler (None if the action does not recur)
+        self._frequency_table: Dict[Tuple[str, str], Any] = {}
+        self._frequency_config: Optional[Dict[str, Any]] = None
     
     def get_first_event(self) -> Optional[Dict[str, Any]]:
         if not self.events:
@@ -31,8 +52,7 @@ class EventSet:
     
     def add_event(self, eventAttributes: Dict[str, Any], sim_set: Optional[Any] = None) -> str:
         if sim_set is not None:
-            random_bytes = sim_set.rng_event.bytes(16)
-            event_id = str(uuid.UUID(bytes=random_bytes))
+            event_id = sim_set.new_id('event')
         else:
             event_id = str(uuid.uuid4())
         eventAttributes['id'] = event_id
@@ -48,6 +68,9 @@ class EventSet:
 
 
     def remove_events_by_object_id(self, object_id: str) -> None:
+        for key in self._stream_membership.pop(object_id, []):
+            self._remove_stream_member(key, object_id)
+
         events_to_delete = [
             event_id
             for event_id, value in self.events.items()
@@ -57,6 +80,187 @@ class EventSet:
         for event_id in events_to_delete:
             self.remove_event(event_id)
     
+    def add_stream_member(self, type_object: str, action_name: str, object_id: Any, action_details: Dict[str, Any], frequency: Any, sim_set: Any) -> None:
+        """
+        Registers an entity in the aggregated stream of (type_object, action_name), creating
+        the stream event on first use. The stream fires at n / scale for n members.
+        """
+        key = (type_object, action_name)
+        stream = self.streams.get(key)
+        if stream is None:
+            weights = FenwickTree() if type_object in self._stream_weight_getters else None
+            stream = self.streams[key] = {'event_id': None, 'members': [], 'index': {}, 'frequency': frequency, 'weights': weights}
+
+        stream['index'][object_id] = len(stream['members'])
+        stream['members'].append(object_id)
+        if stream['weights'] is not None:
+            stream['weights'].append(self._stream_weight(type_object, object_id))
+        self._stream_membership.setdefault(object_id, []).append(key)
+        n = len(stream['members'])
+
+        # Times are rounded like the first schedule of a per-entity event (generate_events):
+        # round() is monotone, so the stream fires at the minimum of the rounded member clocks
+        event = self.events.get(stream['event_id'])
+        if event is None:
+            delay = _draw_time(frequency, type_object, action_name, sim_set)
+            eventAttributes = self.newEventItem(
+                object_id=None,
+                type_object=type_object,
+                time=round(delay / n, 2) + self.global_time,
+                action=action_name,
+                impact=copy.deepcopy(sim_set.compile_tree(action_details.get('impact', {})))
+            )
+            eventAttributes['action_type'] = action_details.get('action_type', action_name)
+            eventAttributes['aggregated'] = True
+            stream['event_id'] = self.add_event(eventAttributes, sim_set=sim_set)
+        else:
+            # Memorylessness: the residual time of an exponential clock can be rescaled to the new rate
+            event['time'] = self.global_time + round((event['time'] - self.global_time) * (n - 1) / n, 2)
+
+    def _remove_stream_member(self, key: Tuple[str, str], object_id: Any) -> None:
+        stream = self.streams.get(key)
+        if stream is None or object_id not in stream['index']:
+            return
+
+        # Swap-remove keeps removal O(1)
+        members = stream['members']
+        idx = stream['index'].pop(object_id)
+        last = members.pop()
+        last_weight = stream['weights'].pop() if stream['weights'] is not None else None
+        if idx < len(members):
+            members[idx] = last
+            stream['index'][last] = idx
+            if last_weight is not None:
+                stream['weights'].set(idx, last_weight)
+
+        n_old = len(members) + 1
+        event = self.events.get(stream['event_id'])
+        if event is None:
+            return
+        if not members:
+            self.remove_event(stream['event_id'])
+        else:
+            # Not rounded: a per-entity entity leaving never re-times the others, and the
+            # exact rescale keeps the remaining clocks unbiased
+            event['time'] = self.global_time + (event['time'] - self.global_time) * n_old / len(members)
+
+    def set_stream_weights(self, type_object: str, weight_of: Any) -> None:
+        """
+        Makes the streams of type_object pick their target proportionally to
+        weight_of(object_id). Weights are kept in a Fenwick tree per stream, read when an
+        entity joins and re-read by refresh_stream_weight() when its attribute changes.
+        """
+        self._stream_weight_getters[type_object] = weight_of
+        for (stream_type, _), stream in self.streams.items():
+            if stream_type == type_object:
+                stream['weights'] = FenwickTree(max(16, len(stream['members'])))
+                for member in stream['members']:
+                    stream['weights'].append(self._stream_weight(type_object, member))
+
+    def has_stream_weights(self) -> bool:
+        return bool(self._stream_weight_getters)
+
+    def _stream_weight(self, type_object: str, object_id: Any) -> float:
+        return max(0.0, float(self._stream_weight_getters[type_object](object_id) or 0.0))
+
+    def refresh_stream_weight(self, object_id: Any) -> None:
+        """Re-reads the sampling weight of an entity in every weighted stream it belongs to."""
+        for key in self._stream_membership.get(object_id, []):
+            stream = self.streams[key]
+            if stream['weights'] is not None:
+                stream['weights'].set(stream['index'][object_id], self._stream_weight(key[0], object_id))
+
+    def sample_stream_target(self, event: Dict[str, Any], sim_set: Any) -> Any:
+        """
+        Picks the entity an aggregated stream event applies to: uniformly among the live
+        members, or proportionally to their weights (see set_stream_weights) in O(log n).
+        """
+        stream = self.streams.get((event['type_object'], event['action']))
+        if not stream or not stream['members']:
+            return None
+        members = stream['members']
+
+        weights = stream['weights']
+        if weights is not None:
+            total = weights.total()
+            if total > 0:
+                return members[weights.find(sim_set.rng_event.random() * total)]
+        return sim_set.choice('event', members)
+
+    def due_stream_members(self, type_object: str, action_name: str, horizon: float, sim_set: Any) -> List[Any]:
+        """
+        Draws the members of the (type_object, action_name) stream whose own clock would
+        ring by `horizon`: if the stream fires at T <= horizon, a uniform member is due at T
+        and, by memorylessness, each other member is due if a fresh delay fits in horizon - T.
+        The stream event itself is left untouched (re-time it with update_event_time).
+        """
+        stream = self.streams.get((type_object, action_name))
+        event = self.events.get(stream['event_id']) if stream else None
+        if event is None or not stream['members'] or event['time'] > horizon:
+            return []
+
+        members = stream['members']
+        first = sim_set.choice('event', members)
+        remaining = horizon - event['time']
+        due = [first]
+        for member in members:
+            if member != first and _draw_time(stream['frequency'], type_object, action_name, sim_set) <= remaining:
+                due.append(member)
+        return due
+
+    def _update_stream_time(self, event: Dict[str, Any], config: Dict[str, Any], sim_set: Any) -> None:
+        type_object = event['type_object']
+        action_name = event['action']
+        key = (type_object, action_name)
+        stream = self.streams[key]
+
+        # Non-recurring actions fire once per entity: the member that fired leaves the stream
+        fired = event.get('object_id')
+        event['object_id'] = None
+        if fired is not None and self._get_frequency_sampler(config, type_object, action_name, sim_set) is None:
+            memberships = self._stream_membership.get(fired, [])
+            if key in memberships:
+                memberships.remove(key)
+            self._remove_stream_member(key, fired)
+
+        n = len(stream['members'])
+        if n == 0:
+            self.remove_event(event['id'])
+            return
+
+        delay = _draw_time(stream['frequency'], type_object, action_name, sim_set)
+        if delay == 0.0:
+            self.remove_event(event['id'])
+            return
+        event['time'] = delay / n + self.global_time
+        logger.debug(f"Updated time for stream {key}: {event['time']} ({n} members)")
+
+    def build_frequency_table(self, config: Dict[str, Any], sim_set: Any) -> None:
+        """Precomputes the frequency sampler of every (type_object, action) pair currently scheduled."""
+        self.invalidate_frequency_table()
+        self._frequency_config = config
+        for event in self.events.values():
+            self._get_frequency_sampler(config, event['type_object'], event['action'], sim_set)
+
+    def invalidate_frequency_table(self) -> None:
+        """Forgets the cached frequency samplers (needed only if the config is mutated in place)."""
+        self._frequency_table = {}
+        self._frequency_config = None
+
+    def _get_frequency_sampler(self, config: Dict[str, Any], type_object: str, action_name: str, sim_set: Any) -> Any:
+        if config is not self._frequency_config:
+            self._frequency_table = {}
+            self._frequency_config = config
+
+        key = (type_object, action_name)
+        if key in self._frequency_table:
+            return self._frequency_table[key]
+
+        distr_config = get_frequency_config(config, type_object, action_name)
+        sampler = sim_set.get_sampler(distr_config) if distr_config else None
+        self._frequency_table[key] = sampler
+        return sampler
+
     def update_event_time(self, event_id: str, config: Dict[str, Any], sim_set: Any) -> None:
         # Update time
         if event_id not in self.events.keys():
@@ -70,11 +274,16 @@ class EventSet:
             logger.debug(f"Implicit event {event_id} removed after execution")
             return
 
+        if self.events[event_id].get('aggregated'):
+            self._update_stream_time(self.events[event_id], config, sim_set)
+            return
+
         # We just need to get a new time from config + global_time
         actual_type_object = self.events[event_id]['type_object']
         actual_action = self.events[event_id]['action']
         
-        delay = get_time(config, actual_type_object, actual_action, sim_set)
+        sampler = self._get_frequency_sampler(config, actual_type_object, actual_action, sim_set)
+        delay = _draw_time(sampler, actual_type_object, actual_action, sim_set)
         if delay == 0.0:
             self.remove_event(event_id)
             logger.debug(f"Event {event_id} removed because it has no recurring frequency")
@@ -105,6 +314,13 @@ def generate_events(object_item: Dict[str, Any], type_object: str, event_set: Ev
 
     for action_name, action_details in actions_dict.items():
         distribution_str = action_details.get('frequency', '0')
+
+        if event_set.stream_mode == 'superposition' and obj_id is not None:
+            sampler = sim_set.get_sampler(distribution_str)
+            if isinstance(sampler, DistributionSampler) and sampler.dist_type == 'exponential' and sampler.bufferable:
+                event_set.add_stream_member(type_object, action_name, obj_id, action_details, sampler, sim_set)
+                continue
+
         delay_val = sim_set.parse_distribution(distribution_str, context=type_object)
         if delay_val is None:
             delay_val = 0.0
@@ -114,7 +330,7 @@ def generate_events(object_item: Dict[str, Any], type_object: str, event_set: Ev
             type_object=type_object,
             time=round(delay_val, 2) + event_set.global_time,
             action=action_name,
-            impact=copy.deepcopy(action_details.get('impact', {}))  # Use deepcopy
+            impact=copy.deepcopy(sim_set.compile_tree(action_details.get('impact', {})))  # Use deepcopy
         )
         eventAttributes['action_type'] = action_details.get('action_type', action_name)
         event_set.add_event(eventAttributes, sim_set=sim_set)
@@ -140,7 +356,7 @@ def init_global_spawner(config: Dict[str, Any], event_set: EventSet, sim_set: An
                 type_object=type_object,
                 time = round(delay_val, 2) + event_set.global_time, 
                 action = action,
-                impact = type_conf.get('impact')
+                impact = sim_set.compile_tree(type_conf.get('impact'))
             )
             eventAttributes['action_type'] = action
             event_set.add_event(eventAttributes, sim_set=sim_set)
@@ -158,17 +374,17 @@ def init_global_spawner(config: Dict[str, Any], event_set: EventSet, sim_set: An
             type_object=type_object,
             time = round(delay_val, 2) + event_set.global_time, 
             action = action_name,
-            impact = copy.deepcopy(type_conf.get('impact', {}))
+            impact = copy.deepcopy(sim_set.compile_tree(type_conf.get('impact', {})))
         )
         eventAttributes['action_type'] = actual_action
         event_set.add_event(eventAttributes, sim_set=sim_set)
 
     return event_set
 
-def get_time(config: Dict[str, Any], type_object: str, action_name: str, sim_set: Any) -> float:
+def get_frequency_config(config: Dict[str, Any], type_object: str, action_name: str) -> Any:
     """
-    Retrieves a time value by evaluating the distribution string 
-    found in the config file for a specific object and action.
+    Returns the 'frequency' distribution configured for a specific object and action
+    (global_spawner actions take precedence over the object's own actions).
     """
     attributes = config
 
@@ -178,28 +394,33 @@ def get_time(config: Dict[str, Any], type_object: str, action_name: str, sim_set
     
     if action_name in actions_conf:
         specific_action_conf = actions_conf.get(action_name, {})
-        distr_string = specific_action_conf.get('frequency')
     elif action_name in global_spawner_conf and action_name != 'actions':
         # Retrocompatibility
         specific_action_conf = global_spawner_conf.get(action_name, {})
-        distr_string = specific_action_conf.get('frequency')
     else:
         obj_conf = attributes.get(type_object, {})
         actions_conf = obj_conf.get('actions', {})
         specific_action_conf = actions_conf.get(action_name, {})
-        distr_string = specific_action_conf.get('frequency')
-        
-    if distr_string:
+    return specific_action_conf.get('frequency')
+
+def _draw_time(distr_config: Any, type_object: str, action_name: str, sim_set: Any) -> float:
+    """Draws a delay from a frequency distribution (or compiled sampler). No distribution means no delay."""
+    if distr_config:
         try:
-            # explicit dictionary ensures eval has access to the 'random' module
-            parsed = sim_set.parse_distribution(distr_string, context=type_object)
+            parsed = sim_set.parse_distribution(distr_config, context=type_object)
             if parsed is None:
                 parsed = 0.0
             return parsed
         except Exception as e:
-            logger.error(f"Error evaluating distribution '{distr_string}' for {action_name}: {e}")
+            logger.error(f"Error evaluating distribution '{distr_config}' for {action_name}: {e}")
             return 0.0
                 
     # No distribution found -> no additional delay
     return 0.0
 
+def get_time(config: Dict[str, Any], type_object: str, action_name: str, sim_set: Any) -> float:
+    """
+    Retrieves a time value by evaluating the distribution string 
+    found in the config file for a specific object and action.
+    """
+    return _draw_time(get_frequency_config(config, type_object, action_name), type_object, action_name, sim_set)
@@ -0,0 +1,179 @@
+import networkx as nx
+import numpy as np
+from typing import Any, Dict, Hashable, List, Optional
+
+ATTRIBUTE_SAMPLING_MODES = ('exact', 'vectorized')
+
+# Attribute modes that draw random values (the layer modes are deterministic)
+SAMPLED_MODES = ('homogenic', 'centrality_based', 'layered')
+
+LAYER_PRIORITY = {'cloud': 3, 'fog': 2, 'edge': 1}
+
+
+def edge_layers(graph: nx.Graph) -> List[str]:
+    """Layer of every edge in graph.edges() order: the higher-priority layer of its two endpoints."""
+    nodes = graph.nodes
+    layers = []
+    for u, v in graph.edges():
+        layer_u = nodes[u].get('layer') or nodes[u].get('type') or 'edge'
+        layer_v = nodes[v].get('layer') or nodes[v].get('type') or 'edge'
+        layers.append(layer_u if LAYER_PRIORITY.get(layer_u, 1) >= LAYER_PRIORITY.get(layer_v, 1) else layer_v)
+    return layers
+
+
+def clip_scalar(value: Any, a_min: Optional[float], a_max: Optional[float]) -> Any:
+    """np.clip for a single value, without the round-trip through a numpy array."""
+    if a_min is not None and value < a_min:
+        value = a_min
+    if a_max is not None and value > a_max:
+        value = a_max
+    return value
+
+
+def _group(keys: List[Hashable]) -> Dict[Hashable, np.ndarray]:
+    """Indices of every distinct key, in order of first appearance."""
+    groups: Dict[Hashable, List[int]] = {}
+    for i, key in enumerate(keys):
+        groups.setdefault(key, []).append(i)
+    return {key: np.array(idx, dtype=np.intp) for key, idx in groups.items()}
+
+
+def _bounds(dist: Any, attr_config: Dict[str, Any], fallback: bool):
+    a_min = dist.get('min') if isinstance(dist, dict) else None
+    a_max = dist.get('max') if isinstance(dist, dict) else None
+    if fallback:
+        if a_min is None:
+            a_min = attr_config.get('min')
+        if a_max is None:
+            a_max = attr_config.get('max')
+    return a_min, a_max
+
+
+def _finish(values: np.ndarray, a_min: Optional[float], a_max: Optional[float]) -> List[float]:
+    if a_min is not None or a_max is not None:
+        values = np.clip(values, a_min=a_min, a_max=a_max)
+    return np.round(values, decimals=2).tolist()
+
+
+def _scatter(out: List[Any], idx: np.ndarray, values: List[Any]) -> None:
+    for i, value in zip(idx.tolist(), values):
+        out[i] = value
+
+
+def _centrality_weights(centrality: np.ndarray, centrality_type: str) -> np.ndarray:
+    # Same mapping as the per-element loop: the multiplier is never exactly 0
+    mapped = np.maximum(centrality, 0.01)
+    if centrality_type == 'direct_proportional':
+        return mapped
+    if centrality_type == 'inverted_proportional':
+        return np.maximum(1.0 - mapped, 0.01)
+    return np.ones_like(mapped)
+
+
+def _sample_values(layers: List[Optional[str]], centrality: Optional[np.ndarray], attr_config: Dict[str, Any],
+                   sim_set: Any, num_nodes: int, bound_fallback: bool,
+                   base: Optional[List[Any]] = None) -> List[Any]:
+    """
+    Values of one attribute for a list of nodes or edges (None where it stays unset).
+
+    Items are grouped by the distribution they draw from (their layer's own
+    distribution, or the attribute's) and each group gets one block draw.
+    bound_fallback makes per-layer distributions without min/max use the attribute's
+    bounds. For homogenic node attributes, base holds the values already drawn for
+    every node.
+    """
+    mode = attr_config.get('mode', 'homogenic')
+    dist_config = attr_config.get('distribution', None)
+    out: List[Any] = [None] * len(layers)
+
+    if mode == 'layered':
+        layer_dists = attr_config.get('distribution', {})
+        if not layer_dists:
+            return out
+        first = next(iter(layer_dists.values()))
+        # Layers without a distribution of their own use the first one (key None)
+        keys = [layer if layer_dists.get(layer) else None for layer in layers]
+        for key, idx in _group(keys).items():
+            dist = layer_dists[key] if key is not None else first
+            block = sim_set.sample_block(dist, 'graph', len(idx), num_nodes=num_nodes)
+            if block is not None:
+                _scatter(out, idx, _finish(block, *_bounds(dist, attr_config, True)))
+        return out
+
+    # Per-layer distributions nested in the attribute's distribution take precedence
+    overridden = np.zeros(len(layers), dtype=bool)
+    if isinstance(dist_config, dict):
+        for layer, idx in _group(layers).items():
+            if not layer or layer not in dist_config or not dist_config[layer]:
+                continue
+            c_dist = dist_config[layer]
+            block = sim_set.sample_block(c_dist, 'graph', len(idx), num_nodes=num_nodes)
+            if block is not None:
+                _scatter(out, idx, _finish(block, *_bounds(c_dist, attr_config, bound_fallback)))
+                overridden[idx] = True
+
+    rest = np.flatnonzero(~overridden)
+    if base is not None:
+        _scatter(out, rest, [base[i] for i in rest.tolist()])
+        return out
+    if not len(rest):
+        return out
+    block = sim_set.sample_block(dist_config, 'graph', len(rest), num_nodes=num_nodes)
+    if block is None:
+        return out
+    if mode == 'centrality_based':
+        block = block * _centrality_weights(centrality[rest], attr_config.get('centrality_type', 'direct_proportional'))
+    _scatter(out, rest, _finish(block, attr_config.get('min'), attr_config.get('max')))
+    return out
+
+
+def sample_node_attribute(graph: nx.Graph, attr_name: str, attr_config: Dict[str, Any], sim_set: Any, num_nodes: int) -> None:
+    """
+    Vectorized counterpart of the per-node attribute loop of the graph factory for the
+    homogenic, centrality_based and layered modes: one draw of size n per
+    (attribute, distribution) group instead of one draw per node. The values follow the
+    same rules but come from a different random stream.
+    """
+    mode = attr_config.get('mode', 'homogenic')
+    nodes = list(graph.nodes())
+    data = graph.nodes
+    layers = [data[node].get('layer') or data[node].get('type') for node in nodes]
+
+    base = None
+    centrality = None
+    if mode == 'homogenic':
+        dist_config = attr_config.get('distribution', None)
+        if not dist_config:
+            return
+        if isinstance(dist_config, dict) and 'size' not in dist_config:
+            dist_config = dict(dist_config)
+            dist_config['size'] = num_nodes
+        raw_values = sim_set.parse_distribution(dist_config, context='graph', num_nodes=num_nodes)
+        if raw_values is None:
+            return
+        if isinstance(raw_values, (int, float)):
+            raw_values = np.full(num_nodes, raw_values)
+        base = _finish(raw_values, attr_config.get('min'), attr_config.get('max'))
+    elif mode == 'centrality_based':
+        centrality = np.array([data[node].get('betweenness_centrality', 0.5) for node in nodes], dtype=float)
+    elif mode == 'layered':
+        layers = [layer or 'edge' for layer in layers]
+
+    values = _sample_values(layers, centrality, attr_config, sim_set, num_nodes, bound_fallback=False, base=base)
+    nx.set_node_attributes(graph, {node: value for node, value in zip(nodes, values) if value is not None}, attr_name)
+
+
+def sample_edge_attribute(graph: nx.Graph, attr_name: str, attr_config: Dict[str, Any], sim_set: Any, num_nodes: int,
+                          layers: List[str]) -> None:
+    """Vectorized counterpart of the per-edge attribute loop (layers as returned by edge_layers())."""
+    edges = list(graph.edges())
+    centrality = None
+    if attr_config.get('mode', 'homogenic') == 'centrality_based':
+        data = graph.nodes
+        centrality = np.array([
+            (data[u].get('betweenness_centrality', 0.5) + data[v].get('betweenness_centrality', 0.5)) / 2.0
+            for u, v in edges
+        ], dtype=float)
+
+    values = _sample_values(layers, centrality, attr_config, sim_set, num_nodes, bound_fallback=True)
+    nx.set_edge_attributes(graph, {edge: value for edge, value in zip(edges, values) if value is not None}, attr_name)
@@ -1,17 +1,35 @@
 import networkx as nx
 import numpy as np
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from ..infrastructure import InfrastructureSet
 from ..eventSet import generate_events
+from ..centrality import compute_betweenness
+from ..spatial_index import PointGrid
+from ..snapshot import load_snapshot, save_snapshot, snapshot_path
+from .layout import compute_layout
+from .attributes import (
+    ATTRIBUTE_SAMPLING_MODES, SAMPLED_MODES, clip_scalar, edge_layers,
+    sample_edge_attribute, sample_node_attribute
+)
 from ..constants import (
     DEFAULT_NUM_NODES, DEFAULT_MIN_RAM, 
-    DEFAULT_MAX_RAM, DEFAULT_TREE_BRANCHING_R, DEFAULT_TREE_BRANCHING_H
+    DEFAULT_MAX_RAM, DEFAULT_TREE_BRANCHING_R, DEFAULT_TREE_BRANCHING_H,
+    DEFAULT_ATTRIBUTE_SAMPLING, DEFAULT_SHORTEST_PATHS, CENTRALITY_THRESHOLD_DECIMALS
 )
 
 logger = logging.getLogger(__name__)
 
+def _stitch_tiers(graph: nx.Graph, lower: List[Any], upper: List[Any], uplinks: int) -> None:
+    """Connects every node of a lower tier to its `uplinks` closest nodes (by 'pos') of the tier above."""
+    if not lower or not upper:
+        return
+    pos = np.array([graph.nodes[n]['pos'] for n in lower], dtype=float)
+    grid = PointGrid(np.array([graph.nodes[n]['pos'] for n in upper], dtype=float))
+    closest, _ = grid.k_nearest(pos[:, 0], pos[:, 1], max(1, int(uplinks)))
+    graph.add_edges_from((node, upper[j]) for node, row in zip(lower, closest.tolist()) for j in row)
+
 def _generate_random_graph(config: Dict[str, Any], event_set: Any, sim_set: Any) -> Optional[InfrastructureSet]:
     """Internal function to handle the 'random' generation mode."""
     infra_config = config.get('infrastructure', {})
@@ -19,6 +37,14 @@ def _generate_random_graph(config: Dict[str, Any], event_set: Any, sim_set: Any)
     
     model_name = model_params.get('name', 'barabasi_albert')
     num_nodes = infra_config.get('num_nodes', DEFAULT_NUM_NODES)
+
+    # Reuse a stored infrastructure built from the same configuration and graph seed
+    snapshot_dir = snapshot_path(config, sim_set)
+    if snapshot_dir:
+        graph_set = load_snapshot(snapshot_dir, sim_set)
+        if graph_set is not None:
+            _generate_graph_events(graph_set, infra_config, event_set, sim_set)
+            return graph_set
     
     logger.info(f"Generating {model_name} graph with {num_nodes} nodes...")
 
@@ -89,22 +115,13 @@ def _generate_random_graph(config: Dict[str, Any], event_set: Any, sim_set: Any)
         for u, v in G_f.edges(): temp_graph.add_edge(u + offset_f, v + offset_f)
         for u, v in G_e.edges(): temp_graph.add_edge(u + offset_e, v + offset_e)
             
-        # Stitch Fog to Cloud (Closest)
+        # Stitch Fog to Cloud and Edge to Fog: each node links to its k closest upper-tier
+        # nodes (k = 'uplinks', 1 by default) through a grid index instead of a full scan
         cloud_nodes = list(G_c.nodes())
         fog_nodes = [n + offset_f for n in G_f.nodes()]
-        for f_node in fog_nodes:
-            f_pos = np.array(temp_graph.nodes[f_node]['pos'])
-            distances = [np.linalg.norm(f_pos - np.array(temp_graph.nodes[c_node]['pos'])) for c_node in cloud_nodes]
-            closest_c = cloud_nodes[np.argmin(distances)]
-            temp_graph.add_edge(f_node, closest_c)
-            
-        # Stitch Edge to Fog (Closest)
         edge_nodes = [n + offset_e for n in G_e.nodes()]
-        for e_node in edge_nodes:
-            e_pos = np.array(temp_graph.nodes[e_node]['pos'])
-            distances = [np.linalg.norm(e_pos - np.array(temp_graph.nodes[f_node]['pos'])) for f_node in fog_nodes]
-            closest_f = fog_nodes[np.argmin(distances)]
-            temp_graph.add_edge(e_node, closest_f)
+        _stitch_tiers(temp_graph, fog_nodes, cloud_nodes, model_params.get('fog', {}).get('uplinks', 1))
+        _stitch_tiers(temp_graph, edge_nodes, fog_nodes, model_params.get('edge', {}).get('uplinks', 1))
     else:
         logger.error(f"Graph model '{model_name}' not recognized.")
         return None
@@ -115,7 +132,7 @@ def _generate_random_graph(config: Dict[str, Any], event_set: Any, sim_set: Any)
     
     if model_name not in ['multi_tier', 'spatial']:
         layout_seed = int(sim_set.rng_graph.integers(0, 100000)) if hasattr(sim_set.rng_graph, 'integers') else 42
-        pos_dict = nx.spring_layout(temp_graph, seed=layout_seed)
+        pos_dict = compute_layout(temp_graph, infra_config.get('layout'), layout_seed)
         for n, p in pos_dict.items():
             normalized_x = (p[0] + 1) / 2.0
             normalized_y = (p[1] + 1) / 2.0
@@ -129,12 +146,19 @@ def _generate_random_graph(config: Dict[str, Any], event_set: Any, sim_set: Any)
     # Calculate Centrality first so we can use it for centrality_based attributes
     if temp_graph.number_of_nodes() > 0:
         try:
-            betweenness_centrality = nx.betweenness_centrality(temp_graph)
+            betweenness_centrality = compute_betweenness(temp_graph, infra_config.get('centrality'), sim_set.rng_graph)
             for node, centrality in betweenness_centrality.items():
                 temp_graph.nodes[node]['betweenness_centrality'] = round(centrality, 4)
         except Exception as e:
             logger.error(f"Could not calculate centrality: {e}")
 
+    # 'exact' draws attribute values one node / edge at a time (historical random stream),
+    # 'vectorized' draws one block per (attribute, distribution) group
+    attribute_sampling = infra_config.get('attribute_sampling', DEFAULT_ATTRIBUTE_SAMPLING)
+    if attribute_sampling not in ATTRIBUTE_SAMPLING_MODES:
+        raise ValueError(f"Unknown attribute sampling '{attribute_sampling}'. Expected one of {ATTRIBUTE_SAMPLING_MODES}.")
+    vectorized = attribute_sampling == 'vectorized'
+
     # Process node attributes
     node_attributes_config = infra_config.get('node', {}).get('attributes', {})
     
@@ -153,6 +177,10 @@ def _generate_random_graph(config: Dict[str, Any], event_set: Any, sim_set: Any)
         attr_config = node_attributes_config[attr_name]
         mode = attr_config.get('mode', 'homogenic')
         dist_config = attr_config.get('distribution', None)
+
+        if vectorized and mode in SAMPLED_MODES:
+            sample_node_attribute(temp_graph, attr_name, attr_config, sim_set, num_nodes)
+            continue
         
         if mode == 'homogenic':
             # Generate values for all nodes
@@ -183,7 +211,7 @@ def _generate_random_graph(config: Dict[str, Any], event_set: Any, sim_set: Any)
                                     c_min = c_dist.get('min') if isinstance(c_dist, dict) else None
                                     c_max = c_dist.get('max') if isinstance(c_dist, dict) else None
                                     if c_min is not None or c_max is not None:
-                                        val = np.clip(val, a_min=c_min, a_max=c_max)
+                                        val = clip_scalar(val, c_min, c_max)
                                     temp_graph.nodes[node_id][attr_name] = round(float(val), 2)
                                     continue
                         temp_graph.nodes[node_id][attr_name] = raw_values[i]
@@ -200,7 +228,7 @@ def _generate_random_graph(config: Dict[str, Any], event_set: Any, sim_set: Any)
                             c_min = c_dist.get('min') if isinstance(c_dist, dict) else None
                             c_max = c_dist.get('max') if isinstance(c_dist, dict) else None
                             if c_min is not None or c_max is not None:
-                                val = np.clip(val, a_min=c_min, a_max=c_max)
+                                val = clip_scalar(val, c_min, c_max)
                             temp_graph.nodes[node_id][attr_name] = round(float(val), 2)
                             continue
 
@@ -223,19 +251,21 @@ def _generate_random_graph(config: Dict[str, Any], event_set: Any, sim_set: Any)
                 min_val = attr_config.get('min')
                 max_val = attr_config.get('max')
                 if min_val is not None or max_val is not None:
-                    final_val = np.clip(final_val, a_min=min_val, a_max=max_val)
+                    final_val = clip_scalar(final_val, min_val, max_val)
                 
                 temp_graph.nodes[node_id][attr_name] = round(float(final_val), 2)
                 
         elif mode == 'centrality_based_layer':
             thresholds = attr_config.get('thresholds', {})
-            cloud_min = thresholds.get('cloud_min', 0.8)
-            fog_min = thresholds.get('fog_min', 0.2)
+            # Both sides are rounded so that a node sitting on a threshold gets the same
+            # layer whichever centrality mode computed it
+            cloud_min = round(thresholds.get('cloud_min', 0.8), CENTRALITY_THRESHOLD_DECIMALS)
+            fog_min = round(thresholds.get('fog_min', 0.2), CENTRALITY_THRESHOLD_DECIMALS)
             
             for node_id in temp_graph.nodes():
                 if 'layer' in temp_graph.nodes[node_id]: continue
                 
-                cent = temp_graph.nodes[node_id].get('betweenness_centrality', 0.0)
+                cent = round(temp_graph.nodes[node_id].get('betweenness_centrality', 0.0), CENTRALITY_THRESHOLD_DECIMALS)
                 if cent >= cloud_min:
                     val = 'cloud'
                 elif cent >= fog_min:
@@ -282,7 +312,7 @@ def _generate_random_graph(config: Dict[str, Any], event_set: Any, sim_set: Any)
                     if max_val is None:
                         max_val = attr_config.get('max')
                     if min_val is not None or max_val is not None:
-                        val = np.clip(val, a_min=min_val, a_max=max_val)
+                        val = clip_scalar(val, min_val, max_val)
                     temp_graph.nodes[node_id][attr_name] = round(float(val), 2)
 
     for node_id in temp_graph.nodes():
@@ -290,18 +320,18 @@ def _generate_random_graph(config: Dict[str, Any], event_set: Any, sim_set: Any)
 
     # Process edge attributes
     edge_attributes_config = infra_config.get('edge', {}).get('attributes', {})
+    # Node layers are final here: compute every edge's layer once for all attributes
+    layers_of_edges = edge_layers(temp_graph) if edge_attributes_config else []
     for attr_name, attr_config in edge_attributes_config.items():
         mode = attr_config.get('mode', 'homogenic')
         dist_config = attr_config.get('distribution', None)
-        
-        layer_priority = {'cloud': 3, 'fog': 2, 'edge': 1}
+
+        if vectorized and mode in SAMPLED_MODES:
+            sample_edge_attribute(temp_graph, attr_name, attr_config, sim_set, num_nodes, layers_of_edges)
+            continue
         
         if mode == 'homogenic':
-            for u, v in temp_graph.edges():
-                layer_u = temp_graph.nodes[u].get('layer') or temp_graph.nodes[u].get('type') or 'edge'
-                layer_v = temp_graph.nodes[v].get('layer') or temp_graph.nodes[v].get('type') or 'edge'
-                edge_layer = layer_u if layer_priority.get(layer_u, 1) >= layer_priority.get(layer_v, 1) else layer_v
-                
+            for (u, v), edge_layer in zip(temp_graph.edges(), layers_of_edges):
                 if edge_layer and isinstance(dist_config, dict) and edge_layer in dist_config:
                     c_dist = dist_config[edge_layer]
                     if c_dist:
@@ -314,7 +344,7 @@ def _generate_random_graph(config: Dict[str, Any], event_set: Any, sim_set: Any)
                             if c_max is None:
                                 c_max = attr_config.get('max')
                             if c_min is not None or c_max is not None:
-                                val = np.clip(val, a_min=c_min, a_max=c_max)
+                                val = clip_scalar(val, c_min, c_max)
                             temp_graph.edges[u, v][attr_name] = round(float(val), 2)
                             continue
                             
@@ -323,15 +353,11 @@ def _generate_random_graph(config: Dict[str, Any], event_set: Any, sim_set: Any)
                     min_val = attr_config.get('min')
                     max_val = attr_config.get('max')
                     if min_val is not None or max_val is not None:
-                        val = np.clip(val, a_min=min_val, a_max=max_val)
+                        val = clip_scalar(val, min_val, max_val)
                     temp_graph.edges[u, v][attr_name] = round(float(val), 2)
         elif mode == 'centrality_based':
             centrality_type = attr_config.get('centrality_type', 'direct_proportional')
-            for u, v in temp_graph.edges():
-                layer_u = temp_graph.nodes[u].get('layer') or temp_graph.nodes[u].get('type') or 'edge'
-                layer_v = temp_graph.nodes[v].get('layer') or temp_graph.nodes[v].get('type') or 'edge'
-                edge_layer = layer_u if layer_priority.get(layer_u, 1) >= layer_priority.get(layer_v, 1) else layer_v
-                
+            for (u, v), edge_layer in zip(temp_graph.edges(), layers_of_edges):
                 if edge_layer and isinstance(dist_config, dict) and edge_layer in dist_config:
                     c_dist = dist_config[edge_layer]
                     if c_dist:
@@ -344,7 +370,7 @@ def _generate_random_graph(config: Dict[str, Any], event_set: Any, sim_set: Any)
                             if c_max is None:
                                 c_max = attr_config.get('max')
                             if c_min is not None or c_max is not None:
-                                val = np.clip(val, a_min=c_min, a_max=c_max)
+                                val = clip_scalar(val, c_min, c_max)
                             temp_graph.edges[u, v][attr_name] = round(float(val), 2)
                             continue
                             
@@ -366,15 +392,11 @@ def _generate_random_graph(config: Dict[str, Any], event_set: Any, sim_set: Any)
                     min_val = attr_config.get('min')
                     max_val = attr_config.get('max')
                     if min_val is not None or max_val is not None:
-                        final_val = np.clip(final_val, a_min=min_val, a_max=max_val)
+                        final_val = clip_scalar(final_val, min_val, max_val)
                     temp_graph.edges[u, v][attr_name] = round(float(final_val), 2)
         elif mode == 'layered':
             layer_dists = attr_config.get('distribution', {})
-            for u, v in temp_graph.edges():
-                layer_u = temp_graph.nodes[u].get('layer') or temp_graph.nodes[u].get('type') or 'edge'
-                layer_v = temp_graph.nodes[v].get('layer') or temp_graph.nodes[v].get('type') or 'edge'
-                edge_layer = layer_u if layer_priority.get(layer_u, 1) >= layer_priority.get(layer_v, 1) else layer_v
-                
+            for (u, v), edge_layer in zip(temp_graph.edges(), layers_of_edges):
                 dist_for_edge = layer_dists.get(edge_layer)
                 if not dist_for_edge:
                     if layer_dists:
@@ -390,7 +412,7 @@ def _generate_random_graph(config: Dict[str, Any], event_set: Any, sim_set: Any)
                     if max_val is None:
                         max_val = attr_config.get('max')
                     if min_val is not None or max_val is not None:
-                        val = np.clip(val, a_min=min_val, a_max=max_val)
+                        val = clip_scalar(val, min_val, max_val)
                     temp_graph.edges[u, v][attr_name] = round(float(val), 2)
 
     for u, v in temp_graph.edges():
@@ -400,20 +422,29 @@ def _generate_random_graph(config: Dict[str, Any], event_set: Any, sim_set: Any)
     
     # This creates the dictionary item {'DEFAULT_INFRA_ID': {graph:..., actions:...}}
     # We no longer pass global actions to the graph
-    graph_item = graph_set.init_infrastructure(temp_graph, actions={})
+    graph_item = graph_set.init_infrastructure(
+        temp_graph, actions={}, path_mode=infra_config.get('shortest_paths', DEFAULT_SHORTEST_PATHS)
+    )
+    if snapshot_dir:
+        # Saved before the events below draw from the graph RNG
+        save_snapshot(snapshot_dir, graph_set, sim_set)
+
+    _generate_graph_events(graph_set, infra_config, event_set, sim_set)
+    return graph_set
 
+def _generate_graph_events(graph_set: InfrastructureSet, infra_config: Dict[str, Any], event_set: Any, sim_set: Any) -> None:
+    """Schedules the node and edge actions of the main graph."""
+    graph = graph_set.get_main_graph()
     node_actions = infra_config.get('node', {}).get('actions', {})
     edge_actions = infra_config.get('edge', {}).get('actions', {})
 
-    for node_id in temp_graph.nodes():
+    for node_id in graph.nodes():
         node_item = {'id': node_id, 'actions': node_actions}
         generate_events(node_item, 'graph_node', event_set, sim_set)
         
-    for edge in temp_graph.edges():
+    for edge in graph.edges():
         edge_item = {'id': edge, 'actions': edge_actions}
         generate_events(edge_item, 'graph_edge', event_set, sim_set)
-    
-    return graph_set
 
 # We can DELETE this function if we decide not to implement manual graph creation, but I left it here for now in case we want to add that feature later without much hassle
 def _generate_manual_graph(config: Dict[str, Any]) -> InfrastructureSet:
@@ -0,0 +1,114 @@
+import networkx as nx
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+LAYOUT_MODES = ('spring', 'pivot_mds')
+
+DEFAULT_LAYOUT_PIVOTS = 50
+
+
+def _rescale(pos: np.ndarray) -> np.ndarray:
+    """Centers the layout and scales it into [-1, 1] (same convention as nx.rescale_layout)."""
+    pos = pos - pos.mean(axis=0)
+    lim = np.abs(pos).max()
+    if lim > 0:
+        pos = pos / lim
+    return pos
+
+
+class _CSR:
+    """Compressed adjacency of an undirected graph for level-synchronous BFS."""
+
+    def __init__(self, graph: nx.Graph, nodes: List[Any]) -> None:
+        index = {node: i for i, node in enumerate(nodes)}
+        pairs = np.array([(index[u], index[v]) for u, v in graph.edges() if u != v], dtype=np.intp).reshape(-1, 2)
+        src = np.concatenate([pairs[:, 0], pairs[:, 1]])
+        dst = np.concatenate([pairs[:, 1], pairs[:, 0]])
+        order = np.argsort(src, kind='stable')
+        self.indices = dst[order]
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(src, minlength=len(nodes)))])
+
+    def bfs(self, source: int, n: int) -> np.ndarray:
+        """Hop distances from source (-1 where unreachable)."""
+        dist = np.full(n, -1, dtype=np.int64)
+        dist[source] = 0
+        frontier = np.array([source])
+        level = 0
+        while len(frontier):
+            level += 1
+            starts = self.indptr[frontier]
+            counts = self.indptr[frontier + 1] - starts
+            offsets = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+            neighbours = self.indices[np.repeat(starts, counts) + offsets]
+            neighbours = np.unique(neighbours[dist[neighbours] < 0])
+            dist[neighbours] = level
+            frontier = neighbours
+        return dist
+
+
+def pivot_mds_layout(graph: nx.Graph, seed: int, pivots: int = DEFAULT_LAYOUT_PIVOTS) -> Dict[Any, np.ndarray]:
+    """
+    Pivot MDS layout (Brandes & Pich): classical multidimensional scaling of the hop
+    distances to a few pivot nodes.
+
+    Pivots are picked max-min (each new pivot is the node farthest from the ones
+    already chosen), starting from a node drawn from `seed`. Each pivot costs one
+    breadth-first search, so the layout is O(pivots * (N + M)) and places nodes so
+    that Euclidean distances follow graph distances. Unreachable nodes are treated
+    as one hop beyond the farthest reachable node. A small seeded jitter separates
+    nodes that land on the same point, and positions are rescaled into [-1, 1] like
+    nx.spring_layout.
+    """
+    nodes = list(graph.nodes())
+    n = len(nodes)
+    if n == 0:
+        return {}
+    if n < 3:
+        pos = np.zeros((n, 2))
+        pos[:, 0] = np.linspace(-1, 1, n) if n > 1 else 0.0
+        return {node: pos[i] for i, node in enumerate(nodes)}
+
+    csr = _CSR(graph, nodes)
+    num_pivots = max(3, min(int(pivots), n))
+    distances = np.empty((n, num_pivots))
+    closest = np.full(n, np.inf)
+    rng = np.random.default_rng(seed)
+    pivot = int(rng.integers(0, n))
+    for p in range(num_pivots):
+        dist = csr.bfs(pivot, n).astype(float)
+        dist[dist < 0] = dist.max() + 1
+        distances[:, p] = dist
+        closest = np.minimum(closest, dist)
+        pivot = int(np.argmax(closest))
+
+    # Double-centred squared distances, then the two leading principal axes
+    squared = distances ** 2
+    centred = -0.5 * (squared - squared.mean(axis=0) - squared.mean(axis=1)[:, None] + squared.mean())
+    _, vectors = np.linalg.eigh(centred.T @ centred)
+    pos = centred @ vectors[:, [-1, -2]]
+
+    # Nodes with identical pivot distances (e.g. sibling leaves) share a position:
+    # spread every node by up to a quarter of the mean edge length
+    src = np.repeat(np.arange(n), np.diff(csr.indptr))
+    edge_length = np.hypot(*(pos[src] - pos[csr.indices]).T).mean() if len(src) else 0.0
+    if not edge_length > 0:
+        edge_length = float(np.ptp(pos, axis=0).max()) / np.sqrt(n) or 1.0
+    angle = rng.uniform(0, 2 * np.pi, n)
+    radius = 0.25 * edge_length * np.sqrt(rng.random(n))
+    pos += np.column_stack([radius * np.cos(angle), radius * np.sin(angle)])
+    pos = _rescale(pos)
+    return {node: pos[i] for i, node in enumerate(nodes)}
+
+
+def compute_layout(graph: nx.Graph, layout_conf: Optional[Dict[str, Any]], seed: int) -> Dict[Any, np.ndarray]:
+    """
+    Node positions in [-1, 1]^2 for models without intrinsic coordinates, according to
+    infrastructure.layout: 'spring' (default, nx.spring_layout) or 'pivot_mds'.
+    """
+    conf = layout_conf or {}
+    mode = conf.get('mode', 'spring')
+    if mode not in LAYOUT_MODES:
+        raise ValueError(f"Unknown layout mode '{mode}'. Expected one of {LAYOUT_MODES}.")
+    if mode == 'pivot_mds':
+        return pivot_mds_layout(graph, seed, pivots=int(conf.get('pivots', DEFAULT_LAYOUT_PIVOTS)))
+    return nx.spring_layout(graph, seed=seed)
@@ -1,32 +1,74 @@
 import networkx as nx
 import numpy as np
 import logging
+from contextlib import contextmanager
 from .eventSet import generate_events
-from .constants import DEFAULT_INFRA_ID
-from typing import Any, Dict, List, Optional, Tuple
+from .constants import DEFAULT_INFRA_ID, DEFAULT_SHORTEST_PATHS
+from .spatial_index import AccessNodeIndex
+from .distances import HopDistances, LazyShortestPaths, SHORTEST_PATH_MODES
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 # Note: I just added the DESCOMENTAR line to indicate where the event generation for the graph would be triggered
 
 class InfrastructureSet: 
+    # Single-target actions with a batch counterpart applying a resolved group at once
+    BATCH_ACTIONS = {
+        'disable_node': 'disable_nodes',
+        'revive_node': 'revive_nodes',
+        'disable_edge': 'disable_edges',
+        'revive_edge': 'revive_edges',
+        'congest_edge': 'congest_edges',
+        'clear_edge': 'clear_edges',
+    }
+
     def __init__(self) -> None:
         # Format: {'000': {'id': '000', 'graph': nx_graph, 'shortest_paths': dict, 'actions': dict}}
         self.infrastructures: Dict[str, Dict[str, Any]] = {} 
+        # Spatial index over the access nodes of the main graph, built on first use
+        self._access_index: Optional[AccessNodeIndex] = None
+        # Cached BFS hop distances of the main graph, built on first use
+        self._hop_distances: Optional[HopDistances] = None
+        # Per-infrastructure state of the last apply_placement (see _placement_state)
+        self._placement_states: Dict[str, Dict[str, Any]] = {}
+        # Cached node/edge information views of the main graph (see _refresh_views)
+        self._views: Optional[Dict[str, Any]] = None
+        self._dirty_nodes: set = set()
+        self._dirty_edges: set = set()
+        # Node and edge ids of the main graph with their positions (see get_topology_ids)
+        self._topology_ids: Optional[Dict[str, Any]] = None
+        # Active node/edge lists per infrastructure, rebuilt on the next read after a change
+        self._active_lists: Dict[str, Dict[str, Any]] = {}
+        # Open batch() blocks and the work deferred until the outermost one closes
+        self._batch_depth = 0
+        # infra_id -> (changed nodes, changed edges), None when every row must go
+        self._stale_paths: Dict[str, Optional[Tuple[set, set]]] = {}
+        self._pending_access: Dict[Any, bool] = {}
 
     def get_main_graph(self) -> Optional[nx.Graph]:
         """Helper to get the actual NetworkX object (useful for the Solver in main.py)"""
         return self.infrastructures.get(DEFAULT_INFRA_ID, {}).get('graph')
 
-    def init_infrastructure(self, nx_graph: nx.Graph, actions: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def init_infrastructure(self, nx_graph: nx.Graph, actions: Optional[Dict[str, Any]] = None,
+                            shortest_paths: Optional[Mapping] = None,
+                            path_mode: str = DEFAULT_SHORTEST_PATHS) -> Dict[str, Any]:
         """
         Wraps the NetworkX graph into the standard dictionary format 
-        and adds it to the set.
+        and adds it to the set. Precomputed shortest paths (e.g. loaded from a
+        snapshot) skip the all-pairs computation. With path_mode 'lazy' the
+        shortest paths are a LazyShortestPaths computed per source on demand.
         """
         obj_id = DEFAULT_INFRA_ID  
         actions = actions if actions is not None else {}
+        if path_mode not in SHORTEST_PATH_MODES:
+            raise ValueError(f"Unknown shortest path mode '{path_mode}'. Expected one of {SHORTEST_PATH_MODES}.")
         
-        shortest_paths = self._calculate_shortest_paths(nx_graph)
+        if shortest_paths is None:
+            if path_mode == 'lazy':
+                shortest_paths = LazyShortestPaths(nx_graph)
+            else:
+                shortest_paths = self._calculate_shortest_paths(nx_graph)
 
         # Create the dictionary item
         infra_item = {
@@ -42,7 +84,7 @@ class InfrastructureSet:
     def _calculate_shortest_paths(self, graph: nx.Graph) -> Dict[Any, Any]:
         """Internal helper to calculate paths on a specific graph instance."""
         # Filter active nodes
-        active_nodes = [n for n, attrs in graph.nodes(data=True) if attrs.get('enable', True)]
+        active_nodes = {n for n, attrs in graph.nodes(data=True) if attrs.get('enable', True)}
 
         if not active_nodes:
             return {}
@@ -60,58 +102,143 @@ class InfrastructureSet:
             logger.error(f"Path calculation failed: {e}")
             return {}
 
-    def update_shortest_paths(self, infra_id: str = DEFAULT_INFRA_ID) -> None:
-        """Recalculates shortest paths for the specific infrastructure item."""
+    def update_shortest_paths(self, infra_id: str = DEFAULT_INFRA_ID, nodes: Optional[Iterable[Any]] = None,
+                              edges: Optional[Iterable[Tuple[Any, Any]]] = None) -> None:
+        """
+        Recalculates shortest paths for the specific infrastructure item. Lazy shortest
+        paths only drop the rows that the changed nodes/edges can affect (every row if
+        neither is given).
+        """
+        if self._batch_depth:
+            if nodes is None and edges is None:
+                self._stale_paths[infra_id] = None
+            elif infra_id not in self._stale_paths or self._stale_paths[infra_id] is not None:
+                changed_nodes, changed_edges = self._stale_paths.setdefault(infra_id, (set(), set()))
+                changed_nodes.update(nodes or ())
+                changed_edges.update(tuple(edge) for edge in edges or ())
+            return
         item = self.infrastructures.get(infra_id)
         if item:
-            item['shortest_paths'] = self._calculate_shortest_paths(item['graph'])
+            paths = item['shortest_paths']
+            if isinstance(paths, LazyShortestPaths) and paths.graph is item['graph']:
+                if nodes is None and edges is None:
+                    paths.clear()
+                else:
+                    paths.invalidate(nodes or (), edges or ())
+            else:
+                item['shortest_paths'] = self._calculate_shortest_paths(item['graph'])
+
+    def _active_cache(self, infra_id: str) -> Optional[Dict[str, Any]]:
+        item = self.infrastructures.get(infra_id)
+        if not item:
+            return None
+        cache = self._active_lists.get(infra_id)
+        if cache is None or cache['graph'] is not item['graph']:
+            cache = self._active_lists[infra_id] = {'graph': item['graph'], 'nodes': None, 'edges': None}
+        return cache
+
+    def invalidate_active(self, infra_id: str = DEFAULT_INFRA_ID) -> None:
+        """
+        Drops the cached active node/edge lists of an infrastructure. Call it after
+        changing a node's or edge's 'enable' outside the actions of this class.
+        """
+        self._active_lists.pop(infra_id, None)
 
     def get_active_nodes(self, infra_id: str = DEFAULT_INFRA_ID) -> List[Any]:
         """
         Returns a list of active node IDs (nodes with 'enable' == True).
         If infra_id is not found or has no graph, returns an empty list.
         """
-        item = self.infrastructures.get(infra_id)
-        if not item:
+        cache = self._active_cache(infra_id)
+        if cache is None:
             return []
         
-        graph = item['graph']
-        active_nodes = [
-            n for n, attrs in graph.nodes(data=True) 
-            if attrs.get('enable', True)
-        ]
-        return active_nodes
+        if cache['nodes'] is None:
+            cache['nodes'] = [
+                n for n, attrs in cache['graph'].nodes(data=True) 
+                if attrs.get('enable', True)
+            ]
+        return list(cache['nodes'])
 
     def get_active_edges(self, infra_id: str = DEFAULT_INFRA_ID) -> List[Tuple[Any, Any]]:
         """
         Returns a list of active edge tuples (edges with 'enable' == True).
         If infra_id is not found or has no graph, returns an empty list.
         """
-        item = self.infrastructures.get(infra_id)
-        if not item:
+        cache = self._active_cache(infra_id)
+        if cache is None:
             return []
         
-        graph = item['graph']
-        active_edges = [
-            (u, v) for u, v, attrs in graph.edges(data=True)
-            if attrs.get('enable', True)
-        ]
-        return active_edges
+        if cache['edges'] is None:
+            cache['edges'] = [
+                (u, v) for u, v, attrs in cache['graph'].edges(data=True)
+                if attrs.get('enable', True)
+            ]
+        return list(cache['edges'])
         
-    def get_closest_edge_node(self, pos: Tuple[float, float], infra_id: str = DEFAULT_INFRA_ID) -> Optional[int]:
+    def get_access_index(self) -> Optional[AccessNodeIndex]:
+        """Returns the spatial index of access nodes, (re)building it if the main graph changed."""
         graph = self.get_main_graph()
         if not graph: return None
-        
-        edge_nodes = [n for n, d in graph.nodes(data=True) if d.get('type') == 'edge' and d.get('enable', True)]
-        if not edge_nodes:
-            edge_nodes = [n for n, d in graph.nodes(data=True) if d.get('layer') == 'edge' and d.get('enable', True)]
-        if not edge_nodes:
-            edge_nodes = [n for n, d in graph.nodes(data=True) if d.get('enable', True)]
-        if not edge_nodes:
-            return None
-            
-        distances = [np.linalg.norm(np.array(pos) - np.array(graph.nodes[n].get('pos', (0.5,0.5)))) for n in edge_nodes]
-        return int(edge_nodes[np.argmin(distances)])
+
+        if self._access_index is None or self._access_index.graph is not graph:
+            self._pending_access.clear()
+            self._access_index = AccessNodeIndex(graph)
+        self._flush_access_updates()
+        return self._access_index
+
+    def get_hop_distances(self) -> Optional[HopDistances]:
+        """Returns the hop-distance cache of the main graph, (re)building it if the main graph changed."""
+        graph = self.get_main_graph()
+        if not graph: return None
+
+        if self._hop_distances is None or self._hop_distances.graph is not graph:
+            self._hop_distances = HopDistances(graph)
+        return self._hop_distances
+
+    def get_topology_ids(self, type_object: str) -> Tuple[List[Any], Dict[Any, int]]:
+        """
+        Node ids ('graph_node') or edges ('graph_edge') of the main graph in graph order,
+        plus the position of each, cached while the main graph is the same object (events
+        toggle attributes but never change the topology).
+        """
+        graph = self.get_main_graph()
+        if not graph: return [], {}
+
+        cache = self._topology_ids
+        if cache is None or cache['graph'] is not graph:
+            cache = self._topology_ids = {'graph': graph}
+        if type_object not in cache:
+            ids = list(graph.nodes()) if type_object == 'graph_node' else list(graph.edges())
+            cache[type_object] = (ids, {item: i for i, item in enumerate(ids)})
+        return cache[type_object]
+
+    def get_closest_edge_node_with_distance(self, pos: Tuple[float, float]) -> Tuple[Optional[int], Optional[float]]:
+        """Closest enabled access node of pos and its Euclidean distance, in one query."""
+        index = self.get_access_index()
+        if index is None:
+            return None, None
+        node, dist = index.nearest(pos)
+        return (int(node), dist) if node is not None else (None, None)
+
+    def get_closest_edge_node(self, pos: Tuple[float, float], infra_id: str = DEFAULT_INFRA_ID) -> Optional[int]:
+        return self.get_closest_edge_node_with_distance(pos)[0]
+
+    def get_closest_edge_nodes(self, x: np.ndarray, y: np.ndarray) -> Tuple[Optional[List[int]], Optional[np.ndarray]]:
+        """
+        Batched get_closest_edge_node for the points (x[i], y[i]).
+
+        Returns:
+            (nodes, distances): the closest access node of every point and its Euclidean
+            distance, or (None, None) if there is no node to attach to.
+        """
+        index = self.get_access_index()
+        if index is None:
+            return None, None
+        nodes, distances = index.nearest_many(x, y)
+        if nodes is None:
+            return None, None
+        return [int(n) for n in nodes], distances
 
     def selectRandomGraphNodeByCentrality(self, centrality: float, sim_set: Any, node: Optional[int] = None) -> Optional[int]:
         graph = self.get_main_graph()
@@ -133,12 +260,14 @@ class InfrastructureSet:
         item = self.infrastructures.get(infra_id)
         if item and node_id in item['graph'].nodes:
             item['graph'].nodes[node_id]['enable'] = False
+            self._node_enable_changed(node_id, False, infra_id)
 
             # Clear the running applications and reset RAM to 0
             item['graph'].nodes[node_id]['running_applications'] = []
             item['graph'].nodes[node_id]['ram_used'] = 0.0
+            self.invalidate_placement(node_id, infra_id)
 
-            self.update_shortest_paths(infra_id)
+            self.update_shortest_paths(infra_id, nodes=[node_id])
 
             # Schedule Revival
             distribution_to_enable_node = sim_set.parse_distribution(distribution_to_enable_node, context='graph')
@@ -166,7 +295,9 @@ class InfrastructureSet:
         item = self.infrastructures.get(infra_id)
         if item and node_id in item['graph'].nodes:
             item['graph'].nodes[node_id]['enable'] = True
-            self.update_shortest_paths(infra_id)
+            self._node_enable_changed(node_id, True, infra_id)
+            self.invalidate_placement(node_id, infra_id)
+            self.update_shortest_paths(infra_id, nodes=[node_id])
         else:
             logger.warning(f"Node {node_id} not found in graph {infra_id}.")
         
@@ -183,7 +314,8 @@ class InfrastructureSet:
         item = self.infrastructures.get(infra_id)
         if item and edge and item['graph'].has_edge(*edge):
             item['graph'].edges[edge]['enable'] = False
-            self.update_shortest_paths(infra_id)
+            self._edge_enable_changed(edge, infra_id)
+            self.update_shortest_paths(infra_id, edges=[edge])
 
             # Schedule Revival
             distribution_to_enable_edge = sim_set.parse_distribution(distribution_to_enable_edge, context='graph')
@@ -211,7 +343,8 @@ class InfrastructureSet:
         item = self.infrastructures.get(infra_id)
         if item and edge and item['graph'].has_edge(*edge):
             item['graph'].edges[edge]['enable'] = True
-            self.update_shortest_paths(infra_id)
+            self._edge_enable_changed(edge, infra_id)
+            self.update_shortest_paths(infra_id, edges=[edge])
         else:
             logger.warning(f"Edge {edge} not found in graph {infra_id}.")
             
@@ -220,33 +353,323 @@ class InfrastructureSet:
             
         return f"Edge {edge} has been revived."
 
-    def apply_placement(self, placement: Dict[str, Any], application_set: Any, infra_id: str = DEFAULT_INFRA_ID) -> None:
-        """Updates the graph nodes state based on the placement dictionary."""
+    # --- Batched mutations ---
+
+    def _node_enable_changed(self, node: Any, enabled: bool, infra_id: str) -> None:
+        """Bookkeeping after a node was disabled or revived (index updates wait for the end of a batch)."""
+        if self._access_index is not None and infra_id == DEFAULT_INFRA_ID:
+            self._pending_access[node] = enabled
+            if not self._batch_depth:
+                self._flush_access_updates()
+        self.mark_node_dirty(node)
+        cache = self._active_lists.get(infra_id)
+        if cache is not None:
+            cache['nodes'] = None
+
+    def _edge_enable_changed(self, edge: Tuple[Any, Any], infra_id: str) -> None:
+        """Bookkeeping after an edge was disabled or revived."""
+        self.mark_edge_dirty(edge)
+        cache = self._active_lists.get(infra_id)
+        if cache is not None:
+            cache['edges'] = None
+
+    def _flush_access_updates(self) -> None:
+        if not self._pending_access:
+            return
+        pending, self._pending_access = self._pending_access, {}
+        if self._access_index is not None:
+            for node, enabled in pending.items():
+                self._access_index.set_enabled(node, enabled)
+
+    @contextmanager
+    def batch(self) -> Iterator['InfrastructureSet']:
+        """
+        Groups infrastructure mutations so that their bookkeeping runs once, when the
+        outermost block exits: the shortest paths of every changed infrastructure are
+        recalculated once, and access-index updates for disabled/revived nodes are
+        applied together (or as soon as get_access_index() is called inside the block).
+        Active node/edge lists are rebuilt on their next read. Blocks can be nested.
+
+        Inside a block, item['shortest_paths'] of a changed infrastructure is stale.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._flush_access_updates()
+                stale, self._stale_paths = self._stale_paths, {}
+                for infra_id in sorted(stale):
+                    if stale[infra_id] is None:
+                        self.update_shortest_paths(infra_id)
+                    else:
+                        self.update_shortest_paths(infra_id, *stale[infra_id])
+
+    def _apply_batch(self, action: Any, object_ids: List[Any], **kwargs: Any) -> List[Any]:
+        """
+        Applies a single-target action to every id in order inside a batch(). Random
+        draws and scheduled events are the same as calling the action once per id;
+        results keep the id order.
+        """
+        with self.batch():
+            return [action(object_id, **kwargs) for object_id in object_ids]
+
+    def disable_nodes(self, object_ids: List[int], **kwargs: Any) -> List[Optional[str]]:
+        """Disables a group of nodes (see disable_node)."""
+        return self._apply_batch(self.disable_node, object_ids, **kwargs)
+
+    def revive_nodes(self, object_ids: List[int], **kwargs: Any) -> List[str]:
+        """Revives a group of nodes (see revive_node)."""
+        return self._apply_batch(self.revive_node, object_ids, **kwargs)
+
+    def disable_edges(self, object_ids: List[Tuple[Any, Any]], **kwargs: Any) -> List[Optional[str]]:
+        """Disables a group of edges (see disable_edge)."""
+        return self._apply_batch(self.disable_edge, object_ids, **kwargs)
+
+    def revive_edges(self, object_ids: List[Tuple[Any, Any]], **kwargs: Any) -> List[str]:
+        """Revives a group of edges (see revive_edge)."""
+        return self._apply_batch(self.revive_edge, object_ids, **kwargs)
+
+    def congest_edges(self, object_ids: List[Tuple[Any, Any]], **kwargs: Any) -> List[Optional[str]]:
+        """Congests a group of edges (see congest_edge)."""
+        return self._apply_batch(self.congest_edge, object_ids, **kwargs)
+
+    def clear_edges(self, object_ids: List[Tuple[Any, Any]], **kwargs: Any) -> List[str]:
+        """Clears the congestion of a group of edges (see clear_edge)."""
+        return self._apply_batch(self.clear_edge, object_ids, **kwargs)
+
+    # --- Cached information views (main graph) ---
+
+    def mark_node_dirty(self, node: Any = None) -> None:
+        """Flags a node of the main graph as changed so its cached view is rebuilt (all nodes if None)."""
+        if node is None:
+            self._views = None
+        else:
+            self._dirty_nodes.add(node)
+
+    def mark_edge_dirty(self, edge: Optional[Tuple[Any, Any]] = None) -> None:
+        """Flags an edge of the main graph as changed so its cached view is rebuilt (all edges if None)."""
+        if edge is None:
+            self._views = None
+        else:
+            self._dirty_edges.add(tuple(edge))
+
+    @staticmethod
+    def _node_view(node: Any, feat: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": feat.get("id", node),
+            "label": feat.get("label", str(node)),
+            "layer": feat.get("layer", "edge"),
+            "ram": feat.get("ram"),
+            "enable": feat.get("enable"),
+            "betweenness_centrality": feat.get("betweenness_centrality"),
+            "ram_used": feat.get("ram_used"),
+            "running_applications": feat.get("running_applications", [])
+        }
+
+    @staticmethod
+    def _edge_view(u: Any, v: Any, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        edge_data = {"source": u, "target": v}
+        edge_data.update(attrs)
+        return edge_data
+
+    def _refresh_views(self) -> Optional[Dict[str, Any]]:
+        """
+        Brings the cached views of the main graph up to date and returns them. Only the
+        nodes and edges flagged dirty since the last call are rebuilt; everything is
+        rebuilt when the graph object or its size changed. Refreshed entries are new
+        dicts, so views handed out earlier keep describing the state they were taken in.
+        """
+        graph = self.get_main_graph()
+        if graph is None:
+            return None
+
+        views = self._views
+        if (views is None or views['graph'] is not graph
+                or len(views['nodes']) != graph.number_of_nodes() or len(views['edges']) != graph.number_of_edges()):
+            nodes = {}
+            node_index = {}
+            ram, ram_used = [], []
+            for i, (node, feat) in enumerate(graph.nodes(data=True)):
+                nodes[f"Node_{node}"] = self._node_view(node, feat)
+                node_index[node] = i
+                ram.append(float(feat.get("ram", 0.0)))
+                ram_used.append(float(feat.get("ram_used", 0.0)))
+            edges = []
+            edge_index = {}
+            for i, (u, v, attrs) in enumerate(graph.edges(data=True)):
+                edges.append(self._edge_view(u, v, attrs))
+                edge_index[(u, v)] = i
+                if not graph.is_directed():
+                    edge_index[(v, u)] = i
+            views = self._views = {
+                'graph': graph, 'nodes': nodes, 'node_index': node_index, 'edges': edges, 'edge_index': edge_index,
+                'ram': ram, 'ram_used': ram_used, 'ram_total': sum(ram), 'ram_used_total': sum(ram_used),
+            }
+            self._dirty_nodes.clear()
+            self._dirty_edges.clear()
+            return views
+
+        if self._dirty_nodes:
+            ram_changed = False
+            for node in self._dirty_nodes:
+                i = views['node_index'].get(node)
+                if i is None:
+                    continue
+                feat = graph.nodes[node]
+                views['nodes'][f"Node_{node}"] = self._node_view(node, feat)
+                new_ram = float(feat.get("ram", 0.0))
+                new_used = float(feat.get("ram_used", 0.0))
+                if new_ram != views['ram'][i] or new_used != views['ram_used'][i]:
+                    views['ram'][i] = new_ram
+                    views['ram_used'][i] = new_used
+                    ram_changed = True
+            if ram_changed:
+                # Re-summed in node order so totals match a full pass exactly
+                views['ram_total'] = sum(views['ram'])
+                views['ram_used_total'] = sum(views['ram_used'])
+            self._dirty_nodes.clear()
+
+        if self._dirty_edges:
+            for edge in self._dirty_edges:
+                i = views['edge_index'].get(edge)
+                if i is None:
+                    continue
+                u, v = views['edges'][i]["source"], views['edges'][i]["target"]
+                views['edges'][i] = self._edge_view(u, v, graph.edges[u, v])
+            self._dirty_edges.clear()
+        return views
+
+    def get_node_information(self) -> Dict[str, Any]:
+        """Per-node summary of the main graph ({'Node_<id>': {...}}), served from the cached views."""
+        views = self._refresh_views()
+        return dict(views['nodes']) if views else {}
+
+    def get_edge_information(self) -> List[Dict[str, Any]]:
+        """Per-edge attribute dicts of the main graph (with 'source'/'target'), served from the cached views."""
+        views = self._refresh_views()
+        return list(views['edges']) if views else []
+
+    def get_total_ram_occupied_percent(self) -> float:
+        """RAM used over total RAM of the main graph, as a percentage rounded to 2 decimals."""
+        views = self._refresh_views()
+        if not views or views['ram_total'] <= 0:
+            return 0.0
+        return round((views['ram_used_total'] / views['ram_total']) * 100.0, 2)
+
+    def _placement_state(self, infra_id: str, graph: nx.Graph) -> Dict[str, Any]:
+        """
+        Bookkeeping of the last apply_placement on a graph: the (app_id, ms_ram) entries
+        written to each enabled node, the nodes holding at least one entry, and the nodes
+        whose state must be rewritten on the next apply. A new graph starts from scratch.
+        """
+        state = self._placement_states.get(infra_id)
+        if state is None or state['graph'] is not graph:
+            state = {'graph': graph, 'placed': {}, 'occupied': set(), 'dirty': set(graph.nodes)}
+            self._placement_states[infra_id] = state
+        return state
+
+    def invalidate_placement(self, node: Any = None, infra_id: str = DEFAULT_INFRA_ID) -> None:
+        """
+        Forces apply_placement to rewrite a node (all nodes if node is None). Call it after
+        changing a node's 'enable', 'ram_used' or 'running_applications' outside the actions
+        of this class.
+        """
+        state = self._placement_states.get(infra_id)
+        if state is None:
+            return
+        if node is None:
+            del self._placement_states[infra_id]
+            return
+        state['placed'].pop(node, None)
+        state['occupied'].discard(node)
+        state['dirty'].add(node)
+
+    def placement_entries(self, placement: Dict[str, Any], application_set: Any,
+                          infra_id: str = DEFAULT_INFRA_ID) -> Dict[Any, List[Tuple[str, float]]]:
+        """
+        The (app_id, ms_ram) entries a placement puts on each node of the graph, in
+        placement order, with the apps' current microservice RAM (what apply_placement
+        writes into 'ram_used' and 'running_applications').
+        """
         item = self.infrastructures.get(infra_id)
-        if not item: return
+        if not item: return {}
         graph = item['graph']
-        
-        active_nodes = [n for n, attrs in graph.nodes(data=True) if attrs.get('enable', True)]
-        for node in active_nodes:
-            graph.nodes[node]['ram_used'] = 0.0
-            graph.nodes[node]['running_applications'] = []
-
         all_apps = application_set.get_all_apps()
-        
+
+        entries: Dict[Any, List[Tuple[str, float]]] = {}
         for app_name, ms_placements in placement.items():
-            app_id, app_data_ref = None, None
-            for a_id, app_data in all_apps.items():
-                if app_data['name'] == app_name:
-                    app_id, app_data_ref = a_id, app_data
-                    break
+            app_id = application_set.get_app_id_by_name(app_name)
+            app_data_ref = all_apps.get(app_id) if app_id is not None else None
             
             if app_id and app_data_ref and isinstance(ms_placements, dict):
+                ms_by_id: Dict[Any, Dict[str, Any]] = {}
+                for ms in app_data_ref.get('microservices', []):
+                    ms_by_id.setdefault(ms['id'], ms)
                 for ms_id, node in ms_placements.items():
                     if node in graph.nodes:
-                        ms_ram = next((ms['ram'] for ms in app_data_ref.get('microservices', []) if ms['id'] == ms_id), 0.0)
-                        graph.nodes[node]['ram_used'] += ms_ram
-                        if app_id not in graph.nodes[node]['running_applications']:
-                            graph.nodes[node]['running_applications'].append(app_id)
+                        ms_ram = ms_by_id[ms_id]['ram'] if ms_id in ms_by_id else 0.0
+                        entries.setdefault(node, []).append((app_id, ms_ram))
+        return entries
+
+    def apply_placement(self, placement: Dict[str, Any], application_set: Any, infra_id: str = DEFAULT_INFRA_ID) -> None:
+        """
+        Updates the graph nodes state based on the placement dictionary.
+
+        Only nodes whose placed microservices changed since the previous call are written.
+        Each of them is rebuilt from scratch in placement order, so 'ram_used' and
+        'running_applications' end up exactly as a reset-and-rebuild of every node gives.
+        """
+        item = self.infrastructures.get(infra_id)
+        if not item: return
+        graph = item['graph']
+        state = self._placement_state(infra_id, graph)
+
+        entries = self.placement_entries(placement, application_set, infra_id)
+
+        placed = state['placed']
+        touched = state['occupied'] | state['dirty'] | entries.keys()
+        state['dirty'] = set()
+        for node in touched:
+            if node not in graph.nodes:
+                placed.pop(node, None)
+                state['occupied'].discard(node)
+                continue
+            attrs = graph.nodes[node]
+            node_entries = entries.get(node, [])
+            if not attrs.get('enable', True):
+                # Disabled nodes are not reset; new entries are added on top of their state
+                placed.pop(node, None)
+                state['occupied'].discard(node)
+                state['dirty'].add(node)
+                for app_id, ms_ram in node_entries:
+                    attrs['ram_used'] += ms_ram
+                    if app_id not in attrs['running_applications']:
+                        attrs['running_applications'].append(app_id)
+                if node_entries and infra_id == DEFAULT_INFRA_ID:
+                    self.mark_node_dirty(node)
+                continue
+            if placed.get(node) == node_entries:
+                continue
+
+            ram_used = 0.0
+            running: List[str] = []
+            seen = set()
+            for app_id, ms_ram in node_entries:
+                ram_used += ms_ram
+                if app_id not in seen:
+                    seen.add(app_id)
+                    running.append(app_id)
+            attrs['ram_used'] = ram_used
+            attrs['running_applications'] = running
+            if infra_id == DEFAULT_INFRA_ID:
+                self.mark_node_dirty(node)
+            placed[node] = node_entries
+            if node_entries:
+                state['occupied'].add(node)
+            else:
+                state['occupied'].discard(node)
 
     def degrade_node(self, object_id: int, sim_set: Any, event_set: Any, p_loss_dist: str = '{"type": "beta", "a": 2, "b": 5}', distribution_to_restore_node: str = '10', **kwargs: Any) -> Optional[str]:
         """Degrades a specific node's computational capacity."""
@@ -265,6 +688,7 @@ class InfrastructureSet:
                     if f'nominal_{attr}' not in node: 
                         node[f'nominal_{attr}'] = node.get(attr, 0.0)
                     node[attr] = round(node[f'nominal_{attr}'] * (1 - p_loss), 2)
+            self.mark_node_dirty(node_id)
 
             # Schedule Restoration
             distribution_to_restore_node = sim_set.parse_distribution(distribution_to_restore_node, context='graph')
@@ -296,6 +720,7 @@ class InfrastructureSet:
                 attr = k.replace('nominal_', '', 1)
                 node[attr] = node[k]
                 del node[k]
+            self.mark_node_dirty(node_id)
         else:
             logger.warning(f"Node {node_id} not found in graph {infra_id}.")
         
@@ -333,8 +758,9 @@ class InfrastructureSet:
                     if f'nominal_{attr}' not in edge_data: 
                         edge_data[f'nominal_{attr}'] = edge_data.get(attr, 0.0)
                     edge_data[attr] = round(edge_data[f'nominal_{attr}'] * multiplier, 2)
+            self.mark_edge_dirty(edge)
             
-            self.update_shortest_paths(infra_id)
+            self.update_shortest_paths(infra_id, edges=[edge])
 
             distribution_to_clear_edge = sim_set.parse_distribution(distribution_to_clear_edge, context='graph')
 
@@ -366,7 +792,8 @@ class InfrastructureSet:
                 attr = k.replace('nominal_', '', 1)
                 edge_data[attr] = edge_data[k]
                 del edge_data[k]
-            self.update_shortest_paths(infra_id)
+            self.mark_edge_dirty(edge)
+            self.update_shortest_paths(infra_id, edges=[edge])
         else:
             logger.warning(f"Edge {edge} not found in graph {infra_id}.")
             
@@ -0,0 +1,66 @@
+from typing import Any, Container, Dict, Iterable, Tuple
+
+from .constants import INFEASIBLE_PENALTY
+
+
+class EnabledNodes:
+    """Container view of the enabled nodes of a graph (membership tests only, nothing is copied)."""
+
+    __slots__ = ('graph',)
+
+    def __init__(self, graph: Any) -> None:
+        self.graph = graph
+
+    def __contains__(self, node: Any) -> bool:
+        return node in self.graph.nodes and self.graph.nodes[node].get('enable', True)
+
+
+def placement_latency(
+    placement: Dict[str, Dict[str, Any]],
+    applications: Dict[str, Any],
+    demand: Iterable[Tuple[Tuple[Any, str], float]],
+    app_request_rates: Dict[str, float],
+    shortest_paths: Dict[Any, Dict[Any, float]],
+    active_nodes: Container[Any],
+    infeasible_penalty: float = INFEASIBLE_PENALTY,
+) -> float:
+    """
+    Request-weighted latency of a placement, as the solvers evaluate it:
+    - demand yields ((access node, app_id), request ratio) pairs, one per user or already
+      summed per (node, app); each pays the delay from its node, if active, to the first
+      microservice of the app;
+    - each microservice edge pays its delay times the app's total request ratio (1 if
+      nobody requests it).
+    Unreachable pairs, and microservices missing from the placement, cost infeasible_penalty.
+    """
+    def get_delay(source_node: Any, target_node: Any) -> float:
+        if source_node == target_node:
+            return 0.0
+        return float(shortest_paths.get(source_node, {}).get(target_node, infeasible_penalty))
+
+    total_latency = 0.0
+    for (home_node, app_id), ratio in demand:
+        if app_id not in applications or home_node not in active_nodes:
+            continue
+        app_data = applications[app_id]
+        microservices = app_data.get('microservices', [])
+        if not microservices:
+            continue
+        ms_node = placement.get(app_data['name'], {}).get(microservices[0]['id'])
+        if ms_node is None:
+            # The app's entry microservice is not placed: its users are not served
+            total_latency += infeasible_penalty * ratio
+        else:
+            total_latency += get_delay(home_node, ms_node) * ratio
+
+    for app_id, app_data in applications.items():
+        app_placement = placement.get(app_data['name'], {})
+        app_request_ratio = app_request_rates.get(app_id, 0.0) or 1.0
+        for edge in app_data.get('edges', []):
+            n1 = app_placement.get(edge.get('source'))
+            n2 = app_placement.get(edge.get('target'))
+            if n1 is None or n2 is None:
+                total_latency += infeasible_penalty * app_request_ratio
+            else:
+                total_latency += get_delay(n1, n2) * app_request_ratio
+    return total_latency
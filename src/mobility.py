@@ -0,0 +1,207 @@
+import math
+import numpy as np
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+RANDOM_MODELS = ('random_waypoint', 'random', 'aleatorio')
+
+# Same stopping rule as the per-user Manhattan walk
+MANHATTAN_EPSILON = 0.0001
+MANHATTAN_MAX_SEGMENTS = 100
+
+
+class StreetAxis:
+    """
+    Street coordinates along one axis of the Manhattan grid (uniformly spaced, sorted).
+
+    Lookups guess the street index arithmetically from the spacing and then correct
+    the guess against the stored coordinates, so they agree exactly with a scan of the
+    street list while costing O(1).
+    """
+
+    __slots__ = ('streets', 'spacing', 'array')
+
+    def __init__(self, length: float, count: int) -> None:
+        self.streets = tuple(i * (length / max(1, count - 1)) for i in range(count)) if count > 1 else (length / 2.0,)
+        self.spacing = length / (count - 1) if count > 1 and length > 0 else None
+        self.array = np.array(self.streets, dtype=float)
+
+    def _guess(self, v: float) -> int:
+        if self.spacing is None:
+            return 0
+        return min(max(int(math.floor(v / self.spacing)), 0), len(self.streets) - 1)
+
+    def first_above(self, v: float) -> int:
+        """Index of the first street strictly greater than v (len(streets) if none)."""
+        streets = self.streets
+        i = self._guess(v) + 1
+        while i > 0 and streets[i - 1] > v:
+            i -= 1
+        while i < len(streets) and streets[i] <= v:
+            i += 1
+        return i
+
+    def last_below(self, v: float) -> int:
+        """Index of the last street strictly lower than v (-1 if none)."""
+        streets = self.streets
+        i = self._guess(v)
+        while i < len(streets) - 1 and streets[i + 1] < v:
+            i += 1
+        while i >= 0 and streets[i] >= v:
+            i -= 1
+        return i
+
+    def nearest(self, v: float) -> int:
+        """Index of the street closest to v (the lowest one on ties, like min() over the list)."""
+        streets = self.streets
+        guess = self._guess(v)
+        best = max(guess - 1, 0)
+        for i in range(best + 1, min(guess + 3, len(streets))):
+            if abs(v - streets[i]) < abs(v - streets[best]):
+                best = i
+        return best
+
+
+@lru_cache(maxsize=None)
+def get_street_axis(length: float, count: int) -> StreetAxis:
+    return StreetAxis(length, count)
+
+
+def get_street_grid(user_conf: Dict[str, Any]) -> Tuple[StreetAxis, StreetAxis]:
+    """Returns the (cached) vertical-street axis along x and horizontal-street axis along y of a spatial_region."""
+    spatial_region = user_conf.get('spatial_region', {})
+    width = spatial_region.get('width', 1.0)
+    height = spatial_region.get('height', 1.0)
+    N_v = spatial_region.get('num_vertical_streets', 10)
+    N_h = spatial_region.get('num_horizontal_streets', 10)
+    return get_street_axis(width, N_v), get_street_axis(height, N_h)
+
+
+class MobilityEngine:
+    """
+    Advances many users in one vectorized step, working directly on the columns of a
+    UserStore. It follows the rules of UserSet.move_user for the 'manhattan' and
+    'random' models, but draws its random numbers in blocks, so batched trajectories
+    are reproducible without matching per-user moves draw for draw.
+    """
+
+    def __init__(self, user_conf: Dict[str, Any]) -> None:
+        self.user_conf = user_conf
+        spatial_region = user_conf.get('spatial_region', {})
+        self.width = spatial_region.get('width', 1.0)
+        self.height = spatial_region.get('height', 1.0)
+
+        mobility = user_conf.get('mobility', {})
+        self.model = mobility.get('model', 'manhattan')
+        turn_probs = mobility.get('turn_probabilities', {'straight': 0.33, 'left': 0.33, 'right': 0.34})
+        self.p_straight = turn_probs.get('straight', 0.33)
+        self.p_left = turn_probs.get('left', 0.33)
+
+        x_axis, y_axis = get_street_grid(user_conf)
+        self.X_streets, self.Y_streets = x_axis.array, y_axis.array
+
+    def step(self, store: Any, slots: np.ndarray, rng: np.random.Generator) -> None:
+        """Moves the users stored in `slots` by their own speed."""
+        if len(slots) == 0:
+            return
+        if self.model == 'manhattan':
+            self._step_manhattan(store, slots, rng)
+        elif self.model in RANDOM_MODELS:
+            self._step_random(store, slots, rng)
+
+    def _step_random(self, store: Any, slots: np.ndarray, rng: np.random.Generator) -> None:
+        n = len(slots)
+        x, y = store.get_positions(slots)
+        speed = np.nan_to_num(store.get_floats('speed', slots), nan=0.01)
+        angle = store.get_floats('current_angle', slots)
+
+        turn = np.isnan(angle) | (rng.random(n) > self.p_straight)
+        angle[turn] = rng.uniform(0, 2 * np.pi, int(turn.sum()))
+
+        new_x = x + speed * np.cos(angle)
+        new_y = y + speed * np.sin(angle)
+
+        bounce = (new_x <= 0) | (new_x >= self.width) | (new_y <= 0) | (new_y >= self.height)
+        new_x[bounce] = np.clip(new_x[bounce], 0.0, self.width)
+        new_y[bounce] = np.clip(new_y[bounce], 0.0, self.height)
+        angle[bounce] = (angle[bounce] + np.pi) % (2 * np.pi)
+
+        store.set_positions(slots, new_x, new_y)
+        store.set_floats('current_angle', slots, angle)
+
+    def _step_manhattan(self, store: Any, slots: np.ndarray, rng: np.random.Generator) -> None:
+        x, y = store.get_positions(slots)
+        remaining = np.nan_to_num(store.get_floats('speed', slots), nan=0.01)
+
+        direction = store.get_coded('current_direction', slots)
+        sign = store.get_coded('current_sign', slots)
+        horizontal = direction == 'horizontal'
+        signs = np.array([s if s else 0 for s in sign], dtype=float)
+
+        # Users without a heading pick one at random, like the per-user walk
+        unset = np.equal(direction, None) | (signs == 0)
+        k = int(unset.sum())
+        if k:
+            horizontal[unset] = rng.random(k) > 0.5
+            signs[unset] = np.where(rng.random(k) > 0.5, 1.0, -1.0)
+
+        active = remaining > MANHATTAN_EPSILON
+        for _ in range(MANHATTAN_MAX_SEGMENTS):
+            idx = np.flatnonzero(active)
+            if len(idx) == 0:
+                break
+            along_x = idx[horizontal[idx]]
+            along_y = idx[~horizontal[idx]]
+            self._advance_axis(along_x, x, self.X_streets, self.width, remaining, signs, horizontal, rng, turn_to_horizontal=False)
+            self._advance_axis(along_y, y, self.Y_streets, self.height, remaining, signs, horizontal, rng, turn_to_horizontal=True)
+            active = remaining > MANHATTAN_EPSILON
+
+        store.set_positions(slots, x, y)
+        store.set_coded('current_direction', slots, np.where(horizontal, 'horizontal', 'vertical').tolist())
+        store.set_coded('current_sign', slots, signs.astype(int).tolist())
+
+    def _advance_axis(self, idx: np.ndarray, coord: np.ndarray, streets: np.ndarray, limit: float,
+                      remaining: np.ndarray, signs: np.ndarray, horizontal: np.ndarray,
+                      rng: np.random.Generator, turn_to_horizontal: bool) -> None:
+        """Moves the users in idx along one axis up to their next intersection or their full remaining distance."""
+        if len(idx) == 0:
+            return
+        pos = coord[idx]
+        sign = signs[idx]
+        rem = remaining[idx]
+        target = pos + sign * rem
+
+        # First street strictly ahead of the current position
+        ahead = np.where(
+            sign > 0,
+            np.searchsorted(streets, pos, side='right'),
+            np.searchsorted(streets, pos, side='left') - 1,
+        )
+        valid = (ahead >= 0) & (ahead < len(streets))
+        street = streets[np.clip(ahead, 0, len(streets) - 1)]
+        crossing = valid & (np.abs(street - pos) <= rem)
+
+        # Users reaching an intersection stop there and choose straight / left / right
+        c = idx[crossing]
+        coord[c] = street[crossing]
+        remaining[c] = rem[crossing] - np.abs(street[crossing] - pos[crossing])
+        draw = rng.random(len(c))
+        turning = draw >= self.p_straight
+        left = turning & (draw < self.p_straight + self.p_left)
+        turned = c[turning]
+        # Left from horizontal reverses the sign, left from vertical keeps it (and the opposite for right)
+        flip = left[turning] if not turn_to_horizontal else ~left[turning]
+        signs[turned] = np.where(flip, -signs[turned], signs[turned])
+        horizontal[turned] = turn_to_horizontal
+
+        # The others walk their full remaining distance and bounce on the region border
+        f = idx[~crossing]
+        new = target[~crossing]
+        low = new <= 0
+        high = new >= limit
+        new[low] = 0
+        new[high] = limit
+        coord[f] = new
+        remaining[f] = 0.0
+        signs[f[low]] = 1.0
+        signs[f[high]] = -1.0
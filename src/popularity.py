@@ -0,0 +1,224 @@
+import bisect
+from typing import Dict, List, Tuple
+
+
+class FenwickTree:
+    """
+    Binary indexed tree over a growable array of non-negative weights.
+
+    Point updates, prefix sums and weighted search (find the slot a uniform draw
+    falls into) are O(log n), so a popularity-weighted choice does not need to
+    rebuild and renormalize a probability vector on every call.
+    """
+
+    __slots__ = ('values', 'tree', 'size', 'capacity', '_updates')
+
+    def __init__(self, capacity: int = 16) -> None:
+        self.capacity = max(1, int(capacity))
+        self.values: List[float] = [0.0] * self.capacity
+        self.tree: List[float] = [0.0] * (self.capacity + 1)
+        self.size = 0
+        self._updates = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def rebuild(self, capacity: int = 0) -> None:
+        """Recomputes the tree from the stored values (also clears accumulated rounding error)."""
+        if capacity > self.capacity:
+            self.values.extend([0.0] * (capacity - self.capacity))
+            self.capacity = capacity
+        tree = [0.0] * (self.capacity + 1)
+        # Every slot must pass its partial sum up, empty ones included (they carry their children's)
+        for i in range(self.capacity):
+            tree[i + 1] += self.values[i]
+            parent = (i + 1) + ((i + 1) & -(i + 1))
+            if parent <= self.capacity:
+                tree[parent] += tree[i + 1]
+        self.tree = tree
+        self._updates = 0
+
+    def append(self, value: float) -> int:
+        """Adds a new slot holding value and returns its index."""
+        if self.size == self.capacity:
+            self.rebuild(self.capacity * 2)
+        slot = self.size
+        self.size += 1
+        self.set(slot, value)
+        return slot
+
+    def pop(self) -> float:
+        """Removes the last slot and returns its value."""
+        slot = self.size - 1
+        value = self.values[slot]
+        self.set(slot, 0.0)
+        self.size = slot
+        return value
+
+    def set(self, slot: int, value: float) -> None:
+        delta = value - self.values[slot]
+        self.values[slot] = value
+        if delta == 0:
+            return
+        i = slot + 1
+        tree = self.tree
+        while i <= self.capacity:
+            tree[i] += delta
+            i += i & -i
+        self._updates += 1
+        if self._updates > 4 * self.capacity:
+            self.rebuild()
+
+    def prefix(self, end: int) -> float:
+        """Sum of the values of slots [0, end)."""
+        total = 0.0
+        i = end
+        tree = self.tree
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def total(self) -> float:
+        return self.prefix(self.size)
+
+    def find(self, u: float) -> int:
+        """Smallest slot whose inclusive prefix sum exceeds u (the last non-empty slot if u >= total)."""
+        pos = 0
+        step = 1 << (self.capacity.bit_length() - 1)
+        tree = self.tree
+        while step:
+            nxt = pos + step
+            if nxt <= self.capacity and tree[nxt] <= u:
+                pos = nxt
+                u -= tree[nxt]
+            step >>= 1
+        if pos >= self.size:
+            # u reached the total through rounding: fall back to the last weighted slot
+            pos = self.size - 1
+            while pos > 0 and self.values[pos] <= 0:
+                pos -= 1
+        return pos
+
+
+class RankIndex:
+    """
+    Apps ordered by decreasing popularity, ties broken by insertion order (the order a
+    stable sort of ApplicationSet.applications gives).
+
+    The sorted keys are split into blocks of at most 2 * LOAD keys, with a Fenwick tree
+    over the block sizes. An add/remove/update bisects the block maxima, then inserts or
+    deletes inside one bounded block, so it costs O(log A + LOAD) rather than shifting a
+    list of every app. Rank lookups add the block's prefix size to the offset inside it.
+    """
+
+    LOAD = 256
+
+    __slots__ = ('blocks', 'maxes', 'sizes', 'key_of', '_seq', '_len')
+
+    def __init__(self) -> None:
+        self.blocks: List[List[Tuple[float, int, str]]] = []
+        self.maxes: List[Tuple[float, int, str]] = []
+        self.sizes = FenwickTree()
+        self.key_of: Dict[str, Tuple[float, int, str]] = {}
+        self._seq = 0
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _rebuild_sizes(self) -> None:
+        # Only after a block split or removal, i.e. at most once every LOAD updates
+        self.sizes = FenwickTree(max(16, len(self.blocks)))
+        for block in self.blocks:
+            self.sizes.append(float(len(block)))
+
+    def _insert(self, key: Tuple[float, int, str]) -> None:
+        if not self.blocks:
+            self.blocks.append([key])
+            self.maxes.append(key)
+            self.sizes.append(1.0)
+            self._len += 1
+            return
+        b = min(bisect.bisect_left(self.maxes, key), len(self.blocks) - 1)
+        block = self.blocks[b]
+        bisect.insort(block, key)
+        self.maxes[b] = block[-1]
+        self._len += 1
+        if len(block) > 2 * self.LOAD:
+            half = len(block) // 2
+            self.blocks[b:b + 1] = [block[:half], block[half:]]
+            self.maxes[b:b + 1] = [block[half - 1], block[-1]]
+            self._rebuild_sizes()
+        else:
+            self.sizes.set(b, float(len(block)))
+
+    def _delete(self, key: Tuple[float, int, str]) -> None:
+        b = bisect.bisect_left(self.maxes, key)
+        block = self.blocks[b]
+        del block[bisect.bisect_left(block, key)]
+        self._len -= 1
+        if block:
+            self.maxes[b] = block[-1]
+            self.sizes.set(b, float(len(block)))
+        else:
+            del self.blocks[b]
+            del self.maxes[b]
+            self._rebuild_sizes()
+
+    def add(self, app_id: str, popularity: float) -> None:
+        key = (-popularity, self._seq, app_id)
+        self._seq += 1
+        self.key_of[app_id] = key
+        self._insert(key)
+
+    def remove(self, app_id: str) -> None:
+        key = self.key_of.pop(app_id, None)
+        if key is not None:
+            self._delete(key)
+
+    def update(self, app_id: str, popularity: float) -> None:
+        """Moves an app to the position of its new popularity (it keeps its tie-break order)."""
+        key = self.key_of.get(app_id)
+        if key is None or key[0] == -popularity:
+            return
+        self._delete(key)
+        key = (-popularity, key[1], app_id)
+        self.key_of[app_id] = key
+        self._insert(key)
+
+    def rank(self, app_id: str) -> int:
+        """0-based rank of an app (0 = most popular), -1 if unknown."""
+        key = self.key_of.get(app_id)
+        if key is None:
+            return -1
+        b = bisect.bisect_left(self.maxes, key)
+        return int(round(self.sizes.prefix(b))) + bisect.bisect_left(self.blocks[b], key)
+
+    def at(self, rank: int) -> str:
+        rank = int(rank)
+        if rank < 0:
+            rank += self._len
+        if not 0 <= rank < self._len:
+            raise IndexError("rank out of range")
+        b = self.sizes.find(float(rank))
+        return self.blocks[b][rank - int(round(self.sizes.prefix(b)))][2]
+
+    def top(self, k: int) -> List[str]:
+        result: List[str] = []
+        for block in self.blocks:
+            if len(result) >= k:
+                break
+            result.extend(key[2] for key in block[:k - len(result)])
+        return result
+
+    def bottom(self, k: int) -> List[str]:
+        """The k least popular apps, least popular last (same order as top())."""
+        k = min(max(0, k), self._len)
+        result: List[str] = []
+        for block in reversed(self.blocks):
+            if len(result) >= k:
+                break
+            result.extend(key[2] for key in reversed(block[max(0, len(block) - (k - len(result))):]))
+        result.reverse()
+        return result
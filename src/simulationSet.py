@@ -1,10 +1,30 @@
 import numpy as np
+import hashlib
+import itertools
 import logging
-from typing import Any, Optional, Dict, Union, List
-from .constants import DEFAULT_MASTER_SEED
+import string
+import uuid
+from typing import Any, Optional, Dict, Union, List, Tuple
+from .constants import DEFAULT_MASTER_SEED, DEFAULT_SAMPLING_BUFFER_SIZE, DEFAULT_ID_SCHEME, DEFAULT_ID_FORMAT
 
 logger = logging.getLogger(__name__)
 
+# Maps every context string accepted by the RNG helpers to its random domain
+CONTEXT_DOMAINS = {
+    'graph': 'graph',
+    'graph_node': 'graph',
+    'graph_edge': 'graph',
+    'graph_creation': 'graph',
+    'app': 'app',
+    'user': 'user',
+    'event': 'event',
+    'global_spawner': 'event',
+}
+
+# 'sequential' numbers ids per domain without touching any RNG. 'uuid' keeps the legacy
+# scheme (16 bytes drawn from the domain RNG) to reproduce traces of earlier versions.
+ID_SCHEMES = ('sequential', 'uuid')
+
 class SimulationSet:
     def __init__(
         self,
@@ -14,11 +34,22 @@ class SimulationSet:
         seed_user: Optional[int] = None,
         seed_event: Optional[int] = None,
         domain_seeds: Optional[Dict[str, int]] = None,
+        buffered_sampling: bool = False,
+        buffer_size: int = DEFAULT_SAMPLING_BUFFER_SIZE,
+        id_scheme: str = DEFAULT_ID_SCHEME,
+        id_format: str = DEFAULT_ID_FORMAT,
     ) -> None:
         """
         Initializes specific random generators for each simulation domain.
         Decoupling domain seeds allows keeping e.g. the same infrastructure
         (seed_graph) while changing the stochastic events (seed_event) or users.
+
+        With buffered_sampling enabled, scalar draws made through parse_distribution
+        are served from per-(domain, distribution) blocks of buffer_size values. Each
+        block stream owns a child generator spawned from the domain seed, so results are
+        reproducible but differ from the unbuffered mode.
+
+        Entity and event ids come from new_id(), see ID_SCHEMES.
         """
         if domain_seeds is None:
             domain_seeds = {}
@@ -34,9 +65,30 @@ class SimulationSet:
         self.rng_user = np.random.default_rng(self.seed_user)
         self.rng_event = np.random.default_rng(self.seed_event)
 
+        # Compiled distribution samplers, see get_sampler()
+        self._samplers: Dict[Any, Any] = {}
+
+        self.buffered_sampling = buffered_sampling
+        self.buffer_size = max(1, int(buffer_size))
+        self._streams: Dict[Tuple[str, str], 'BufferedStream'] = {}
+        self._stream_lookup: Dict[Tuple[str, 'DistributionSampler'], 'BufferedStream'] = {}
+
+        if id_scheme not in ID_SCHEMES:
+            raise ValueError(f"Unknown id scheme: {id_scheme}. Expected one of {ID_SCHEMES}")
+        self.id_scheme = id_scheme
+        # Event streams and memberships are keyed by object id alone, so ids must be unique
+        # across domains as well as within them
+        fields = {name for _, name, _, _ in string.Formatter().parse(id_format) if name}
+        if fields != {'domain', 'n'}:
+            raise ValueError(f"Id format {id_format!r} must use exactly the fields '{{domain}}' and '{{n}}'")
+        self.id_format = id_format
+        self._id_counters: Dict[str, Any] = {}
+
     @classmethod
     def from_config(cls, config: Dict[str, Any], default_master_seed: int = DEFAULT_MASTER_SEED) -> 'SimulationSet':
         seeds_config = config.get('seeds', {})
+        sampling_config = config.get('sampling') or {}
+        ids_config = config.get('ids') or {}
         master = seeds_config.get('master', seeds_config.get('master_seed', default_master_seed))
         return cls(
             master_seed=master,
@@ -45,6 +97,10 @@ class SimulationSet:
             seed_user=seeds_config.get('user'),
             seed_event=seeds_config.get('event'),
             domain_seeds=seeds_config,
+            buffered_sampling=sampling_config.get('buffered', False),
+            buffer_size=sampling_config.get('buffer_size', DEFAULT_SAMPLING_BUFFER_SIZE),
+            id_scheme=ids_config.get('scheme', DEFAULT_ID_SCHEME),
+            id_format=ids_config.get('format', DEFAULT_ID_FORMAT),
         )
 
     def get_seeds_info(self) -> Dict[str, int]:
@@ -56,48 +112,153 @@ class SimulationSet:
             "event": self.seed_event,
         }
 
+    def _get_domain_for_context(self, context: str) -> str:
+        """Returns the random domain ('graph', 'app', 'user', 'event') of a context string."""
+        domain = CONTEXT_DOMAINS.get(context.lower())
+        if domain is None:
+            raise ValueError(f"Unknown context: {context}")
+        return domain
+
     def _get_rng_for_context(self, context: str) -> np.random.Generator:
         """Returns the appropriate generator based on the context string."""
-        context = context.lower()
-        if context in ['graph', 'graph_node', 'graph_edge', 'graph_creation']:
-            return self.rng_graph
-        elif context == 'app':
-            return self.rng_app
-        elif context == 'user':
-            return self.rng_user
-        elif context in ['event', 'global_spawner']:
-            return self.rng_event
-        else:
-            raise ValueError(f"Unknown context: {context}")
+        return getattr(self, f"rng_{self._get_domain_for_context(context)}")
+
+    def _get_stream(self, sampler: 'DistributionSampler', context: str) -> 'BufferedStream':
+        """Returns (creating it on first use) the pre-sampling stream of a (domain, distribution) pair."""
+        stream = self._stream_lookup.get((context, sampler))
+        if stream is not None:
+            return stream
+
+        domain = self._get_domain_for_context(context)
+        key = (domain, sampler.key)
+        stream = self._streams.get(key)
+        if stream is None:
+            # The child seed depends only on the domain seed and the distribution itself, so
+            # streams do not depend on the order in which they are first used. The spawn key
+            # is the full SHA-256 of the distribution key (eight uint32 words): a short hash
+            # could let two distributions collide and share one stream
+            domain_seed = getattr(self, f"seed_{domain}")
+            digest = hashlib.sha256(sampler.key.encode()).digest()
+            spawn_key = tuple(int.from_bytes(digest[i:i + 4], 'little') for i in range(0, len(digest), 4))
+            child_rng = np.random.default_rng(np.random.SeedSequence(domain_seed, spawn_key=spawn_key))
+            stream = self._streams[key] = BufferedStream(sampler, child_rng, self.buffer_size)
+        self._stream_lookup[(context, sampler)] = stream
+        return stream
+
+    def new_id(self, context: str) -> str:
+        """
+        Returns a new id for an entity of the given context ('event', 'user', 'app').
+
+        Sequential ids are the per-domain counter rendered through id_format (fields
+        'domain' and 'n'), so creating more or fewer objects never shifts random draws.
+        """
+        domain = self._get_domain_for_context(context)
+        if self.id_scheme == 'uuid':
+            return str(uuid.UUID(bytes=getattr(self, f"rng_{domain}").bytes(16)))
+
+        counter = self._id_counters.get(domain)
+        if counter is None:
+            counter = self._id_counters[domain] = itertools.count(1)
+        return self.id_format.format(domain=domain, n=next(counter))
+
+    def choice_index(self, context: str, n: int) -> int:
+        """Index that choice() would pick from a sequence of length n (same draw)."""
+        if n <= 0:
+            raise IndexError("Cannot choose from an empty sequence")
+        rng = self._get_rng_for_context(context)
+        return int(rng.integers(0, n))
 
     def choice(self, context: str, seq: List[Any]) -> Any:
         """Deterministically chooses one element from seq using the domain RNG."""
-        if not seq:
-            raise IndexError("Cannot choose from an empty sequence")
+        return seq[self.choice_index(context, len(seq))]
+
+    def sample_indices(self, context: str, n: int, k: int) -> np.ndarray:
+        """Indices that sample() would pick from a sequence of length n (same draw)."""
+        if n <= 0:
+            return np.empty(0, dtype=np.int64)
         rng = self._get_rng_for_context(context)
-        idx = int(rng.integers(0, len(seq)))
-        return seq[idx]
+        return rng.choice(n, size=min(k, n), replace=False)
 
     def sample(self, context: str, seq: List[Any], k: int) -> List[Any]:
         """Deterministically samples k unique elements from seq using the domain RNG."""
-        if not seq:
-            return []
-        k = min(k, len(seq))
-        rng = self._get_rng_for_context(context)
-        indices = rng.choice(len(seq), size=k, replace=False)
-        return [seq[int(i)] for i in indices]
+        return [seq[int(i)] for i in self.sample_indices(context, len(seq), k)]
 
     def shuffle(self, context: str, seq: List[Any]) -> None:
         """Deterministically shuffles seq in-place using the domain RNG."""
         rng = self._get_rng_for_context(context)
         rng.shuffle(seq)
 
-    def parse_distribution(self, dist_config: Union[int, float, str, Dict[str, Any], None], context: str, **kwargs: Any) -> Optional[Any]:
+    def get_sampler(self, dist_config: Union[int, float, str, Dict[str, Any], None, 'ConstantSampler', 'DistributionSampler'], **kwargs: Any) -> Union['ConstantSampler', 'DistributionSampler']:
+        """
+        Returns the compiled sampler for a distribution configuration.
+
+        Dictionaries and strings are compiled once and cached by value (see
+        config_key), so equal configurations share a sampler and the cache keeps
+        no reference to the dicts it was given. Already compiled samplers are
+        returned unchanged.
+        """
+        if isinstance(dist_config, (ConstantSampler, DistributionSampler)):
+            return dist_config
+        if not isinstance(dist_config, (dict, str)):
+            return compile_distribution(dist_config, **kwargs)
+
+        try:
+            key = ('sampler', config_key(dist_config), config_key(kwargs))
+            sampler = self._samplers.get(key)
+        except TypeError:
+            # Unhashable leaf values: compile without caching
+            return compile_distribution(dist_config, **kwargs)
+        if sampler is None:
+            sampler = self._samplers[key] = compile_distribution(dist_config, **kwargs)
+        return sampler
+
+    def compile_distributions(self, config: Any) -> None:
+        """Compiles every distribution found in a configuration tree (load-time warm-up)."""
+        if isinstance(config, dict):
+            if is_distribution(config):
+                self.get_sampler(config)
+            for value in config.values():
+                self.compile_distributions(value)
+        elif isinstance(config, list):
+            for value in config:
+                self.compile_distributions(value)
+
+    def compile_tree(self, config: Any) -> Any:
+        """
+        Returns a copy of a configuration tree (e.g. an event 'impact') in which
+        every distribution dictionary has been replaced by its compiled sampler.
+        The compiled copy is cached by value of the original tree (see config_key).
+        """
+        if not isinstance(config, (dict, list)):
+            return config
+        try:
+            key = ('tree', config_key(config))
+            compiled = self._samplers.get(key)
+        except TypeError:
+            return self._compile_node(config)
+        if compiled is None:
+            compiled = self._samplers[key] = self._compile_node(config)
+        return compiled
+
+    def _compile_node(self, node: Any) -> Any:
+        if isinstance(node, dict):
+            if is_distribution(node):
+                return self.get_sampler(node)
+            return {k: self._compile_node(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [self._compile_node(v) for v in node]
+        return node
+
+    def clear_samplers(self) -> None:
+        """Drops every compiled sampler and compiled tree (e.g. to release memory after a run)."""
+        self._samplers.clear()
+
+    def parse_distribution(self, dist_config: Union[int, float, str, Dict[str, Any], None, 'ConstantSampler', 'DistributionSampler'], context: str, **kwargs: Any) -> Optional[Any]:
         """
         Parses and evaluates a distribution from a dictionary configuration.
         
         Args:
-            dist_config: Can be a primitive value, or a dictionary like:
+            dist_config: Can be a primitive value, a compiled sampler, or a dictionary like:
                          {"type": "normal", "loc": 10, "scale": 2.5}
             context (str): The domain ('graph', 'app', 'user', 'event')
             **kwargs: Variables to format into string parameters.
@@ -105,78 +266,226 @@ class SimulationSet:
         Returns:
             The evaluated numeric value or array.
         """
-        if dist_config is None or dist_config == 'None':
-            return None
-
         # Return primitives immediately
         if isinstance(dist_config, (int, float)):
             return dist_config
 
-        # If it's a string, attempt to cast to float. 
-        # (This is mostly for backwards compatibility or simple literals)
-        if isinstance(dist_config, str):
-            try:
-                return float(dist_config)
-            except ValueError:
-                logger.warning(f"Failed to parse primitive string '{dist_config}'. Returning None.")
-                return None
+        sampler = self.get_sampler(dist_config, **kwargs)
+        if isinstance(sampler, ConstantSampler):
+            return sampler.value
+        if self.buffered_sampling and sampler.bufferable:
+            return self._get_stream(sampler, context).draw()
+        return sampler(self._get_rng_for_context(context))
 
-        if isinstance(dist_config, dict):
-            dist_type = dist_config.get("type")
-            if not dist_type:
-                logger.error("Distribution dictionary must contain a 'type' key.")
-                return None
-            
-            rng = self._get_rng_for_context(context)
-            
-            # Security: Ensure we only call valid methods of the numpy random Generator
-            if not hasattr(rng, dist_type):
-                logger.error(f"Distribution '{dist_type}' is not a valid numpy random Generator method.")
+    def sample_block(self, dist_config: Union[int, float, str, Dict[str, Any], None, 'ConstantSampler', 'DistributionSampler'], context: str, size: int, **kwargs: Any) -> Optional[np.ndarray]:
+        """
+        Draws size values of a distribution with a single numpy call on the domain
+        generator (constants are broadcast). The values are not guaranteed to match size
+        successive parse_distribution() calls, and buffered streams are never used.
+
+        Returns None when the configuration evaluates to None or the draw fails.
+        """
+        sampler = self.get_sampler(dist_config, **kwargs)
+        if isinstance(sampler, ConstantSampler):
+            if sampler.value is None:
                 return None
-                
-            dist_method = getattr(rng, dist_type)
-            if not callable(dist_method):
-                logger.error(f"'{dist_type}' is not callable.")
+            return np.full(size, sampler.value, dtype=float)
+        block = sampler.draw_block(self._get_rng_for_context(context), size)
+        return None if block is None else np.asarray(block, dtype=float)
+
+
+def is_distribution(config: Any) -> bool:
+    """True if config is a dictionary describing a numpy Generator distribution."""
+    if not isinstance(config, dict):
+        return False
+    dist_type = config.get("type")
+    return isinstance(dist_type, str) and callable(getattr(np.random.Generator, dist_type, None))
+
+
+def config_key(config: Any) -> Any:
+    """
+    Hashable, content-based key of a configuration value: dicts by their items in key
+    order, lists and tuples by their elements, and leaves by (type, value) so that e.g.
+    1 and 1.0 stay distinct. Raises TypeError if a leaf is unhashable.
+    """
+    if isinstance(config, dict):
+        return (dict, tuple(sorted(((repr(k), config_key(v)) for k, v in config.items()), key=lambda item: item[0])))
+    if isinstance(config, (list, tuple)):
+        return (type(config), tuple(config_key(v) for v in config))
+    hash(config)
+    return (type(config), config)
+
+
+class ConstantSampler:
+    """Sampler for literal values (numbers, numeric strings or None)."""
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __call__(self, rng: Optional[np.random.Generator] = None) -> Any:
+        return self.value
+
+    def __copy__(self) -> 'ConstantSampler':
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> 'ConstantSampler':
+        return self
+
+    def __repr__(self) -> str:
+        return f"ConstantSampler({self.value!r})"
+
+
+class DistributionSampler:
+    """
+    Pre-parsed numpy Generator distribution. Parameters are formatted, cast and
+    renamed once; the Generator method is bound once per generator it is drawn from.
+    """
+    __slots__ = ('dist_type', 'params', 'weibull_scale', 'key', 'bufferable', '_methods')
+
+    def __init__(self, dist_type: str, params: Dict[str, Any], weibull_scale: Optional[float] = None) -> None:
+        self.dist_type = dist_type
+        self.params = params
+        self.weibull_scale = weibull_scale
+        # Content-based identity of the distribution (stable across runs and config copies)
+        self.key = repr((dist_type, sorted(params.items()), weibull_scale))
+        # Only scalar draws can be served from a pre-sampled block
+        self.bufferable = 'size' not in params
+        self._methods: Dict[np.random.Generator, Any] = {}
+
+    def draw_block(self, rng: np.random.Generator, size: int) -> Optional[List[Any]]:
+        """Draws size scalar values in a single numpy call."""
+        try:
+            values = getattr(rng, self.dist_type)(**self.params, size=size)
+            if self.weibull_scale is not None:
+                values = values * self.weibull_scale
+            return values.tolist()
+        except Exception as e:
+            logger.error(f"Error calling {self.dist_type} with params {self.params}: {e}")
+            return None
+
+    def __call__(self, rng: np.random.Generator) -> Optional[Any]:
+        method = self._methods.get(rng)
+        if method is None:
+            method = self._methods[rng] = getattr(rng, self.dist_type)
+        try:
+            val = method(**self.params)
+            if self.weibull_scale is not None:
+                val = val * self.weibull_scale
+            return val
+        except Exception as e:
+            logger.error(f"Error calling {self.dist_type} with params {self.params}: {e}")
+            return None
+
+    def __copy__(self) -> 'DistributionSampler':
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> 'DistributionSampler':
+        # Samplers are immutable: sharing them keeps deep-copied event impacts cheap
+        return self
+
+    def __repr__(self) -> str:
+        return f"DistributionSampler({self.dist_type!r}, {self.params!r})"
+
+
+NONE_SAMPLER = ConstantSampler(None)
+
+
+class BufferedStream:
+    """Block of pre-drawn values of one distribution, refilled in bulk from its own generator."""
+    __slots__ = ('sampler', 'rng', 'size', '_values')
+
+    def __init__(self, sampler: DistributionSampler, rng: np.random.Generator, size: int) -> None:
+        self.sampler = sampler
+        self.rng = rng
+        self.size = size
+        self._values: List[Any] = []
+
+    def draw(self) -> Optional[Any]:
+        if not self._values:
+            block = self.sampler.draw_block(self.rng, self.size)
+            if block is None:
                 return None
+            # Reversed so that pop() returns the values in generation order
+            block.reverse()
+            self._values = block
+        return self._values.pop()
+
+
+def compile_distribution(dist_config: Union[int, float, str, Dict[str, Any], None], **kwargs: Any) -> Union[ConstantSampler, DistributionSampler]:
+    """
+    Compiles a distribution configuration into a sampler, applying exactly the
+    same rules that were historically applied on every parse.
+
+    Args:
+        dist_config: A primitive value or a dictionary like {"type": "normal", "loc": 10, "scale": 2.5}
+        **kwargs: Variables to format into string parameters.
+
+    Returns:
+        A ConstantSampler for literals (and for invalid configurations, which evaluate
+        to None) or a DistributionSampler for dictionaries.
+    """
+    if dist_config is None or dist_config == 'None':
+        return NONE_SAMPLER
+
+    if isinstance(dist_config, (int, float)):
+        return ConstantSampler(dist_config)
 
-            # Process parameters, applying formatting if they are strings
-            dist_params = {}
-            for k, v in dist_config.items():
-                if k == "type" or isinstance(v, dict): continue
-                if isinstance(v, str):
-                    try:
-                        v = v.format(**kwargs)
-                        # Try casting to float/int if possible after formatting
-                        try:
-                            if "." in v:
-                                v = float(v)
-                            else:
-                                v = int(v)
-                        except ValueError:
-                            pass # Leave as string if not castable
-                    except KeyError as e:
-                        logger.error(f"Missing formatting variable {e} for string: {v}")
-                        return None
-                
-                # Parameter translation for numpy 'normal' generator
-                if dist_type == "normal":
-                    if k == "mean": k = "loc"
-                    elif k == "sigma": k = "scale"
-
-                dist_params[k] = v
-
-            # Intercept scale for Weibull since numpy's weibull generator does not take a scale parameter directly
-            weibull_scale = 1.0
-            if dist_type == "weibull" and "scale" in dist_params:
-                weibull_scale = float(dist_params.pop("scale"))
+    # If it's a string, attempt to cast to float. 
+    # (This is mostly for backwards compatibility or simple literals)
+    if isinstance(dist_config, str):
+        try:
+            return ConstantSampler(float(dist_config))
+        except ValueError:
+            logger.warning(f"Failed to parse primitive string '{dist_config}'. Returning None.")
+            return NONE_SAMPLER
 
+    if not isinstance(dist_config, dict):
+        return NONE_SAMPLER
+
+    dist_type = dist_config.get("type")
+    if not dist_type:
+        logger.error("Distribution dictionary must contain a 'type' key.")
+        return NONE_SAMPLER
+
+    # Security: Ensure we only call valid methods of the numpy random Generator
+    if not hasattr(np.random.Generator, dist_type):
+        logger.error(f"Distribution '{dist_type}' is not a valid numpy random Generator method.")
+        return NONE_SAMPLER
+
+    if not callable(getattr(np.random.Generator, dist_type)):
+        logger.error(f"'{dist_type}' is not callable.")
+        return NONE_SAMPLER
+
+    # Process parameters, applying formatting if they are strings
+    dist_params = {}
+    for k, v in dist_config.items():
+        if k == "type" or isinstance(v, dict): continue
+        if isinstance(v, str):
             try:
-                val = dist_method(**dist_params)
-                if dist_type == "weibull":
-                    val = val * weibull_scale
-                return val
-            except Exception as e:
-                logger.error(f"Error calling {dist_type} with params {dist_params}: {e}")
-                return None
-            
-        return None
\ No newline at end of file
+                v = v.format(**kwargs)
+                # Try casting to float/int if possible after formatting
+                try:
+                    if "." in v:
+                        v = float(v)
+                    else:
+                        v = int(v)
+                except ValueError:
+                    pass # Leave as string if not castable
+            except KeyError as e:
+                logger.error(f"Missing formatting variable {e} for string: {v}")
+                return NONE_SAMPLER
+
+        # Parameter translation for numpy 'normal' generator
+        if dist_type == "normal":
+            if k == "mean": k = "loc"
+            elif k == "sigma": k = "scale"
+
+        dist_params[k] = v
+
+    # Intercept scale for Weibull since numpy's weibull generator does not take a scale parameter directly
+    weibull_scale = None
+    if dist_type == "weibull":
+        weibull_scale = float(dist_params.pop("scale")) if "scale" in dist_params else 1.0
+
+    return DistributionSampler(dist_type, dist_params, weibull_scale)
@@ -16,7 +16,7 @@ from .simulation import (
     stop_simulation,
 )
 from .simulationSet import SimulationSet
-from .trigger_policies import TriggerPolicyManager
+from .trigger_policies import TriggerPolicyManager, get_disconnected_apps
 from .target_resolution import resolve_targets
 
 
@@ -82,30 +82,6 @@ def difference_in_placement(
     return results_dictionary
 
 
-def get_disconnected_apps(placement: Optional[Dict[str, Any]], infrastructure: Any) -> List[str]:
-    """Returns a list of apps mapped to disabled nodes."""
-    if not placement or not infrastructure:
-        return []
-    
-    graph = infrastructure.get_main_graph()
-    if not graph:
-        return []
-        
-    disconnected = set()
-    for app_name, ms_placement in placement.items():
-        if isinstance(ms_placement, dict):
-            for ms_id, node_id in ms_placement.items():
-                node_data = graph.nodes.get(node_id, {})
-                if not node_data.get('enable', True):
-                    disconnected.add(app_name)
-        elif isinstance(ms_placement, int) or isinstance(ms_placement, str):
-            node_id = ms_placement
-            node_data = graph.nodes.get(node_id, {})
-            if not node_data.get('enable', True):
-                disconnected.add(app_name)
-                
-    return list(disconnected)
-
 class ServicePlacementSimulation:
     def __init__(
         self,
@@ -117,7 +93,8 @@ class ServicePlacementSimulation:
         self.sim_set = sim_set
         self.total_iterations = total_iterations
 
-        self.events = EventSet()
+        self.event_streams_config = self.config.get("event_streams") or {}
+        self.events = EventSet(stream_mode=self.event_streams_config.get("mode", "per_entity"))
         self.infrastructure = None
         self.apps = None
         self.users = None
@@ -126,49 +103,40 @@ class ServicePlacementSimulation:
         self.last_total_latency = None
         self.last_ilp_event_index = 0
 
-    def _compute_total_ram_occupied_percent(self, graph_dict: Any) -> float:
-        graph = graph_dict.get_main_graph()
-        if graph is None:
-            return 0.0
+        # Compile every YAML distribution once instead of re-parsing it on each draw
+        self.sim_set.compile_distributions(self.config)
 
-        total_ram = sum(float(feat.get("ram", 0.0)) for _, feat in graph.nodes(data=True))
-        if total_ram <= 0:
-            return 0.0
-
-        used_ram = sum(float(feat.get("ram_used", 0.0)) for _, feat in graph.nodes(data=True))
-        return round((used_ram / total_ram) * 100.0, 2)
+    def _compute_total_ram_occupied_percent(self, graph_dict: Any) -> float:
+        return graph_dict.get_total_ram_occupied_percent()
 
     def _build_node_information(self, graph_dict: Any, app_set: Any) -> Dict[str, Any]:
-        graph = graph_dict.get_main_graph()
-        if graph is None:
-            return {}
-
-        node_information: Dict[str, Any] = {}
-        for node, feat in graph.nodes(data=True):
-            node_key = f"Node_{node}"
-            node_information[node_key] = {
-                "id": feat.get("id", node),
-                "label": feat.get("label", str(node)),
-                "layer": feat.get("layer", "edge"),
-                "ram": feat.get("ram"),
-                "enable": feat.get("enable"),
-                "betweenness_centrality": feat.get("betweenness_centrality"),
-                "ram_used": feat.get("ram_used"),
-                "running_applications": feat.get("running_applications", [])
-            }
-        return node_information
+        return graph_dict.get_node_information()
 
     def _build_edge_information(self, graph_dict: Any) -> List[Dict[str, Any]]:
-        graph = graph_dict.get_main_graph()
-        if graph is None:
-            return []
-
-        edge_information: List[Dict[str, Any]] = []
-        for u, v, attrs in graph.edges(data=True):
-            edge_data = {"source": u, "target": v}
-            edge_data.update(attrs)
-            edge_information.append(edge_data)
-        return edge_information
+        return graph_dict.get_edge_information()
+
+    def _get_stream_weight_getter(self, type_object: str) -> Optional[Any]:
+        """Returns a function giving the sampling weight of an entity for aggregated event streams."""
+        weight_attr = (self.event_streams_config.get("weights") or {}).get(type_object)
+        if not weight_attr:
+            return None
+
+        if type_object == "user":
+            return lambda object_id: self.users.get_all_users()[object_id].get(weight_attr, 0.0)
+        if type_object == "app":
+            return lambda object_id: self.apps.get_all_apps()[object_id].get(weight_attr, 0.0)
+        if type_object == "graph_node":
+            return lambda object_id: self.infrastructure.get_main_graph().nodes[object_id].get(weight_attr, 0.0)
+        if type_object == "graph_edge":
+            return lambda object_id: self.infrastructure.get_main_graph().edges[object_id].get(weight_attr, 0.0)
+        return None
+
+    def _register_stream_weights(self) -> None:
+        """Hands the configured weight attributes of aggregated event streams to the EventSet."""
+        for type_object in self.event_streams_config.get("weights") or {}:
+            weight_of = self._get_stream_weight_getter(type_object)
+            if weight_of is not None:
+                self.events.set_stream_weights(type_object, weight_of)
 
     def _update_system_state(
         self,
@@ -224,6 +192,10 @@ class ServicePlacementSimulation:
         if not target_object and first_event["type_object"] != "global":
             raise ValueError(f"Unknown object type: {first_event['type_object']}")
 
+        # Aggregated streams pick the entity they apply to when they fire
+        if first_event.get("aggregated"):
+            first_event["object_id"] = self.events.sample_stream_target(first_event, self.sim_set)
+
         # 3. Apply action
         raw_params = first_event.get("impact", {})
         impact_dict = raw_params.copy() if raw_params else {}
@@ -233,44 +205,54 @@ class ServicePlacementSimulation:
         if composed_of and isinstance(composed_of, list):
             messages = []
             executed_details = []
-            for sub_action in composed_of:
-                sub_action_name = sub_action.get("action_type")
-                sub_type = sub_action.get("type_object", first_event.get("type_object", "global"))
-                sub_target_object = set_map.get(sub_type)
-                if not sub_target_object:
-                    continue
+            # Node/edge bookkeeping (shortest paths, access index) runs once for the whole event
+            with self.infrastructure.batch():
+                for sub_action in composed_of:
+                    sub_action_name = sub_action.get("action_type")
+                    sub_type = sub_action.get("type_object", first_event.get("type_object", "global"))
+                    sub_target_object = set_map.get(sub_type)
+                    if not sub_target_object:
+                        continue
                 
-                sub_params = sub_action.get("impact_params", {}).copy()
+                    sub_params = sub_action.get("impact_params", {}).copy()
                 
-                # Context injection
-                sub_params["config"] = self.config
-                sub_params["app_set"] = self.apps
-                sub_params["user_set"] = self.users
-                sub_params["infrastructure"] = self.infrastructure
-                sub_params["sim_set"] = self.sim_set
-                sub_params["event_set"] = self.events
+                    # Context injection
+                    sub_params["config"] = self.config
+                    sub_params["app_set"] = self.apps
+                    sub_params["user_set"] = self.users
+                    sub_params["infrastructure"] = self.infrastructure
+                    sub_params["sim_set"] = self.sim_set
+                    sub_params["event_set"] = self.events
                 
-                targets = resolve_targets(first_event, sub_action, self.apps, self.users, self.infrastructure, self.sim_set)
+                    targets = resolve_targets(first_event, sub_action, self.apps, self.users, self.infrastructure, self.sim_set)
                 
-                for target_id in targets:
-                    action_method = getattr(sub_target_object, sub_action_name)
-                    action_result = action_method(target_id, **sub_params)
-                    
-                    sub_event_record = {
-                        "type_object": sub_type,
-                        "object_id": target_id,
-                        "action_type": sub_action_name
-                    }
+                    # Groups go through the batch counterpart of the action when there is one
+                    # (e.g. disable_nodes), which recalculates shortest paths once for all targets
+                    batch_action = getattr(sub_target_object, 'BATCH_ACTIONS', {}).get(sub_action_name)
+                    if batch_action and len(targets) > 1:
+                        action_results = getattr(sub_target_object, batch_action)(targets, **sub_params)
+                    elif targets:
+                        action_method = getattr(sub_target_object, sub_action_name)
+                        action_results = [action_method(target_id, **sub_params) for target_id in targets]
+                    else:
+                        action_results = []
+                
+                    for target_id, action_result in zip(targets, action_results):
+                        sub_event_record = {
+                            "type_object": sub_type,
+                            "object_id": target_id,
+                            "action_type": sub_action_name
+                        }
                     
-                    if isinstance(action_result, str):
-                        messages.append(f"[{sub_type}:{target_id}] {action_result}")
-                        sub_event_record["message"] = action_result
-                    elif isinstance(action_result, dict):
-                        if 'message' in action_result:
-                            messages.append(f"[{sub_type}:{target_id}] {action_result['message']}")
-                        sub_event_record.update(action_result)
+                        if isinstance(action_result, str):
+                            messages.append(f"[{sub_type}:{target_id}] {action_result}")
+                            sub_event_record["message"] = action_result
+                        elif isinstance(action_result, dict):
+                            if 'message' in action_result:
+                                messages.append(f"[{sub_type}:{target_id}] {action_result['message']}")
+                            sub_event_record.update(action_result)
                     
-                    executed_details.append(sub_event_record)
+                        executed_details.append(sub_event_record)
                         
             first_event["message"] = " | ".join(messages)
             first_event["executed_sub_actions"] = executed_details
@@ -301,12 +283,21 @@ class ServicePlacementSimulation:
                     first_event.update(action_result)
                     logger.info(f"Processing event: {action_result.get('message', 'Action executed with details')}")
 
+        # Weighted streams re-read the weight of the entities the event acted on
+        if self.events.has_stream_weights():
+            self.events.refresh_stream_weight(first_event.get("object_id"))
+            for sub_event_record in first_event.get("executed_sub_actions", []):
+                self.events.refresh_stream_weight(sub_event_record["object_id"])
+
         # 4. Terminal conditions
         # stop_simulation uses exceptions now, so we can exit cleanly.
         stop_simulation(self.apps, self.users, self.infrastructure)
 
         # 5. Check Trigger Policy to decide if we solve ILP
-        should_solve = self.trigger_manager.should_execute_ilp(first_event, self.events.global_time)
+        should_solve = self.trigger_manager.should_execute_ilp(
+            first_event, self.events.global_time, infrastructure=self.infrastructure,
+            app_set=self.apps, user_set=self.users, placement=self.last_opt_placement,
+        )
         
         if should_solve:
             logger.info(f"ILP Triggered by policy at event {iteration} ({first_event['action']})")
@@ -321,6 +312,7 @@ class ServicePlacementSimulation:
                 self.infrastructure.apply_placement(optimal_placement, self.apps)
                 self.last_opt_placement = optimal_placement
                 self.last_total_latency = total_latency
+                self.trigger_manager.record_solution(optimal_placement, self.infrastructure, self.apps, self.users)
             self.last_ilp_event_index = iteration
         else:
             logger.info(f"ILP Skipped by policy at event {iteration}")
@@ -404,6 +396,8 @@ class ServicePlacementSimulation:
             )
 
         init_global_spawner(self.config, self.events, self.sim_set)
+        self._register_stream_weights()
+        self.events.build_frequency_table(self.config, self.sim_set)
         logger.debug(f"Events: {self.events}")
 
         # Get initial optimal placement
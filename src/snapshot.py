@@ -0,0 +1,266 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import networkx as nx
+import numpy as np
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from .constants import DEFAULT_INFRA_ID
+from .distances import DistanceMatrix, LazyShortestPaths
+from .infrastructure import InfrastructureSet
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever graph generation changes what a given configuration and seed produce
+SNAPSHOT_VERSION = 1
+
+MANIFEST = 'manifest.json'
+
+
+def snapshot_key(config: Dict[str, Any], sim_set: Any) -> str:
+    """
+    Content address of the infrastructure a configuration generates: a hash of the
+    infrastructure section (without node/edge actions, which only schedule events
+    after generation), the spatial region node positions are scaled to and the graph
+    RNG state generation starts from.
+    """
+    infra_config = dict(config.get('infrastructure', {}))
+    infra_config.pop('snapshot', None)
+    for part in ('node', 'edge'):
+        if isinstance(infra_config.get(part), dict):
+            infra_config[part] = {k: v for k, v in infra_config[part].items() if k != 'actions'}
+    content = {
+        'version': SNAPSHOT_VERSION,
+        'infrastructure': infra_config,
+        'spatial_region': config.get('user', {}).get('spatial_region', {}),
+        'seed_graph': sim_set.seed_graph,
+        'rng_graph': sim_set.rng_graph.bit_generator.state,
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()[:24]
+
+
+def snapshot_path(config: Dict[str, Any], sim_set: Any) -> Optional[str]:
+    """Directory of the snapshot for this configuration, None if snapshots are disabled (or unsupported)."""
+    snapshot_conf = config.get('infrastructure', {}).get('snapshot') or {}
+    cache_dir = snapshot_conf.get('cache_dir')
+    if not cache_dir:
+        return None
+    if sim_set.buffered_sampling:
+        # Buffered streams keep their own generator state, which a snapshot does not capture
+        logger.warning("Infrastructure snapshots are disabled with buffered sampling.")
+        return None
+    return os.path.join(cache_dir, f"infrastructure-{snapshot_key(config, sim_set)}")
+
+
+def _column_kind(values: List[Any]) -> str:
+    types = {type(v) for v in values}
+    if types == {bool}:
+        return 'bool'
+    if types == {int}:
+        return 'int'
+    if types == {float}:
+        return 'float'
+    if types == {str}:
+        return 'str'
+    if types == {tuple} and all(len(v) == 2 and all(type(c) is float for c in v) for v in values):
+        return 'pair'
+    return 'json'
+
+
+def _encode_columns(records: List[Dict[str, Any]], prefix: str, directory: str) -> Dict[str, Any]:
+    """
+    Writes one array per attribute (plus a presence mask where some records lack it)
+    and returns the manifest entry. Every record keeps its own key order through a
+    table of distinct key orders ('signatures').
+    """
+    signatures: Dict[Tuple[str, ...], int] = {}
+    signature_of = np.empty(len(records), dtype=np.int32)
+    names: Dict[str, None] = {}
+    for i, attrs in enumerate(records):
+        keys = tuple(attrs)
+        signature_of[i] = signatures.setdefault(keys, len(signatures))
+        names.update(dict.fromkeys(keys))
+    np.save(os.path.join(directory, f"{prefix}_signature.npy"), signature_of)
+
+    columns = []
+    for c, name in enumerate(names):
+        present = np.array([name in attrs for attrs in records], dtype=bool)
+        values = [attrs[name] for attrs in records if name in attrs]
+        kind = _column_kind(values)
+        column = {'name': name, 'kind': kind, 'masked': not bool(present.all())}
+        if kind == 'json':
+            column['values'] = values
+        else:
+            array = np.array(values, dtype={'bool': bool, 'int': np.int64, 'float': float, 'str': str, 'pair': float}[kind])
+            np.save(os.path.join(directory, f"{prefix}_{c}.npy"), array)
+        if column['masked']:
+            np.save(os.path.join(directory, f"{prefix}_{c}_mask.npy"), present)
+        columns.append(column)
+    return {'signatures': [list(keys) for keys in signatures], 'columns': columns}
+
+
+def _decode_columns(entry: Dict[str, Any], count: int, prefix: str, directory: str) -> List[Dict[str, Any]]:
+    """Inverse of _encode_columns: one attribute dictionary per record, keys in their original order."""
+    signature_of = np.load(os.path.join(directory, f"{prefix}_signature.npy"), mmap_mode='r').tolist()
+    per_record: List[List[Any]] = [[None] * len(entry['columns']) for _ in range(count)]
+    slot = {column['name']: c for c, column in enumerate(entry['columns'])}
+    for c, column in enumerate(entry['columns']):
+        kind = column['kind']
+        if kind == 'json':
+            values = column['values']
+        else:
+            values = np.load(os.path.join(directory, f"{prefix}_{c}.npy"), mmap_mode='r').tolist()
+            if kind == 'pair':
+                values = [tuple(v) for v in values]
+        if column['masked']:
+            rows = np.flatnonzero(np.load(os.path.join(directory, f"{prefix}_{c}_mask.npy"), mmap_mode='r')).tolist()
+        else:
+            rows = range(count)
+        for row, value in zip(rows, values):
+            per_record[row][c] = value
+
+    orders = [[slot[name] for name in keys] for keys in entry['signatures']]
+    keys_of = entry['signatures']
+    return [
+        dict(zip(keys_of[s], (values[c] for c in orders[s])))
+        for s, values in zip(signature_of, per_record)
+    ]
+
+
+def _edge_insertion_order(num_nodes: int, num_edges: int, indptr: np.ndarray, adjacency: np.ndarray) -> List[int]:
+    """
+    An order in which to add the edges so that every node lists its neighbours in the
+    stored order (a topological order of the per-node sequences, which the original
+    insertion order satisfies).
+    """
+    successors: List[List[int]] = [[] for _ in range(num_edges)]
+    pending = [0] * num_edges
+    indptr = indptr.tolist()
+    adjacency = adjacency.tolist()
+    for u in range(num_nodes):
+        sequence = adjacency[indptr[u]:indptr[u + 1]]
+        for a, b in zip(sequence[:-1], sequence[1:]):
+            successors[a].append(b)
+            pending[b] += 1
+    ready = deque(e for e in range(num_edges) if pending[e] == 0)
+    order = []
+    while ready:
+        e = ready.popleft()
+        order.append(e)
+        for b in successors[e]:
+            pending[b] -= 1
+            if pending[b] == 0:
+                ready.append(b)
+    return order
+
+
+def save_snapshot(directory: str, infrastructure: InfrastructureSet, sim_set: Any) -> bool:
+    """
+    Stores the main graph (node and edge attributes, adjacency order), its all-pairs
+    distances (unless they are lazy) and the graph RNG state as .npy files plus a JSON
+    manifest. The snapshot is written to a temporary directory and moved into place,
+    so concurrent runs never read a partial one. Returns False if the graph cannot be
+    stored.
+    """
+    item = infrastructure.infrastructures.get(DEFAULT_INFRA_ID, {})
+    graph = item.get('graph')
+    if graph is None or graph.is_directed() or graph.is_multigraph():
+        return False
+    nodes = list(graph.nodes())
+    if not all(type(node) is int for node in nodes):
+        logger.warning("Infrastructure snapshot skipped: node ids are not integers.")
+        return False
+
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix='.tmp-', dir=parent)
+    try:
+        os.chmod(tmp, 0o755)
+        index = {node: i for i, node in enumerate(nodes)}
+        edges = list(graph.edges())
+        edge_index = {}
+        for e, (u, v) in enumerate(edges):
+            edge_index[(u, v)] = edge_index[(v, u)] = e
+        adjacency = [edge_index[(u, v)] for u in nodes for v in graph.adj[u]]
+        degrees = [len(graph.adj[u]) for u in nodes]
+
+        np.save(os.path.join(tmp, 'nodes.npy'), np.array(nodes, dtype=np.int64))
+        np.save(os.path.join(tmp, 'edges.npy'), np.array([(index[u], index[v]) for u, v in edges], dtype=np.int64).reshape(-1, 2))
+        np.save(os.path.join(tmp, 'adjacency.npy'), np.array(adjacency, dtype=np.int64))
+        np.save(os.path.join(tmp, 'adjacency_indptr.npy'), np.concatenate([[0], np.cumsum(degrees)]).astype(np.int64))
+
+        # Lazy shortest paths are stored as such: nothing is computed to save them
+        lazy = isinstance(item.get('shortest_paths'), LazyShortestPaths)
+        if not lazy:
+            distances = DistanceMatrix.from_dict(nodes, item.get('shortest_paths', {}))
+            np.save(os.path.join(tmp, 'distances.npy'), distances.matrix)
+
+        manifest = {
+            'version': SNAPSHOT_VERSION,
+            'graph': dict(graph.graph),
+            'nodes': _encode_columns([graph.nodes[node] for node in nodes], 'node', tmp),
+            'edges': _encode_columns([graph.edges[u, v] for u, v in edges], 'edge', tmp),
+            'shortest_paths': 'lazy' if lazy else 'all_pairs',
+            'integral_distances': None if lazy else distances.integral,
+            'rng_graph': sim_set.rng_graph.bit_generator.state,
+        }
+        with open(os.path.join(tmp, MANIFEST), 'w') as f:
+            json.dump(manifest, f)
+
+        if os.path.isdir(directory):
+            shutil.rmtree(tmp)
+        else:
+            os.replace(tmp, directory)
+        logger.info(f"Saved infrastructure snapshot to {directory}")
+        return True
+    except (TypeError, ValueError, OSError) as e:
+        shutil.rmtree(tmp, ignore_errors=True)
+        logger.warning(f"Infrastructure snapshot skipped: {e}")
+        return False
+
+
+def load_snapshot(directory: str, sim_set: Any) -> Optional[InfrastructureSet]:
+    """
+    Rebuilds the InfrastructureSet stored by save_snapshot and moves the graph RNG to
+    the state it had right after generation. The distance matrix stays memory-mapped.
+    Returns None if there is no usable snapshot.
+    """
+    manifest_path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != SNAPSHOT_VERSION:
+        return None
+
+    nodes = np.load(os.path.join(directory, 'nodes.npy'), mmap_mode='r').tolist()
+    edges = np.load(os.path.join(directory, 'edges.npy'), mmap_mode='r')
+    node_attrs = _decode_columns(manifest['nodes'], len(nodes), 'node', directory)
+    edge_attrs = _decode_columns(manifest['edges'], len(edges), 'edge', directory)
+
+    graph = nx.Graph(**manifest['graph'])
+    graph.add_nodes_from(zip(nodes, node_attrs))
+    order = _edge_insertion_order(
+        len(nodes), len(edges),
+        np.load(os.path.join(directory, 'adjacency_indptr.npy'), mmap_mode='r'),
+        np.load(os.path.join(directory, 'adjacency.npy'), mmap_mode='r'),
+    )
+    edge_pairs = edges.tolist()
+    graph.add_edges_from((nodes[edge_pairs[e][0]], nodes[edge_pairs[e][1]], edge_attrs[e]) for e in order)
+
+    infrastructure = InfrastructureSet()
+    if manifest.get('shortest_paths') == 'lazy':
+        infrastructure.init_infrastructure(graph, actions={}, path_mode='lazy')
+    else:
+        matrix = np.load(os.path.join(directory, 'distances.npy'), mmap_mode='r')
+        infrastructure.init_infrastructure(
+            graph, actions={},
+            shortest_paths=DistanceMatrix(nodes, matrix, integral=manifest['integral_distances']),
+        )
+    sim_set.rng_graph.bit_generator.state = manifest['rng_graph']
+    logger.info(f"Loaded infrastructure snapshot from {directory}")
+    return infrastructure
@@ -1,6 +1,7 @@
 import logging
 from typing import Any, Dict, Optional, Tuple, List
 from src.constants import INFEASIBLE_PENALTY, PENALTY_DELAY, DEFAULT_INFRA_ID
+from src.latency import placement_latency
 from .base_solver import BaseSolver
 
 logger = logging.getLogger(__name__)
@@ -86,14 +87,12 @@ class GreedySolver(BaseSolver):
             return float(paths_from_source.get(target_node, PENALTY_DELAY))
 
         # 2. Sum request rates per application and map users by requested application
-        app_request_rates: Dict[str, float] = {app_id: 0.0 for app_id in applications.keys()}
-        app_users_map: Dict[str, List[Dict[str, Any]]] = {app_id: [] for app_id in applications.keys()}
-
-        for user_id, user_data in users.items():
-            requested_app_id = user_data.get('requestedApp')
-            if requested_app_id in applications:
-                app_users_map[requested_app_id].append(user_data)
-                app_request_rates[requested_app_id] += float(user_data.get('requestRatio', 0.0))
+        app_request_rates: Dict[str, float] = {
+            app_id: user_set.get_request_ratio_total(app_id) for app_id in applications
+        }
+        app_users_map: Dict[str, List[Dict[str, Any]]] = {
+            app_id: user_set.getAllUsersByApp(app_id) for app_id in applications
+        }
 
         # Sort applications from most requested to least requested
         # Tie-breaker: application id ascending for deterministic behavior
@@ -164,66 +163,12 @@ class GreedySolver(BaseSolver):
                 return None, infeasible_penalty
 
         # 4. Compute total weighted latency cost matching ILP evaluation
-        total_latency = self._compute_total_latency(
-            placement, applications, users, active_nodes, all_pairs_shortest_paths, infeasible_penalty
+        user_demand = (
+            ((user_data.get('connectedTo'), user_data.get('requestedApp')), float(user_data.get('requestRatio') or 0.0))
+            for user_data in users.values()
+        )
+        total_latency = placement_latency(
+            placement, applications, user_demand, app_request_rates, all_pairs_shortest_paths,
+            set(active_nodes), infeasible_penalty
         )
         return placement, total_latency
-
-    def _compute_total_latency(
-        self,
-        placement: Dict[str, Dict[str, Any]],
-        applications: Dict[str, Any],
-        users: Dict[str, Any],
-        active_nodes: List[Any],
-        all_pairs_shortest_paths: Dict[Any, Dict[Any, float]],
-        infeasible_penalty: float = INFEASIBLE_PENALTY,
-    ) -> float:
-        total_latency = 0.0
-
-        def get_delay(source_node: Any, target_node: Any) -> float:
-            if source_node == target_node:
-                return 0.0
-            paths_from_source = all_pairs_shortest_paths.get(source_node, {})
-            return float(paths_from_source.get(target_node, infeasible_penalty))
-
-        # 1. User Latency: Delay to the FIRST microservice of the requested app
-        for user_id, user_data in users.items():
-            requested_app_id = user_data.get('requestedApp')
-            user_home_node = user_data.get('connectedTo')
-
-            if requested_app_id in applications and user_home_node in active_nodes:
-                app_data = applications[requested_app_id]
-                app_name = app_data['name']
-                microservices = app_data.get('microservices', [])
-                if not microservices:
-                    continue
-                first_ms_id = microservices[0]['id']
-
-                ms_node = placement.get(app_name, {}).get(first_ms_id)
-                if ms_node is not None:
-                    delay_value = get_delay(user_home_node, ms_node)
-                    total_latency += delay_value * float(user_data.get('requestRatio', 0.0))
-
-        # 2. Internal SFC Latency: Delay between microservices
-        for app_id, app_data in applications.items():
-            app_name = app_data['name']
-            edges = app_data.get('edges', [])
-
-            app_request_ratio = sum(
-                float(u.get('requestRatio', 0.0))
-                for u in users.values()
-                if u.get('requestedApp') == app_id
-            )
-            if app_request_ratio == 0:
-                app_request_ratio = 1.0
-
-            for edge in edges:
-                ms_source = edge.get('source')
-                ms_target = edge.get('target')
-                n1 = placement.get(app_name, {}).get(ms_source)
-                n2 = placement.get(app_name, {}).get(ms_target)
-                if n1 is not None and n2 is not None:
-                    delay_value = get_delay(n1, n2)
-                    total_latency += delay_value * app_request_ratio
-
-        return total_latency
@@ -89,7 +89,7 @@ class ILPMultiObjectiveSolver(BaseSolver):
             edges = app_data.get('edges', [])
 
             # Weight internal delay by the total request ratio for this app
-            app_request_ratio = sum(u['requestRatio'] for u in users.values() if u['requestedApp'] == app_id)
+            app_request_ratio = user_set.get_request_ratio_total(app_id)
             if app_request_ratio == 0:
                 app_request_ratio = 1.0 # Give it some base weight so it still optimizes
 
@@ -0,0 +1,259 @@
+import math
+import numpy as np
+import networkx as nx
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_NODE_POS = (0.5, 0.5)
+
+
+def _access_tiers(graph: nx.Graph) -> List[List[Any]]:
+    """Candidate access nodes by decreasing preference: edge type, edge layer, any node."""
+    return [
+        [n for n, d in graph.nodes(data=True) if d.get('type') == 'edge'],
+        [n for n, d in graph.nodes(data=True) if d.get('layer') == 'edge'],
+        list(graph.nodes()),
+    ]
+
+
+class AccessNodeIndex:
+    """
+    Uniform-grid spatial index over the enabled access nodes of a graph.
+
+    Users attach to the closest enabled 'edge'-type node, falling back to the 'edge'
+    layer and then to any enabled node (same rules as the former linear scan). The
+    index keeps every tier with its enabled count so that enabling or disabling a
+    node only touches one grid cell, and rebuilds the grid only when the tier in use
+    changes.
+
+    Queries search rings of grid cells around the query point and stop as soon as no
+    unexplored cell can hold a closer node. Ties resolve to the node that comes first
+    in graph order.
+    """
+
+    def __init__(self, graph: nx.Graph) -> None:
+        self.graph = graph
+        self.tiers = _access_tiers(graph)
+        self.enabled: Dict[Any, bool] = {n: bool(d.get('enable', True)) for n, d in graph.nodes(data=True)}
+        self.tier_enabled = [sum(self.enabled[n] for n in tier) for tier in self.tiers]
+        self.tier_of: List[Dict[Any, int]] = [{n: i for i, n in enumerate(tier)} for tier in self.tiers]
+        self.active_tier: Optional[int] = None
+        self._build()
+
+    def _select_tier(self) -> Optional[int]:
+        for t, count in enumerate(self.tier_enabled):
+            if count > 0:
+                return t
+        return None
+
+    def _build(self) -> None:
+        """(Re)builds the grid over the enabled nodes of the preferred non-empty tier."""
+        self.active_tier = self._select_tier()
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        if self.active_tier is None:
+            self.nodes: List[Any] = []
+            self.pos = np.empty((0, 2))
+            return
+
+        self.nodes = self.tiers[self.active_tier]
+        self.pos = np.array([self.graph.nodes[n].get('pos', DEFAULT_NODE_POS) for n in self.nodes], dtype=float)
+
+        # Roughly one node per cell over the bounding box of the tier
+        self.origin = self.pos.min(axis=0)
+        extent = np.maximum(self.pos.max(axis=0) - self.origin, 1e-9)
+        self.cell_size = float(max(math.sqrt(extent[0] * extent[1] / len(self.nodes)), 1e-9))
+        self.cell_of = [self._cell(x, y) for x, y in self.pos]
+        cells = np.array(self.cell_of)
+        self.cell_min = cells.min(axis=0)
+        self.cell_max = cells.max(axis=0)
+        for i, n in enumerate(self.nodes):
+            if self.enabled[n]:
+                self.cells.setdefault(self.cell_of[i], []).append(i)
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return (int(math.floor((x - self.origin[0]) / self.cell_size)),
+                int(math.floor((y - self.origin[1]) / self.cell_size)))
+
+    def set_enabled(self, node: Any, enabled: bool) -> None:
+        """Keeps the index in sync when a node is disabled or revived."""
+        if node not in self.enabled or self.enabled[node] == enabled:
+            return
+        self.enabled[node] = enabled
+        delta = 1 if enabled else -1
+        for t, tier_index in enumerate(self.tier_of):
+            if node in tier_index:
+                self.tier_enabled[t] += delta
+
+        if self._select_tier() != self.active_tier:
+            self._build()
+            return
+        if self.active_tier is None:
+            return
+        i = self.tier_of[self.active_tier].get(node)
+        if i is None:
+            return
+        cell = self.cell_of[i]
+        if enabled:
+            members = self.cells.setdefault(cell, [])
+            members.append(i)
+            members.sort()
+        else:
+            self.cells[cell].remove(i)
+            if not self.cells[cell]:
+                del self.cells[cell]
+
+    def _ring(self, cx: int, cy: int, r: int) -> List[int]:
+        """Node indices stored in the cells at Chebyshev distance r of (cx, cy)."""
+        if r == 0:
+            return list(self.cells.get((cx, cy), ()))
+        found = []
+        for dx in range(-r, r + 1):
+            for dy in (-r, r) if abs(dx) != r else range(-r, r + 1):
+                members = self.cells.get((cx + dx, cy + dy))
+                if members:
+                    found.extend(members)
+        return found
+
+    def _max_ring(self, cx: int, cy: int) -> int:
+        """Ring radius beyond which (cx, cy) has no grid cell left to visit."""
+        return int(max(abs(cx - self.cell_min[0]), abs(cx - self.cell_max[0]),
+                       abs(cy - self.cell_min[1]), abs(cy - self.cell_max[1])))
+
+    def _candidates(self, cx: int, cy: int, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        Node indices (sorted) that are guaranteed to contain the closest node of every
+        point (xs[k], ys[k]) lying in cell (cx, cy).
+        """
+        last = self._max_ring(cx, cy)
+        found: List[int] = []
+        r = 0
+        while True:
+            found.extend(self._ring(cx, cy, r))
+            # Any node outside rings 0..r is at least r * cell_size away from the cell's points
+            if found and (r >= last or self._worst_best(found, xs, ys) < r * self.cell_size * (1 - 1e-9)):
+                return np.array(sorted(found), dtype=np.intp)
+            r += 1
+
+    def _worst_best(self, found: List[int], xs: np.ndarray, ys: np.ndarray) -> float:
+        pos = self.pos[found]
+        d = np.hypot(xs[:, None] - pos[None, :, 0], ys[:, None] - pos[None, :, 1])
+        return float(d.min(axis=1).max())
+
+    def nearest(self, pos: Tuple[float, float]) -> Tuple[Optional[Any], Optional[float]]:
+        """Closest enabled access node of pos and its Euclidean distance (None, None if there is none)."""
+        if not self.cells:
+            return None, None
+        cx, cy = self._cell(pos[0], pos[1])
+        candidates = self._candidates(cx, cy, np.array([pos[0]]), np.array([pos[1]]))
+        point = np.array(pos)
+        distances = [np.linalg.norm(point - self.pos[i]) for i in candidates]
+        best = int(np.argmin(distances))
+        return self.nodes[candidates[best]], distances[best]
+
+    def nearest_many(self, x: np.ndarray, y: np.ndarray) -> Tuple[Optional[List[Any]], Optional[np.ndarray]]:
+        """Batched nearest(): points are grouped by grid cell and each group is solved with one distance matrix."""
+        if not self.cells:
+            return None, None
+        cx = np.floor((x - self.origin[0]) / self.cell_size).astype(np.int64)
+        cy = np.floor((y - self.origin[1]) / self.cell_size).astype(np.int64)
+        nearest = np.empty(len(x), dtype=np.intp)
+        distances = np.empty(len(x), dtype=float)
+
+        order = np.lexsort((cy, cx))
+        keys = np.stack([cx[order], cy[order]], axis=1)
+        bounds = np.flatnonzero(np.any(np.diff(keys, axis=0) != 0, axis=1)) + 1
+        for group in np.split(order, bounds):
+            if len(group) == 0:
+                continue
+            gx, gy = x[group], y[group]
+            candidates = self._candidates(int(cx[group[0]]), int(cy[group[0]]), gx, gy)
+            pos = self.pos[candidates]
+            d = np.hypot(gx[:, None] - pos[None, :, 0], gy[:, None] - pos[None, :, 1])
+            best = np.argmin(d, axis=1)
+            nearest[group] = candidates[best]
+            distances[group] = d[np.arange(len(group)), best]
+        return [self.nodes[i] for i in nearest], distances
+
+
+class PointGrid:
+    """
+    Static uniform grid over a fixed set of points for batched k-nearest queries.
+
+    Same ring search as AccessNodeIndex: query points are grouped by grid cell, rings
+    of cells are added until no unexplored cell can hold one of the k closest points,
+    and each group is then solved with a single distance matrix. Ties resolve to the
+    point with the lowest index.
+    """
+
+    def __init__(self, pos: np.ndarray) -> None:
+        self.pos = np.asarray(pos, dtype=float).reshape(-1, 2)
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        if not len(self.pos):
+            return
+        # Roughly one point per cell over the bounding box
+        self.origin = self.pos.min(axis=0)
+        extent = np.maximum(self.pos.max(axis=0) - self.origin, 1e-9)
+        self.cell_size = float(max(math.sqrt(extent[0] * extent[1] / len(self.pos)), 1e-9))
+        cells = np.floor((self.pos - self.origin) / self.cell_size).astype(np.int64)
+        self.cell_min = cells.min(axis=0)
+        self.cell_max = cells.max(axis=0)
+        for i, (cx, cy) in enumerate(cells.tolist()):
+            self.cells.setdefault((cx, cy), []).append(i)
+
+    def _ring(self, cx: int, cy: int, r: int) -> List[int]:
+        if r == 0:
+            return list(self.cells.get((cx, cy), ()))
+        found = []
+        for dx in range(-r, r + 1):
+            for dy in (-r, r) if abs(dx) != r else range(-r, r + 1):
+                members = self.cells.get((cx + dx, cy + dy))
+                if members:
+                    found.extend(members)
+        return found
+
+    def _max_ring(self, cx: int, cy: int) -> int:
+        return int(max(abs(cx - self.cell_min[0]), abs(cx - self.cell_max[0]),
+                       abs(cy - self.cell_min[1]), abs(cy - self.cell_max[1])))
+
+    def k_nearest(self, x: np.ndarray, y: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Indices (shape (len(x), k), closest first) and Euclidean distances of the k
+        points closest to every query point. k is capped at the number of points.
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        k = min(int(k), len(self.pos))
+        indices = np.empty((len(x), k), dtype=np.intp)
+        distances = np.empty((len(x), k), dtype=float)
+        if k <= 0 or not len(x):
+            return indices, distances
+
+        cx = np.floor((x - self.origin[0]) / self.cell_size).astype(np.int64)
+        cy = np.floor((y - self.origin[1]) / self.cell_size).astype(np.int64)
+        order = np.lexsort((cy, cx))
+        keys = np.stack([cx[order], cy[order]], axis=1)
+        bounds = np.flatnonzero(np.any(np.diff(keys, axis=0) != 0, axis=1)) + 1
+        for group in np.split(order, bounds):
+            gx, gy = x[group], y[group]
+            gcx, gcy = int(cx[group[0]]), int(cy[group[0]])
+            last = self._max_ring(gcx, gcy)
+            found: List[int] = []
+            r = 0
+            while True:
+                if (2 * r + 1) ** 2 > 4 * len(self.cells):
+                    # Far from the points (or degenerate grid): a full scan is cheaper than more rings
+                    found = list(range(len(self.pos)))
+                    r = last
+                else:
+                    found.extend(self._ring(gcx, gcy, r))
+                if len(found) >= k:
+                    candidates = np.array(sorted(found), dtype=np.intp)
+                    d = np.sqrt((gx[:, None] - self.pos[candidates, 0]) ** 2 + (gy[:, None] - self.pos[candidates, 1]) ** 2)
+                    best = np.argsort(d, axis=1, kind='stable')[:, :k]
+                    kth = d[np.arange(len(group)), best[:, -1]]
+                    # Any point outside rings 0..r is at least r * cell_size away from the cell's queries
+                    if r >= last or kth.max() < r * self.cell_size * (1 - 1e-9):
+                        break
+                r += 1
+            indices[group] = candidates[best]
+            distances[group] = np.take_along_axis(d, best, axis=1)
+        return indices, distances
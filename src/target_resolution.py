@@ -1,42 +1,98 @@
-import networkx as nx
-from typing import Dict, Any, List, Optional
+import numpy as np
+from typing import Dict, Any, Callable, List, Optional, Sequence
 import logging
 
 logger = logging.getLogger(__name__)
 
-def _get_all_ids_by_type(type_object: str, app_set: Any, user_set: Any, infrastructure: Any) -> List[Any]:
+class _CandidatePool:
+    """
+    Candidate ids of one entity type, addressed by position in the order the entity
+    store lists them (creation order for apps and users, graph order for nodes and
+    edges). Random strategies draw positions and only materialize the ids they pick;
+    membership tests are index lookups instead of list scans.
+    """
+
+    def __init__(self, size: int, take: Callable[[Sequence[int]], List[Any]],
+                 position: Callable[[Any], Optional[int]], ids: Callable[[], List[Any]]) -> None:
+        self._size = size
+        self._take = take
+        self._position = position
+        self._ids = ids
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, i: int) -> Any:
+        return self._take([i])[0]
+
+    def __contains__(self, candidate: Any) -> bool:
+        return self.position(candidate) is not None
+
+    def take(self, indices: Sequence[int]) -> List[Any]:
+        return self._take(indices)
+
+    def position(self, candidate: Any) -> Optional[int]:
+        try:
+            return self._position(candidate)
+        except TypeError:
+            # Unhashable ids (e.g. an edge given as a list) match no candidate
+            return None
+
+    def ids(self) -> List[Any]:
+        """All candidates, as a new list."""
+        return self._ids()
+
+def _get_candidate_pool(type_object: str, app_set: Any, user_set: Any, infrastructure: Any) -> Optional[_CandidatePool]:
     if type_object == 'app':
-        return list(app_set.get_all_apps().keys())
+        apps = app_set.get_all_apps()
+        return _CandidatePool(
+            len(apps), lambda indices: [app_set.get_app_id_at(int(i)) for i in indices],
+            app_set.get_app_position, lambda: list(apps),
+        )
     elif type_object == 'user':
-        return list(user_set.get_all_users().keys())
-    elif type_object == 'graph_node':
-        graph = infrastructure.get_main_graph()
-        return list(graph.nodes()) if graph else []
-    elif type_object == 'graph_edge':
-        graph = infrastructure.get_main_graph()
-        return list(graph.edges()) if graph else []
-    return []
-
-def _get_node_proximity(origin_id: Any, candidates: List[Any], infrastructure: Any) -> List[Any]:
-    graph = infrastructure.get_main_graph()
-    if not graph or origin_id not in graph.nodes:
-        return candidates
-
-    def get_distance(node):
-        try:
-            return nx.shortest_path_length(graph, source=origin_id, target=node)
-        except nx.NetworkXNoPath:
-            return float('inf')
-        except nx.NodeNotFound:
-            return float('inf')
+        users = user_set.get_all_users()
+        return _CandidatePool(
+            len(users), lambda indices: users.ids_of(users.live_slots()[np.asarray(indices, dtype=np.intp)]),
+            users.position_of, lambda: list(users),
+        )
+    elif type_object in ('graph_node', 'graph_edge'):
+        ids, index = infrastructure.get_topology_ids(type_object)
+        return _CandidatePool(len(ids), lambda indices: [ids[int(i)] for i in indices], index.get, lambda: list(ids))
+    return None
+
+def _nearest(candidates: List[Any], distances: np.ndarray, limit: Optional[int] = None) -> List[Any]:
+    """
+    Candidates ordered by distance, ties kept in candidate order (like a stable sort),
+    and truncated to limit. When limit is smaller than the number of candidates,
+    argpartition finds the limit-th distance and only the closer candidates are sorted.
+    """
+    if limit is None or limit >= len(candidates):
+        order = np.argsort(distances, kind='stable')
+    elif limit <= 0:
+        return []
+    else:
+        kth = distances[np.argpartition(distances, limit - 1)[limit - 1]]
+        closer = np.flatnonzero(distances < kth)
+        tied = np.flatnonzero(distances == kth)[:limit - len(closer)]
+        chosen = np.concatenate([closer, tied])
+        order = chosen[np.lexsort((chosen, distances[chosen]))]
+    return [candidates[i] for i in order.tolist()]
+
+def _get_node_proximity(origin_id: Any, candidates: List[Any], infrastructure: Any, limit: Optional[int] = None) -> List[Any]:
+    hops = infrastructure.get_hop_distances()
+    row = hops.row(origin_id) if hops is not None else None
+    if row is None:
+        return candidates[:limit]
 
-    return sorted(candidates, key=get_distance)
+    index = hops.index
+    distances = np.array([row[index[node]] if node in index else np.inf for node in candidates], dtype=float)
+    return _nearest(candidates, distances, limit)
 
-def _get_app_proximity(origin_id: Any, candidates: List[Any], app_set: Any) -> List[Any]:
+def _get_app_proximity(origin_id: Any, candidates: List[Any], app_set: Any, limit: Optional[int] = None) -> List[Any]:
     apps = app_set.get_all_apps()
     origin_app = apps.get(origin_id)
     if not origin_app:
-        return candidates
+        return candidates[:limit]
         
     origin_popularity = origin_app.get('popularity', 0)
     origin_is_local = origin_app.get('local_app_ratio', 0) > 0
@@ -52,47 +108,46 @@ def _get_app_proximity(origin_id: Any, candidates: List[Any], app_set: Any) -> L
             app_popularity = app_data.get('popularity', 0)
             return abs(origin_popularity - app_popularity)
             
-    return sorted(candidates, key=get_distance)
+    return _nearest(candidates, np.array([get_distance(app_id) for app_id in candidates], dtype=float), limit)
 
-def _get_user_proximity(origin_id: Any, candidates: List[Any], user_set: Any, infrastructure: Any) -> List[Any]:
+def _get_user_proximity(origin_id: Any, candidates: List[Any], user_set: Any, infrastructure: Any, limit: Optional[int] = None) -> List[Any]:
     users = user_set.get_all_users()
     origin_user = users.get(origin_id)
     if not origin_user:
-        return candidates
+        return candidates[:limit]
         
     origin_node = origin_user.get('connectedTo')
-    graph = infrastructure.get_main_graph()
-    if not graph:
-        return candidates
-    
+    hops = infrastructure.get_hop_distances()
+    if hops is None:
+        return candidates[:limit]
+    index = hops.index
+    # Users attached to a node (other than the origin's) that is missing or falsy are unreachable
+    row = hops.row(origin_node) if origin_node else None
+
     def get_distance(user_id):
-        target_user = users.get(user_id, {})
-        target_node = target_user.get('connectedTo')
+        target_node = users.get(user_id, {}).get('connectedTo')
         if origin_node == target_node:
             return 0
-        if not origin_node or not target_node or origin_node not in graph.nodes or target_node not in graph.nodes:
-            return float('inf')
-        try:
-            return nx.shortest_path_length(graph, source=origin_node, target=target_node)
-        except nx.NetworkXNoPath:
-            return float('inf')
+        if row is None or not target_node or target_node not in index:
+            return np.inf
+        return row[index[target_node]]
 
-    return sorted(candidates, key=get_distance)
+    return _nearest(candidates, np.array([get_distance(user_id) for user_id in candidates], dtype=float), limit)
 
-def _get_proximity_sorted(origin_id: Any, candidates: List[Any], type_object: str, app_set: Any, user_set: Any, infrastructure: Any, sim_set: Optional[Any] = None) -> List[Any]:
-    """Returns the candidates list sorted by proximity to the origin_id."""
+def _get_proximity_sorted(origin_id: Any, candidates: List[Any], type_object: str, app_set: Any, user_set: Any, infrastructure: Any, sim_set: Optional[Any] = None, limit: Optional[int] = None) -> List[Any]:
+    """Returns the candidates sorted by proximity to the origin_id (only the first limit ones if given)."""
     candidates = [c for c in candidates if c != origin_id]
     
     if type_object == 'graph_node':
-        return _get_node_proximity(origin_id, candidates, infrastructure)
+        return _get_node_proximity(origin_id, candidates, infrastructure, limit)
     elif type_object == 'app':
-        return _get_app_proximity(origin_id, candidates, app_set)
+        return _get_app_proximity(origin_id, candidates, app_set, limit)
     elif type_object == 'user':
-        return _get_user_proximity(origin_id, candidates, user_set, infrastructure)
+        return _get_user_proximity(origin_id, candidates, user_set, infrastructure, limit)
     
     if sim_set is not None:
         sim_set.shuffle('event', candidates)
-    return candidates
+    return candidates[:limit]
 
 def resolve_targets(first_event: Dict[str, Any], sub_action: Dict[str, Any], app_set: Any, user_set: Any, infrastructure: Any, sim_set: Any) -> List[Any]:
     """
@@ -119,36 +174,36 @@ def resolve_targets(first_event: Dict[str, Any], sub_action: Dict[str, Any], app
     if mode == 'id':
         return [target_resolution.get('id')]
         
-    all_candidates = _get_all_ids_by_type(type_object, app_set, user_set, infrastructure)
-    if not all_candidates:
+    pool = _get_candidate_pool(type_object, app_set, user_set, infrastructure)
+    if not pool:
         return []
 
     if mode == 'random':
-        return [sim_set.choice('event', all_candidates)]
+        return [pool[sim_set.choice_index('event', len(pool))]]
         
     if mode == 'self':
         if original_id is None:
              # If generated by global spawner, 'self' falls back to random
-             return [sim_set.choice('event', all_candidates)]
+             return [pool[sim_set.choice_index('event', len(pool))]]
              
         # Cross-entity exact match is not naturally supported by 'self' unless IDs match, 
         # but 'intelligent' is meant for cross-entity.
-        if original_id in all_candidates:
+        if original_id in pool:
             return [original_id]
-        elif str(original_id) in all_candidates:
+        elif str(original_id) in pool:
             return [str(original_id)]
-        elif type(all_candidates[0])(original_id) in all_candidates:
-            return [type(all_candidates[0])(original_id)]
+        elif type(pool[0])(original_id) in pool:
+            return [type(pool[0])(original_id)]
         else:
             # Fallback
-            return [sim_set.choice('event', all_candidates)]
+            return [pool[sim_set.choice_index('event', len(pool))]]
             
     if mode == 'group':
         strategy = group_config.get('strategy', 'random')
         raw_num_elements = group_config.get('num_elements', 1)
         
         if isinstance(raw_num_elements, float) and 0.0 <= raw_num_elements <= 1.0:
-            num_elements = max(1, int(len(all_candidates) * raw_num_elements))
+            num_elements = max(1, int(len(pool) * raw_num_elements))
         else:
             num_elements = int(raw_num_elements)
         
@@ -156,40 +211,43 @@ def resolve_targets(first_event: Dict[str, Any], sub_action: Dict[str, Any], app
             return group_config.get('list', [])[:num_elements]
             
         elif strategy == 'random':
-            return sim_set.sample('event', all_candidates, min(num_elements, len(all_candidates)))
+            return pool.take(sim_set.sample_indices('event', len(pool), num_elements))
             
         elif strategy == 'self_random':
             res = []
-            if original_id in all_candidates:
+            position = pool.position(original_id)
+            if position is not None:
                 res.append(original_id)
-            candidates = [c for c in all_candidates if c != original_id]
+            # Positions among the other candidates, shifted past the origin's own
+            num_others = len(pool) - len(res)
             needed = num_elements - len(res)
-            if needed > 0 and candidates:
-                res.extend(sim_set.sample('event', candidates, min(needed, len(candidates))))
+            if needed > 0 and num_others:
+                indices = sim_set.sample_indices('event', num_others, needed)
+                if position is not None:
+                    indices = indices + (indices >= position)
+                res.extend(pool.take(indices))
             return res
             
         elif strategy == 'self_proximity':
             res = []
-            if original_id in all_candidates:
+            if original_id in pool:
                 res.append(original_id)
             else:
                 # If the origin is not in candidates (e.g. cross-entity), pick random origin
-                original_id = sim_set.choice('event', all_candidates)
+                original_id = pool[sim_set.choice_index('event', len(pool))]
                 res.append(original_id)
                 
-            sorted_candidates = _get_proximity_sorted(original_id, all_candidates, type_object, app_set, user_set, infrastructure, sim_set)
             needed = num_elements - len(res)
-            if needed > 0:
-                res.extend(sorted_candidates[:needed])
+            sorted_candidates = _get_proximity_sorted(original_id, pool.ids(), type_object, app_set, user_set, infrastructure, sim_set, limit=max(needed, 0))
+            res.extend(sorted_candidates)
             return res
             
         elif strategy == 'random_proximity':
-            origin = sim_set.choice('event', all_candidates)
+            origin = pool[sim_set.choice_index('event', len(pool))]
             res = [origin]
-            sorted_candidates = _get_proximity_sorted(origin, all_candidates, type_object, app_set, user_set, infrastructure, sim_set)
             needed = num_elements - len(res)
-            if needed > 0:
-                res.extend(sorted_candidates[:needed])
+            sorted_candidates = _get_proximity_sorted(origin, pool.ids(), type_object, app_set, user_set, infrastructure, sim_set, limit=max(needed, 0))
+            res.extend(sorted_candidates)
             return res
 
     return [original_id]
@@ -1,5 +1,63 @@
+import logging
 import numpy as np
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+
+from .constants import DEFAULT_INFRA_ID, INFEASIBLE_PENALTY
+from .latency import EnabledNodes, placement_latency
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_placement_latency(placement: Dict[str, Any], infrastructure: Any, app_set: Any, user_set: Any,
+                               infeasible_penalty: float = INFEASIBLE_PENALTY,
+                               app_request_rates: Optional[Dict[str, float]] = None) -> float:
+    """
+    Request-weighted latency of a placement in the current infrastructure state, with the
+    solvers' evaluation rules (latency.placement_latency). The users' demand comes from the
+    cached per-app and per-(access node, app) request totals of the UserSet, so no user is
+    visited unless it changed since the last estimate.
+    """
+    graph = infrastructure.get_main_graph()
+    if graph is None:
+        return infeasible_penalty
+    shortest_paths = infrastructure.infrastructures.get(DEFAULT_INFRA_ID, {}).get('shortest_paths', {})
+    applications = app_set.get_all_apps()
+    if app_request_rates is None:
+        app_request_rates = {app_id: user_set.get_request_ratio_total(app_id) for app_id in applications}
+
+    demand = (
+        ((node, app_id), ratio)
+        for app_id in applications
+        for node, ratio in user_set.get_request_ratio_by_node(app_id).items()
+    )
+    return placement_latency(placement, applications, demand, app_request_rates, shortest_paths,
+                             EnabledNodes(graph), infeasible_penalty)
+
+
+def get_disconnected_apps(placement: Optional[Dict[str, Any]], infrastructure: Any) -> List[str]:
+    """Returns a list of apps mapped to disabled nodes."""
+    if not placement or not infrastructure:
+        return []
+    
+    graph = infrastructure.get_main_graph()
+    if not graph:
+        return []
+        
+    disconnected = set()
+    for app_name, ms_placement in placement.items():
+        if isinstance(ms_placement, dict):
+            for ms_id, node_id in ms_placement.items():
+                node_data = graph.nodes.get(node_id, {})
+                if not node_data.get('enable', True):
+                    disconnected.add(app_name)
+        elif isinstance(ms_placement, int) or isinstance(ms_placement, str):
+            node_id = ms_placement
+            node_data = graph.nodes.get(node_id, {})
+            if not node_data.get('enable', True):
+                disconnected.add(app_name)
+                
+    return list(disconnected)
+
 
 class TriggerPolicyManager:
     """
@@ -11,6 +69,12 @@ class TriggerPolicyManager:
         self.sim_set = sim_set
         self.event_counter = 0
         self.last_execution_time = 0.0
+        self.infeasible_penalty = float(config.get('setup', {}).get('infeasible_penalty', INFEASIBLE_PENALTY))
+        # Adaptive policy: estimated latency per unit of request rate of the last solution
+        # right after it was applied, and the impact estimate of every event it decided
+        # not to solve (for calibration)
+        self.baseline_latency: Optional[float] = None
+        self.skipped_regret: List[Dict[str, Any]] = []
 
     def _is_critical_event(self, event: Dict[str, Any], critical_events: list) -> bool:
         # Check action or action_type
@@ -25,7 +89,96 @@ class TriggerPolicyManager:
                 
         return False
 
-    def should_execute_ilp(self, event: Dict[str, Any], global_time: float) -> bool:
+    def record_solution(self, placement: Optional[Dict[str, Any]], infrastructure: Any, app_set: Any, user_set: Any) -> None:
+        """Stores the estimated latency of a freshly applied solution (only used by the adaptive policy)."""
+        if self.config.get('type', 'solve_all') != 'adaptive' or not placement:
+            return
+        self.baseline_latency = self._latency_per_request(placement, infrastructure, app_set, user_set)[1]
+
+    def _latency_per_request(self, placement: Dict[str, Any], infrastructure: Any, app_set: Any, user_set: Any):
+        app_request_rates = {app_id: user_set.get_request_ratio_total(app_id) for app_id in app_set.get_all_apps()}
+        latency = estimate_placement_latency(placement, infrastructure, app_set, user_set, self.infeasible_penalty,
+                                             app_request_rates=app_request_rates)
+        total_requests = sum(app_request_rates.values())
+        return latency, latency / total_requests if total_requests > 0 else latency
+
+    def estimate_impact(self, placement: Dict[str, Any], infrastructure: Any, app_set: Any, user_set: Any) -> Dict[str, Any]:
+        """
+        Cheap estimate of what keeping the current placement costs after an event:
+        - latency: its request-weighted latency now, and the relative increase of the
+          latency per unit of request rate over its value when the placement was computed
+          (users arriving or leaving change the total, not the per-request latency);
+        - capacity_violations: enabled hosting nodes whose 'ram' is below the current RAM
+          of the microservices placed on them;
+        - disconnected_apps: apps with a microservice on a disabled node;
+        - unplaced_apps: apps with a microservice the placement does not cover (e.g. apps
+          created, or microservices replaced, since the solve).
+        The regret is the relative latency increase, or inf if the placement is broken.
+        """
+
+        latency, per_request = self._latency_per_request(placement, infrastructure, app_set, user_set)
+        baseline = self.baseline_latency if self.baseline_latency is not None else per_request
+        if per_request <= baseline:
+            latency_increase = 0.0
+        else:
+            latency_increase = (per_request - baseline) / baseline if baseline > 0 else float('inf')
+
+        # RAM demand of the placement with the apps' current footprints ('ram_used' is
+        # only rewritten by apply_placement, i.e. after a solve)
+        graph = infrastructure.get_main_graph()
+        capacity_violations = 0
+        for node, entries in infrastructure.placement_entries(placement, app_set).items():
+            attrs = graph.nodes[node]
+            demand = sum(ms_ram for _, ms_ram in entries)
+            if attrs.get('enable', True) and demand > attrs.get('ram', float('inf')) + 1e-9:
+                capacity_violations += 1
+
+        disconnected_apps = get_disconnected_apps(placement, infrastructure)
+        unplaced_apps = 0
+        for app_data in app_set.get_all_apps().values():
+            app_placement = placement.get(app_data['name'])
+            if not isinstance(app_placement, dict) or any(
+                    ms['id'] not in app_placement for ms in app_data.get('microservices', [])):
+                unplaced_apps += 1
+        broken = capacity_violations or disconnected_apps or unplaced_apps
+        return {
+            'latency': latency,
+            'latency_per_request': per_request,
+            'latency_increase': latency_increase,
+            'capacity_violations': capacity_violations,
+            'disconnected_apps': len(disconnected_apps),
+            'unplaced_apps': unplaced_apps,
+            'regret': float('inf') if broken else latency_increase,
+        }
+
+    def _should_solve_adaptive(self, event: Dict[str, Any], global_time: float, infrastructure: Any, app_set: Any,
+                               user_set: Any, placement: Optional[Dict[str, Any]]) -> bool:
+        if not placement or self.baseline_latency is None or infrastructure is None:
+            # Nothing to keep yet (or no state to estimate from)
+            return True
+        impact = self.estimate_impact(placement, infrastructure, app_set, user_set)
+        if impact['regret'] > self.config.get('regret_threshold', 0.02):
+            return True
+        record = {
+            'event_index': self.event_counter,
+            'global_time': global_time,
+            'action': event.get('action_type', event.get('action')),
+            **impact,
+        }
+        self.skipped_regret.append(record)
+        logger.info(
+            f"Adaptive trigger: solve skipped at event {self.event_counter} ({record['action']}), "
+            f"estimated regret {impact['regret']:.4f} (latency per request {impact['latency_per_request']:.4f}, baseline {self.baseline_latency:.4f})"
+        )
+        return False
+
+    def should_execute_ilp(self, event: Dict[str, Any], global_time: float, infrastructure: Any = None,
+                           app_set: Any = None, user_set: Any = None,
+                           placement: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Decides whether the solver runs after an event. The system state and the current
+        placement are only used by the adaptive policy.
+        """
         self.event_counter += 1
         policy_type = self.config.get('type', 'solve_all')
 
@@ -93,4 +246,7 @@ class TriggerPolicyManager:
                 return True
             return False
 
+        elif policy_type == 'adaptive':
+            return self._should_solve_adaptive(event, global_time, infrastructure, app_set, user_set, placement)
+
         return True
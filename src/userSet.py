@@ -3,15 +3,20 @@ import numpy as np
 import logging
 import math
 from .eventSet import EventSet, generate_events
+from .userStore import UserStore
+from .mobility import MobilityEngine, get_street_grid
 
 random_users_seed_default = 42
 
 class UserSet:
     def __init__(self):
-        self.users = {}
+        # Columnar store keyed by user id; users[user_id] is a dict-style view
+        self.users = UserStore()
         # Initialize a counter to keep track of User IDs (User_0, Usser_1)
         self.user_counter = 0
         self.hotspots = None
+        # Vectorized mobility used by move_users, built lazily from the user config
+        self._mobility = None
 
     def getNextUserId(self):
         """Generates the next sequential application name."""
@@ -39,18 +44,32 @@ class UserSet:
 
     def getAllUsersByApp(self, appId):
         """Returns all users that requested a specific application."""
-        return [user for user in self.users.values() if user['requestedApp'] == appId]
+        return self.users.views_of(self.users.slots_where('requestedApp', appId))
     
     def getAllUsersByNode(self, nodeId):
         """Returns all users connected to a specific node."""
-        return [user for user in self.users.values() if user['connectedTo'] == nodeId]
+        return self.users.views_of(self.users.slots_where('connectedTo', nodeId))
+
+    def get_user_ids_by_app(self, appId):
+        """Returns the ids of the users that requested a specific application (insertion order)."""
+        return self.users.ids_of(self.users.slots_where('requestedApp', appId))
+
+    def get_user_ids_by_node(self, nodeId):
+        """Returns the ids of the users connected to a specific node (insertion order)."""
+        return self.users.ids_of(self.users.slots_where('connectedTo', nodeId))
+
+    def get_request_ratio_total(self, appId):
+        """Returns the summed request ratio of the users that requested a specific application."""
+        return self.users.request_ratio_total(appId)
+
+    def get_request_ratio_by_node(self, appId):
+        """Returns the request ratio of the users of a specific application summed per access node."""
+        return self.users.request_ratio_by_node(appId)
 
     def add_user(self, userAttributes, sim_set=None):
-        """Adds a new user to the set with a deterministic UUID."""
+        """Adds a new user to the set with a deterministic id (see SimulationSet.new_id)."""
         if sim_set != None:
-            rng = sim_set.rng_user
-            random_bytes = rng.bytes(16)
-            user_id = str(uuid.UUID(bytes=random_bytes))
+            user_id = sim_set.new_id('user')
         else:
             user_id = str(uuid.uuid4())
         userAttributes['id'] = user_id
@@ -62,11 +81,9 @@ class UserSet:
         """Removes a user from the set based on their requested application."""
         list_of_deleted_users = []
 
-        for user_id, user in list(self.users.items()):
-            if user['requestedApp'] == requested_app:
-                # del self.users[user_id]
-                self.remove_user(user_id, **kwargs)
-                list_of_deleted_users.append(user_id)
+        for user_id in self.get_user_ids_by_app(requested_app):
+            self.remove_user(user_id, **kwargs)
+            list_of_deleted_users.append(user_id)
             
         message = f"Users {list_of_deleted_users} have been removed due to their requested app."
         return message
@@ -123,14 +140,9 @@ class UserSet:
                     
                 user['pos'] = (float(new_x), float(new_y))
             
-            new_node = infrastructure.get_closest_edge_node(user['pos'])
+            new_node, dist = infrastructure.get_closest_edge_node_with_distance(user['pos'])
             
             if new_node is not None:
-                actual_graph = infrastructure.get_main_graph()
-                n_pos = np.array(actual_graph.nodes[new_node].get('pos', (0.5, 0.5)))
-                user_pos = np.array(user['pos'])
-                dist = np.linalg.norm(user_pos - n_pos)
-                
                 old_node = user.get('connectedTo')
                 user['connectedTo'] = new_node
                 
@@ -168,15 +180,98 @@ class UserSet:
                 "disconnected": False
             }
         return False
-    
+
+    def move_users(self, user_ids=None, **kwargs):
+        """
+        Moves many users in one vectorized step and re-attaches them to their closest
+        access node in bulk (see mobility.MobilityEngine).
+
+        With user_ids=None every user moves, unless a `window` impact parameter is given:
+        then only the users whose pending move_user event falls within `window` time units
+        move, and those events are rescheduled as if they had fired. Under the
+        'superposition' stream mode the due users are drawn from the aggregated move_user
+        stream (EventSet.due_stream_members), which is then re-timed.
+        """
+        config = kwargs.get('config', {})
+        sim_set = kwargs.get('sim_set')
+        event_set = kwargs.get('event_set')
+        infrastructure = kwargs.get('infrastructure')
+        window = kwargs.get('window')
+
+        user_conf = config.get('user', {})
+        if self._mobility is None or self._mobility.user_conf is not user_conf:
+            self._mobility = MobilityEngine(user_conf)
+
+        due_events = []
+        if user_ids is None and window is not None and event_set is not None:
+            horizon = event_set.global_time + window
+            due_events = [
+                (event_id, event['object_id']) for event_id, event in event_set.events.items()
+                if event['type_object'] == 'user' and event['action'] == 'move_user'
+                and event['object_id'] is not None and event['time'] <= horizon
+            ]
+            user_ids = [user_id for _, user_id in due_events]
+
+            stream_members = event_set.due_stream_members('user', 'move_user', horizon, sim_set)
+            if stream_members:
+                due_events.append((event_set.streams[('user', 'move_user')]['event_id'], None))
+                user_ids.extend(stream_members)
+
+        if user_ids is None:
+            slots = self.users.live_slots()
+        else:
+            slots = np.array([self.users.slot_of(u) for u in user_ids if u in self.users], dtype=np.intp)
+        if len(slots) == 0:
+            return {"message": "No users to move.", "ap_changed": False, "disconnected": False, "moved_users": 0}
+
+        self._mobility.step(self.users, slots, sim_set.rng_user)
+        for event_id, _ in due_events:
+            event_set.update_event_time(event_id, config, sim_set)
+
+        x, y = self.users.get_positions(slots)
+        new_nodes, distances = infrastructure.get_closest_edge_nodes(x, y)
+        if new_nodes is None:
+            return {
+                "message": f"{len(slots)} users moved (no edge node available).",
+                "ap_changed": False,
+                "disconnected": False,
+                "moved_users": len(slots)
+            }
+
+        old_nodes = self.users.get_coded('connectedTo', slots)
+        self.users.set_coded('connectedTo', slots, new_nodes)
+        changed = int(np.count_nonzero(old_nodes != np.array(new_nodes, dtype=object)))
+
+        radius = self.users.get_floats('coverage_radius', slots)
+        out_of_coverage = distances > radius  # NaN radius (None) is never out of coverage
+        status = self.users.get_coded('status', slots)
+        was_out = status == 'out_of_coverage'
+
+        user_ids = self.users.ids_of(slots)
+        disconnected = 0
+        for i in np.flatnonzero(out_of_coverage & ~was_out):
+            self.suspend_user(user_ids[i], reason='out_of_coverage', **kwargs)
+            disconnected += 1
+        reconnected = 0
+        for i in np.flatnonzero(~out_of_coverage & was_out):
+            self.reconnect_user(user_ids[i], **kwargs)
+            reconnected += 1
+
+        return {
+            "message": f"{len(slots)} users moved: {changed} changed access node, {disconnected} went out of coverage, {reconnected} reconnected.",
+            "ap_changed": changed > 0,
+            "disconnected": disconnected > 0,
+            "reconnected": reconnected > 0,
+            "moved_users": len(slots)
+        }
+
     def increase_request_ratio_by_requested_app(self, requested_app, **kwargs):
         """Removes a user from the set based on their requested application."""
-        for user_id, user in list(self.users.items()):
-            if user['requestedApp'] == requested_app:
-                self.increase_request_ratio(user_id, **kwargs)
+        for user_id in self.get_user_ids_by_app(requested_app):
+            self.increase_request_ratio(user_id, **kwargs)
 
-                message = f"Request ratio of user '{self.users[user_id]['name']}' increased due to requested app {requested_app}"
-                return message
+            message = f"Request ratio of user '{self.users[user_id]['name']}' increased due to requested app {requested_app}"
+            return message
         return False
     
     def increase_request_ratio(self, user_id, **kwargs):
@@ -191,10 +286,9 @@ class UserSet:
     
     def decrease_request_ratio_by_requested_app(self, requested_app, **kwargs):
         """Removes a user from the set based on their requested application."""
-        for user_id, user in list(self.users.items()):
-            if user['requestedApp'] == requested_app:
-                self.decrease_request_ratio(user_id, **kwargs)
-                return True
+        for user_id in self.get_user_ids_by_app(requested_app):
+            self.decrease_request_ratio(user_id, **kwargs)
+            return True
         return False
     
     def decrease_request_ratio(self, user_id, **kwargs):
@@ -309,14 +403,10 @@ class UserSet:
             coverage_radius = user.get('coverage_radius', 0.2)
             
             if 'pos' in user:
-                new_node = infrastructure.get_closest_edge_node(user['pos']) if infrastructure else None
+                new_node, dist = infrastructure.get_closest_edge_node_with_distance(user['pos']) if infrastructure else (None, None)
                 
                 out_of_coverage = True
                 if new_node is not None:
-                    actual_graph = infrastructure.get_main_graph()
-                    n_pos = np.array(actual_graph.nodes[new_node].get('pos', (0.5, 0.5)))
-                    user_pos = np.array(user['pos'])
-                    dist = np.linalg.norm(user_pos - n_pos)
                     if coverage_radius is None or dist <= coverage_radius:
                         out_of_coverage = False
                         user['connectedTo'] = new_node
@@ -347,13 +437,8 @@ class UserSet:
         return False
     
 def _move_manhattan_with_intersections(user, distance, width, height, rng, user_conf):
-    spatial_region = user_conf.get('spatial_region', {})
-    N_v = spatial_region.get('num_vertical_streets', 10)
-    N_h = spatial_region.get('num_horizontal_streets', 10)
-    
-    # Precompute streets
-    X_streets = [i * (width / max(1, N_v - 1)) for i in range(N_v)] if N_v > 1 else [width / 2.0]
-    Y_streets = [j * (height / max(1, N_h - 1)) for j in range(N_h)] if N_h > 1 else [height / 2.0]
+    # Street coordinates are precomputed once per spatial_region (see mobility.get_street_grid)
+    x_axis, y_axis = get_street_grid(user_conf)
     
     turn_probs = user_conf.get('mobility', {}).get('turn_probabilities', {'straight': 0.33, 'left': 0.33, 'right': 0.34})
     p_straight = turn_probs.get('straight', 0.33)
@@ -373,15 +458,9 @@ def _move_manhattan_with_intersections(user, distance, width, height, rng, user_
         loop_count += 1
         if direction == 'horizontal':
             next_x = pos_x + sign * remaining_dist
-            crossings = [x for x in X_streets if min(pos_x, next_x) < x < max(pos_x, next_x)]
-            if not crossings and (any(abs(next_x - x) < 1e-5 for x in X_streets)) and not any(abs(pos_x - x) < 1e-5 for x in X_streets):
-                closest = min(X_streets, key=lambda x: abs(next_x - x))
-                crossings = [closest]
+            intersection = _next_intersection(x_axis, pos_x, next_x, sign)
             
-            if crossings:
-                crossings.sort(key=lambda x: abs(x - pos_x))
-                intersection = crossings[0]
-                
+            if intersection is not None:
                 dist_to_intersection = abs(intersection - pos_x)
                 pos_x = intersection
                 remaining_dist -= dist_to_intersection
@@ -407,15 +486,9 @@ def _move_manhattan_with_intersections(user, distance, width, height, rng, user_
                     sign = -1
         else: # vertical
             next_y = pos_y + sign * remaining_dist
-            crossings = [y for y in Y_streets if min(pos_y, next_y) < y < max(pos_y, next_y)]
-            if not crossings and (any(abs(next_y - y) < 1e-5 for y in Y_streets)) and not any(abs(pos_y - y) < 1e-5 for y in Y_streets):
-                closest = min(Y_streets, key=lambda y: abs(next_y - y))
-                crossings = [closest]
-                
-            if crossings:
-                crossings.sort(key=lambda y: abs(y - pos_y))
-                intersection = crossings[0]
+            intersection = _next_intersection(y_axis, pos_y, next_y, sign)
                 
+            if intersection is not None:
                 dist_to_intersection = abs(intersection - pos_y)
                 pos_y = intersection
                 remaining_dist -= dist_to_intersection
@@ -444,6 +517,27 @@ def _move_manhattan_with_intersections(user, distance, width, height, rng, user_
     user['current_direction'] = direction
     user['current_sign'] = sign
 
+def _next_intersection(axis, pos, next_pos, sign):
+    """
+    Returns the first street crossed when walking from pos to next_pos along one axis,
+    or None. A walk that ends within 1e-5 of a street (without starting on one) snaps
+    to that street.
+    """
+    streets = axis.streets
+    if sign > 0:
+        i = axis.first_above(pos)
+        if i < len(streets) and streets[i] < next_pos:
+            return streets[i]
+    else:
+        i = axis.last_below(pos)
+        if i >= 0 and streets[i] > next_pos:
+            return streets[i]
+
+    closest = streets[axis.nearest(next_pos)]
+    if abs(next_pos - closest) < 1e-5 and not abs(pos - streets[axis.nearest(pos)]) < 1e-5:
+        return closest
+    return None
+
 def create_new_user(config, appsSet, infrastructure, user_set, event_set, sim_set, app_id = None):
     user_conf = config.get('user', {})
     user_actions_config = user_conf.get('actions', {})
@@ -487,15 +581,12 @@ def create_new_user(config, appsSet, infrastructure, user_set, event_set, sim_se
         initial_pos = (float(rng.random() * width), float(rng.random() * height))
         
     if user_conf.get('mobility', {}).get('model') == 'manhattan':
-        N_v = spatial_region.get('num_vertical_streets', 10)
-        N_h = spatial_region.get('num_horizontal_streets', 10)
-        X_streets = [i * (width / max(1, N_v - 1)) for i in range(N_v)] if N_v > 1 else [width / 2.0]
-        Y_streets = [j * (height / max(1, N_h - 1)) for j in range(N_h)] if N_h > 1 else [height / 2.0]
+        x_axis, y_axis = get_street_grid(user_conf)
         
-        closest_x = min(X_streets, key=lambda x: abs(x - initial_pos[0]))
+        closest_x = x_axis.streets[x_axis.nearest(initial_pos[0])]
         d_x = abs(closest_x - initial_pos[0])
         
-        closest_y = min(Y_streets, key=lambda y: abs(y - initial_pos[1]))
+        closest_y = y_axis.streets[y_axis.nearest(initial_pos[1])]
         d_y = abs(closest_y - initial_pos[1])
         
         if d_x < d_y:
@@ -0,0 +1,467 @@
+import numpy as np
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Keys of UserSet.newUserItem plus the 'id' set by add_user, in the order they are
+# reported by a UserView. Any other key is optional and kept in insertion order.
+CORE_KEYS = (
+    'name', 'requestedApp', 'appName', 'requestRatio', 'connectedTo', 'centrality',
+    'actions', 'pos', 'speed', 'coverage_radius', 'current_direction', 'current_sign',
+    'current_angle', 'id',
+)
+_CORE_KEY_SET = frozenset(CORE_KEYS)
+
+# Nullable float64 columns (None is stored as NaN)
+FLOAT_COLUMNS = ('requestRatio', 'old_requestRatio', 'centrality', 'speed', 'coverage_radius', 'current_angle')
+
+# Interned columns: int32 codes into a per-column value table (-1 is None)
+CODE_COLUMNS = ('requestedApp', 'connectedTo', 'status', 'current_direction', 'current_sign')
+
+# Interned columns with a reverse index (code -> slots), so users of an app or node are
+# found without scanning the column
+INDEXED_COLUMNS = ('requestedApp', 'connectedTo')
+
+# Plain Python values, one list entry per slot
+OBJECT_COLUMNS = ('id', 'name', 'appName', 'actions')
+
+DEFAULT_CAPACITY = 64
+
+
+class CodeTable:
+    """Bidirectional value <-> int code table of an interned column."""
+
+    __slots__ = ('values', 'codes')
+
+    def __init__(self) -> None:
+        self.values: List[Any] = []
+        self.codes: Dict[Any, int] = {}
+
+    def encode(self, value: Any) -> int:
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value: Any) -> int:
+        """Returns the code of value without interning it (-2 if the value was never seen)."""
+        if value is None:
+            return -1
+        return self.codes.get(value, -2)
+
+    def decode(self, code: int) -> Any:
+        return None if code < 0 else self.values[code]
+
+
+class UserView(MutableMapping):
+    """Dict-style view over one slot of a UserStore."""
+
+    __slots__ = ('_store', '_slot')
+
+    def __init__(self, store: 'UserStore', slot: int) -> None:
+        self._store = store
+        self._slot = slot
+
+    def __getitem__(self, key: str) -> Any:
+        return self._store.get_value(self._slot, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._store.set_value(self._slot, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self._store.del_value(self._slot, key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from CORE_KEYS
+        yield from list(self._store.optional_keys[self._slot])
+
+    def __len__(self) -> int:
+        return len(CORE_KEYS) + len(self._store.optional_keys[self._slot])
+
+    def __contains__(self, key: object) -> bool:
+        return key in _CORE_KEY_SET or key in self._store.optional_keys[self._slot]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (UserView, dict)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+class UserStore(MutableMapping):
+    """
+    Struct-of-arrays storage of the users of a UserSet, keyed by user id.
+
+    Positions, speeds, request ratios and the other numeric attributes live in NumPy
+    arrays indexed by slot; the connected node, requested app, status and heading are
+    interned into int32 codes. Removed slots go to a free-list and are reused. Reading
+    a user returns a UserView, so code written against the dict-of-dicts layout keeps
+    working, while vectorized code can use the columns directly (see live_slots()).
+
+    Values that do not fit their column (e.g. an int request ratio) are kept verbatim in
+    a per-slot overflow dict, so a view always returns exactly what was stored.
+
+    The requested app and connected node also keep a reverse index (code -> slots),
+    and the per-app sum of request ratios is cached until one of the app's users
+    changes, so per-app queries cost O(users of the app) instead of O(all users).
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        capacity = max(1, int(capacity))
+        self.capacity = capacity
+        self.pos_x = np.zeros(capacity)
+        self.pos_y = np.zeros(capacity)
+        self.floats: Dict[str, np.ndarray] = {key: np.full(capacity, np.nan) for key in FLOAT_COLUMNS}
+        self.codes: Dict[str, np.ndarray] = {key: np.full(capacity, -1, dtype=np.int32) for key in CODE_COLUMNS}
+        self.tables: Dict[str, CodeTable] = {key: CodeTable() for key in CODE_COLUMNS}
+        self.objects: Dict[str, List[Any]] = {key: [None] * capacity for key in OBJECT_COLUMNS}
+        # Creation order of each slot, used to report users in insertion order
+        self.seq = np.full(capacity, -1, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        # Optional keys of each slot in insertion order (a shared empty tuple until used)
+        self.optional_keys: List[Any] = [()] * capacity
+        self.overflow: List[Optional[Dict[str, Any]]] = [None] * capacity
+        # Reverse indexes of the INDEXED_COLUMNS and cached request-ratio sums per requestedApp
+        # code, in total and per access node
+        self.members: Dict[str, Dict[int, set]] = {key: {} for key in INDEXED_COLUMNS}
+        self._ratio_totals: Dict[int, float] = {}
+        self._node_ratio_totals: Dict[int, Dict[Any, float]] = {}
+
+        self._slot_of: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._next_slot = 0
+        self._next_seq = 0
+
+    # --- Mapping interface (user id -> UserView) ---
+
+    def __getitem__(self, user_id: str) -> UserView:
+        return UserView(self, self._slot_of[user_id])
+
+    def __setitem__(self, user_id: str, attributes: Any) -> None:
+        if user_id in self._slot_of:
+            del self[user_id]
+        slot = self._allocate()
+        self._slot_of[user_id] = slot
+        self.objects['id'][slot] = user_id
+        for key, value in attributes.items():
+            if key != 'id':
+                self.set_value(slot, key, value)
+
+    def __delitem__(self, user_id: str) -> None:
+        slot = self._slot_of.pop(user_id)
+        self._release(slot)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._slot_of)
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def __contains__(self, user_id: object) -> bool:
+        return user_id in self._slot_of
+
+    def __repr__(self) -> str:
+        return repr({user_id: dict(view.items()) for user_id, view in self.items()})
+
+    # --- Slot management ---
+
+    def _grow(self) -> None:
+        old = self.capacity
+        new = old * 2
+        self.pos_x = np.concatenate([self.pos_x, np.zeros(old)])
+        self.pos_y = np.concatenate([self.pos_y, np.zeros(old)])
+        for key, column in self.floats.items():
+            self.floats[key] = np.concatenate([column, np.full(old, np.nan)])
+        for key, column in self.codes.items():
+            self.codes[key] = np.concatenate([column, np.full(old, -1, dtype=np.int32)])
+        for column in self.objects.values():
+            column.extend([None] * old)
+        self.seq = np.concatenate([self.seq, np.full(old, -1, dtype=np.int64)])
+        self.alive = np.concatenate([self.alive, np.zeros(old, dtype=bool)])
+        self.optional_keys.extend([()] * old)
+        self.overflow.extend([None] * old)
+        self.capacity = new
+
+    def _allocate(self) -> int:
+        if self._free:
+            slot = self._free.pop()
+        else:
+            if self._next_slot == self.capacity:
+                self._grow()
+            slot = self._next_slot
+            self._next_slot += 1
+        self.alive[slot] = True
+        self.seq[slot] = self._next_seq
+        self._next_seq += 1
+        for members in self.members.values():
+            members.setdefault(-1, set()).add(slot)
+        self._ratio_totals.pop(-1, None)
+        self._node_ratio_totals.pop(-1, None)
+        return slot
+
+    def _release(self, slot: int) -> None:
+        self._invalidate_ratio_total(slot)
+        for key, members in self.members.items():
+            self._unindex(members, int(self.codes[key][slot]), slot)
+        self.alive[slot] = False
+        self.seq[slot] = -1
+        self.pos_x[slot] = 0.0
+        self.pos_y[slot] = 0.0
+        for column in self.floats.values():
+            column[slot] = np.nan
+        for column in self.codes.values():
+            column[slot] = -1
+        for column in self.objects.values():
+            column[slot] = None
+        self.optional_keys[slot] = ()
+        self.overflow[slot] = None
+        self._free.append(slot)
+
+    # --- Reverse indexes ---
+
+    @staticmethod
+    def _unindex(members: Dict[int, set], code: int, slot: int) -> None:
+        slots = members.get(code)
+        if slots is not None:
+            slots.discard(slot)
+            if not slots:
+                del members[code]
+
+    def _write_code(self, key: str, slot: int, code: int) -> None:
+        """Stores the code of an interned column, keeping its reverse index in sync."""
+        column = self.codes[key]
+        old = int(column[slot])
+        column[slot] = code
+        members = self.members.get(key)
+        if members is None or old == code:
+            return
+        if key == 'requestedApp':
+            for totals in (self._ratio_totals, self._node_ratio_totals):
+                totals.pop(old, None)
+                totals.pop(code, None)
+        elif key == 'connectedTo':
+            self._node_ratio_totals.pop(int(self.codes['requestedApp'][slot]), None)
+        self._unindex(members, old, slot)
+        members.setdefault(code, set()).add(slot)
+
+    def _invalidate_ratio_total(self, slot: int) -> None:
+        code = int(self.codes['requestedApp'][slot])
+        self._ratio_totals.pop(code, None)
+        self._node_ratio_totals.pop(code, None)
+
+    def request_ratio_total(self, app: Any) -> float:
+        """
+        Sum of the request ratios of the users requesting app. It is accumulated in
+        insertion order, exactly like a loop over all users would, and cached until a
+        user of the app changes.
+        """
+        code = self.tables['requestedApp'].lookup(app)
+        if code == -2:
+            return 0.0
+        total = self._ratio_totals.get(code)
+        if total is None:
+            total = 0.0
+            for slot in self.slots_where('requestedApp', app).tolist():
+                ratio = self.get_value(slot, 'requestRatio')
+                total += float(ratio) if ratio is not None else 0.0
+            self._ratio_totals[code] = total
+        return total
+
+    def request_ratio_by_node(self, app: Any) -> Dict[Any, float]:
+        """
+        Request ratios of the users requesting app summed per access node ('connectedTo'),
+        cached like request_ratio_total until a user of the app changes or moves.
+        """
+        code = self.tables['requestedApp'].lookup(app)
+        if code == -2:
+            return {}
+        by_node = self._node_ratio_totals.get(code)
+        if by_node is None:
+            by_node = {}
+            for slot in self.slots_where('requestedApp', app).tolist():
+                node = self.get_value(slot, 'connectedTo')
+                ratio = self.get_value(slot, 'requestRatio')
+                by_node[node] = by_node.get(node, 0.0) + (float(ratio) if ratio is not None else 0.0)
+            self._node_ratio_totals[code] = by_node
+        return by_node
+
+    def slot_of(self, user_id: str) -> int:
+        return self._slot_of[user_id]
+
+    def live_slots(self) -> np.ndarray:
+        """Slots of all stored users, in insertion order."""
+        slots = np.flatnonzero(self.alive[:self._next_slot])
+        return slots[np.argsort(self.seq[slots], kind='stable')]
+
+    def position_of(self, user_id: str) -> Optional[int]:
+        """Position of a user in insertion order (its index in live_slots()), None if not stored."""
+        slot = self._slot_of.get(user_id)
+        if slot is None:
+            return None
+        seq = self.seq[:self._next_slot]
+        return int(np.count_nonzero(self.alive[:self._next_slot] & (seq < seq[slot])))
+
+    def slots_where(self, key: str, value: Any) -> np.ndarray:
+        """Slots whose interned column `key` equals value, in insertion order."""
+        code = self.tables[key].lookup(value)
+        if code == -2:
+            return np.empty(0, dtype=np.intp)
+        members = self.members.get(key)
+        if members is not None:
+            slots = np.fromiter(members.get(code, ()), dtype=np.intp)
+            return slots[np.argsort(self.seq[slots], kind='stable')]
+        slots = np.flatnonzero(self.codes[key][:self._next_slot] == code)
+        if code == -1:
+            slots = slots[self.alive[slots]]
+        return slots[np.argsort(self.seq[slots], kind='stable')]
+
+    def ids_of(self, slots: np.ndarray) -> List[str]:
+        ids = self.objects['id']
+        return [ids[slot] for slot in slots]
+
+    def views_of(self, slots: np.ndarray) -> List[UserView]:
+        return [UserView(self, int(slot)) for slot in slots]
+
+    # --- Bulk column access (vectorized callers) ---
+
+    def _overflow_slots(self, slots: np.ndarray, key: str) -> List[Tuple[int, int]]:
+        """(position in slots, slot) pairs whose `key` value lives in the overflow dict."""
+        overflow = self.overflow
+        return [
+            (i, slot) for i, slot in enumerate(slots.tolist())
+            if overflow[slot] is not None and key in overflow[slot]
+        ]
+
+    def get_positions(self, slots: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        x = self.pos_x[slots]
+        y = self.pos_y[slots]
+        for i, slot in self._overflow_slots(slots, 'pos'):
+            x[i], y[i] = self.overflow[slot]['pos']
+        return x, y
+
+    def set_positions(self, slots: np.ndarray, x: np.ndarray, y: np.ndarray) -> None:
+        for _, slot in self._overflow_slots(slots, 'pos'):
+            del self.overflow[slot]['pos']
+        self.pos_x[slots] = x
+        self.pos_y[slots] = y
+
+    def get_floats(self, key: str, slots: np.ndarray) -> np.ndarray:
+        """Values of a float column (NaN for None)."""
+        values = self.floats[key][slots]
+        for i, slot in self._overflow_slots(slots, key):
+            value = self.overflow[slot][key]
+            values[i] = value if isinstance(value, (int, float)) else np.nan
+        return values
+
+    def set_floats(self, key: str, slots: np.ndarray, values: np.ndarray) -> None:
+        for _, slot in self._overflow_slots(slots, key):
+            del self.overflow[slot][key]
+        if key == 'requestRatio':
+            for slot in np.asarray(slots).tolist():
+                self._invalidate_ratio_total(slot)
+        self.floats[key][slots] = values
+
+    def get_coded(self, key: str, slots: np.ndarray) -> np.ndarray:
+        """Decoded values of an interned column as an object array (None where unset)."""
+        lookup = np.array(self.tables[key].values + [None], dtype=object)
+        return lookup[self.codes[key][slots]]
+
+    def set_coded(self, key: str, slots: np.ndarray, values: Any) -> None:
+        """Writes the values of an interned column; values may be any sequence of hashables."""
+        table = self.tables[key]
+        for _, slot in self._overflow_slots(slots, key):
+            del self.overflow[slot][key]
+        codes = np.array([table.encode(value) for value in values], dtype=np.int32)
+        if key in self.members:
+            slots = np.asarray(slots)
+            changed = np.flatnonzero(self.codes[key][slots] != codes)
+            for slot, code in zip(slots[changed].tolist(), codes[changed].tolist()):
+                self._write_code(key, slot, code)
+        else:
+            self.codes[key][slots] = codes
+
+    # --- Per-field access ---
+
+    def _is_present(self, slot: int, key: str) -> bool:
+        return key in _CORE_KEY_SET or key in self.optional_keys[slot]
+
+    def get_value(self, slot: int, key: str) -> Any:
+        if not self._is_present(slot, key):
+            raise KeyError(key)
+        overflow = self.overflow[slot]
+        if overflow is not None and key in overflow:
+            return overflow[key]
+        if key == 'pos':
+            return (float(self.pos_x[slot]), float(self.pos_y[slot]))
+        column = self.floats.get(key)
+        if column is not None:
+            value = column[slot]
+            return None if value != value else float(value)
+        column = self.codes.get(key)
+        if column is not None:
+            return self.tables[key].decode(int(column[slot]))
+        return self.objects[key][slot]
+
+    def set_value(self, slot: int, key: str, value: Any) -> None:
+        if key not in _CORE_KEY_SET and key not in self.optional_keys[slot]:
+            self.optional_keys[slot] = list(self.optional_keys[slot]) + [key]
+        if key == 'requestRatio':
+            self._invalidate_ratio_total(slot)
+
+        if self._store_in_column(slot, key, value):
+            overflow = self.overflow[slot]
+            if overflow is not None:
+                overflow.pop(key, None)
+            return
+
+        overflow = self.overflow[slot]
+        if overflow is None:
+            overflow = self.overflow[slot] = {}
+        overflow[key] = value
+
+    def _store_in_column(self, slot: int, key: str, value: Any) -> bool:
+        """Writes value into its column, returning False if it has no exact columnar form."""
+        if key == 'pos':
+            if (isinstance(value, tuple) and len(value) == 2
+                    and type(value[0]) is float and type(value[1]) is float):
+                self.pos_x[slot], self.pos_y[slot] = value
+                return True
+            return False
+        column = self.floats.get(key)
+        if column is not None:
+            if value is None:
+                column[slot] = np.nan
+                return True
+            if type(value) is float and value == value:
+                column[slot] = value
+                return True
+            column[slot] = np.nan
+            return False
+        column = self.codes.get(key)
+        if column is not None:
+            try:
+                self._write_code(key, slot, self.tables[key].encode(value))
+                return True
+            except TypeError:
+                self._write_code(key, slot, -1)
+                return False
+        if key in self.objects:
+            self.objects[key][slot] = value
+            return True
+        return False
+
+    def del_value(self, slot: int, key: str) -> None:
+        if key in _CORE_KEY_SET or key not in self.optional_keys[slot]:
+            raise KeyError(key)
+        self.optional_keys[slot] = [k for k in self.optional_keys[slot] if k != key]
+        overflow = self.overflow[slot]
+        if overflow is not None:
+            overflow.pop(key, None)
+        if key in self.floats:
+            self.floats[key][slot] = np.nan
+        elif key in self.codes:
+            self.codes[key][slot] = -1
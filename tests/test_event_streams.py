@@ -0,0 +1,169 @@
+"""
+Statistical checks of the 'superposition' event stream mode against 'per_entity'.
+
+Both modes drive the same exponential move_user clocks for a population of users, so
+over many seeds they must agree on how often events fire and on the mean time between
+firings (scale / n for n members). Averages are taken over SEEDS runs and compared
+with a relative TOLERANCE of 5%, several standard deviations wider than the sampling
+noise of these run lengths, so the checks are stable yet still catch a wrong rate.
+"""
+import numpy as np
+import pytest
+
+from src.eventSet import EventSet, generate_events
+from src.simulationSet import SimulationSet
+
+SEEDS = range(10)
+TOLERANCE = 0.05
+SCALE = 50.0
+N_USERS = 20
+HORIZON = 2000.0
+
+
+def make_config(scale=SCALE):
+    return {'user': {'actions': {'move_user': {'frequency': {'type': 'exponential', 'scale': scale}}}}}
+
+
+def add_users(event_set, config, sim_set, user_ids):
+    for user_id in user_ids:
+        generate_events({'id': user_id, 'actions': config['user']['actions']}, 'user', event_set, sim_set)
+
+
+def run_until(event_set, config, sim_set, horizon, on_fire=None):
+    """Fires events in time order up to horizon and returns their firing times."""
+    times = []
+    while True:
+        event = event_set.get_first_event()
+        if event is None or event['time'] > horizon:
+            break
+        event_set.global_time = event['time']
+        if on_fire is not None:
+            on_fire(event)
+        times.append(event['time'])
+        event_set.update_event_time(event['id'], config, sim_set)
+    event_set.global_time = horizon
+    return times
+
+
+def firing_stats(mode, seed):
+    sim_set = SimulationSet(master_seed=seed)
+    config = make_config()
+    event_set = EventSet(stream_mode=mode)
+    add_users(event_set, config, sim_set, [f'u{i}' for i in range(N_USERS)])
+    times = run_until(event_set, config, sim_set, HORIZON)
+    return len(times), float(np.mean(np.diff(times)))
+
+
+@pytest.mark.parametrize('mode', ['per_entity', 'superposition'])
+def test_mode_matches_theoretical_rate(mode):
+    counts, gaps = zip(*(firing_stats(mode, seed) for seed in SEEDS))
+    assert np.mean(counts) == pytest.approx(N_USERS * HORIZON / SCALE, rel=TOLERANCE)
+    assert np.mean(gaps) == pytest.approx(SCALE / N_USERS, rel=TOLERANCE)
+
+
+def test_superposition_matches_per_entity():
+    per_entity = [firing_stats('per_entity', seed) for seed in SEEDS]
+    superposition = [firing_stats('superposition', seed) for seed in SEEDS]
+
+    assert np.mean([c for c, _ in superposition]) == pytest.approx(np.mean([c for c, _ in per_entity]), rel=TOLERANCE)
+    assert np.mean([g for _, g in superposition]) == pytest.approx(np.mean([g for _, g in per_entity]), rel=TOLERANCE)
+
+
+def test_superposition_uses_a_single_stream_event():
+    sim_set = SimulationSet(master_seed=0)
+    event_set = EventSet(stream_mode='superposition')
+    add_users(event_set, make_config(), sim_set, [f'u{i}' for i in range(N_USERS)])
+
+    assert len(event_set.events) == 1
+    event = event_set.get_first_event()
+    assert event['aggregated'] and event['object_id'] is None
+    assert len(event_set.streams[('user', 'move_user')]['members']) == N_USERS
+
+
+def test_join_and_leave_rescale_residual_time():
+    sim_set = SimulationSet(master_seed=0)
+    config = make_config()
+    event_set = EventSet(stream_mode='superposition')
+    add_users(event_set, config, sim_set, ['u0', 'u1', 'u2', 'u3'])
+    event = event_set.get_first_event()
+    event_set.global_time = 0.25 * event['time']
+    residual = event['time'] - event_set.global_time
+
+    # 4 -> 5 members: the residual shrinks by 4/5 (rounded to 0.01 like a new per-entity event)
+    add_users(event_set, config, sim_set, ['u4'])
+    joined_residual = event['time'] - event_set.global_time
+    assert joined_residual == pytest.approx(round(residual * 4 / 5, 2))
+
+    # 5 -> 2 members: the residual grows by 5/4, 4/3 and 3/2
+    for user_id in ('u0', 'u3', 'u4'):
+        event_set.remove_events_by_object_id(user_id)
+    assert event['time'] - event_set.global_time == pytest.approx(joined_residual * 5 / 2)
+    assert sorted(event_set.streams[('user', 'move_user')]['members']) == ['u1', 'u2']
+
+    # The last member leaving removes the stream event
+    for user_id in ('u1', 'u2'):
+        event_set.remove_events_by_object_id(user_id)
+    assert event_set.get_first_event() is None
+
+
+def test_join_and_leave_change_firing_rate():
+    """Rates follow the live membership: N, then 3N after joins, then N/2 after leaves."""
+    phase = HORIZON / 2
+    rates = {'initial': [], 'joined': [], 'left': []}
+    for seed in SEEDS:
+        sim_set = SimulationSet(master_seed=seed)
+        config = make_config()
+        event_set = EventSet(stream_mode='superposition')
+        live = {f'u{i}' for i in range(N_USERS)}
+        add_users(event_set, config, sim_set, sorted(live))
+
+        def check_target(event):
+            assert event_set.sample_stream_target(event, sim_set) in live
+
+        rates['initial'].append(len(run_until(event_set, config, sim_set, phase, check_target)) / phase)
+
+        joined = {f'j{i}' for i in range(2 * N_USERS)}
+        add_users(event_set, config, sim_set, sorted(joined))
+        live |= joined
+        rates['joined'].append(len(run_until(event_set, config, sim_set, 2 * phase, check_target)) / phase)
+
+        leaving = sorted(live)[:len(live) - N_USERS // 2]
+        for user_id in leaving:
+            event_set.remove_events_by_object_id(user_id)
+        live -= set(leaving)
+        # Fewer members fire less often: run this phase twice as long for the same precision
+        rates['left'].append(len(run_until(event_set, config, sim_set, 4 * phase, check_target)) / (2 * phase))
+
+    assert np.mean(rates['initial']) == pytest.approx(N_USERS / SCALE, rel=TOLERANCE)
+    assert np.mean(rates['joined']) == pytest.approx(3 * N_USERS / SCALE, rel=TOLERANCE)
+    assert np.mean(rates['left']) == pytest.approx(N_USERS / 2 / SCALE, rel=TOLERANCE)
+
+
+def test_weighted_targets_follow_weight_changes():
+    sim_set = SimulationSet(master_seed=0)
+    config = make_config()
+    event_set = EventSet(stream_mode='superposition')
+    weight = {f'u{i}': float(i % 4) for i in range(N_USERS)}
+    add_users(event_set, config, sim_set, sorted(weight))
+    event_set.set_stream_weights('user', weight.get)
+    event = event_set.get_first_event()
+
+    def draw_counts(draws=20000):
+        counts = dict.fromkeys(weight, 0)
+        for _ in range(draws):
+            counts[event_set.sample_stream_target(event, sim_set)] += 1
+        return counts
+
+    counts = draw_counts()
+    assert all(counts[u] == 0 for u, w in weight.items() if w == 0)
+    for w in (1.0, 2.0, 3.0):
+        share = sum(c for u, c in counts.items() if weight[u] == w) / 20000
+        assert share == pytest.approx(w / 6, rel=TOLERANCE)
+
+    # A weight change is picked up once refreshed, and leaving members are never drawn
+    weight['u0'] = 100.0
+    event_set.refresh_stream_weight('u0')
+    event_set.remove_events_by_object_id('u3')
+    counts = draw_counts()
+    assert counts['u3'] == 0
+    assert counts['u0'] / 20000 == pytest.approx(100.0 / (100.0 + 27.0), rel=TOLERANCE)